@@ -0,0 +1,222 @@
+#!/usr/bin/python3
+#
+# Time-in-status analytics
+#
+# Status changes are only recorded in an issue's changelog.  Rather than
+# retrieving each issue with expand=changelog, the changelogs of every
+# issue matching a search are streamed a page at a time (with only the
+# few fields we need), reduced to per-status durations and discarded.
+#
+# Durations are not kept, only counted: each status has a histogram of
+# logarithmic buckets, each _bucket_ratio times as wide as the one
+# before, plus the exact count, sum, minimum and maximum.  Memory use
+# is fixed per status (_buckets counters), however many issues there
+# are, and percentiles are read from the histogram to within half a
+# bucket (about 1%).
+#
+import math
+import time
+from array import array
+
+from jirate.sorting import parse_date
+
+_fields = ['created', 'status', 'resolutiondate']
+
+# Cloud only returns the most recent part of a long changelog in
+# search results; the rest is retrieved this many entries at a time
+_changelog_page = 100
+
+default_percentiles = (50, 85, 95)
+
+# Bucket 0 holds durations under a second; bucket i holds durations from
+# _bucket_ratio ** (i - 1) to _bucket_ratio ** i seconds.  1200 buckets
+# cover over 600 years.
+_bucket_ratio = 1.02
+_buckets = 1200
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a sorted sequence; None if empty"""
+    if not len(values):
+        return None
+    pos = (len(values) - 1) * pct / 100.0
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class Histogram(object):
+    def __init__(self):
+        """Fixed-size histogram of durations, in seconds
+
+        Attributes:
+          counts: array('L') of the number of durations in each bucket
+          count: number of durations added
+          total: sum of the durations added
+          low: shortest duration added
+          high: longest duration added
+        """
+        self.counts = array('L', [0]) * _buckets
+        self.count = 0
+        self.total = 0.0
+        self.low = None
+        self.high = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, seconds):
+        if seconds < 1.0:
+            idx = 0
+        else:
+            idx = min(int(math.log(seconds) / math.log(_bucket_ratio)) + 1, _buckets - 1)
+        self.counts[idx] = self.counts[idx] + 1
+        self.count = self.count + 1
+        self.total = self.total + seconds
+        self.low = seconds if self.low is None else min(self.low, seconds)
+        self.high = seconds if self.high is None else max(self.high, seconds)
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def _nth(self, rank):
+        # Estimate of the rank-th shortest duration (0-based): the
+        # geometric middle of its bucket, within what was actually seen
+        if rank == 0:
+            return self.low
+        if rank == self.count - 1:
+            return self.high
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen = seen + count
+            if seen > rank:
+                break
+        value = _bucket_ratio ** (idx - 0.5) if idx else 0.5
+        return min(max(value, self.low), self.high)
+
+    def percentile(self, pct):
+        """Linear-interpolated percentile, as percentile() on the sorted
+        durations would give, to within half a bucket; None if empty"""
+        if not self.count:
+            return None
+        pos = (self.count - 1) * pct / 100.0
+        low = int(pos)
+        high = min(low + 1, self.count - 1)
+        low_value = self._nth(low)
+        return low_value + (self._nth(high) - low_value) * (pos - low)
+
+
+class StatusDurations(object):
+    def __init__(self, now=None):
+        """Per-status durations, in seconds, of a set of issues
+
+        Parameters:
+          now: POSIX timestamp used as the end of the current status of
+               unresolved issues (default: the current time)
+
+        Attributes:
+          issues: number of issues added
+          statuses: dict of status name -> index into durations
+          durations: list of Histogram, one per status
+          cycle_times: Histogram of first status change to resolution
+          lead_times: Histogram of creation to resolution
+        """
+        self.now = now if now is not None else time.time()
+        self.issues = 0
+        self.statuses = {}
+        self.durations = []
+        self.cycle_times = Histogram()
+        self.lead_times = Histogram()
+
+    def _column(self, status):
+        idx = self.statuses.get(status)
+        if idx is None:
+            idx = self.statuses[status] = len(self.durations)
+            self.durations.append(Histogram())
+        return self.durations[idx]
+
+    def add(self, raw):
+        """Account for one issue, given its raw data including the changelog"""
+        fields = raw['fields']
+        created = parse_date(fields['created'])
+        resolved = parse_date(fields['resolutiondate']) if fields.get('resolutiondate') else None
+
+        changes = []
+        for history in (raw.get('changelog') or {}).get('histories', []):
+            for item in history['items']:
+                if item.get('field') == 'status':
+                    changes.append((parse_date(history['created']), item.get('fromString'), item.get('toString')))
+        changes.sort(key=lambda change: change[0])
+
+        spent = {}
+        status = changes[0][1] if changes else fields['status']['name']
+        start = created
+        for when, _, to_status in changes:
+            spent[status] = spent.get(status, 0.0) + max(when - start, 0.0)
+            start = when
+            status = to_status
+        # The status a resolved issue ended up in is not part of its work
+        if not resolved:
+            spent[status] = spent.get(status, 0.0) + max(self.now - start, 0.0)
+
+        for status, seconds in spent.items():
+            self._column(status).add(seconds)
+        if resolved:
+            self.lead_times.add(max(resolved - created, 0.0))
+            if changes:
+                self.cycle_times.add(max(resolved - changes[0][0], 0.0))
+        self.issues = self.issues + 1
+
+    def summary(self, percentiles=default_percentiles):
+        """Summarize the durations
+
+        Parameters:
+          percentiles: Percentiles to compute
+
+        Returns:
+          list of (name, count, mean, [percentile values]), statuses in
+          order of first appearance, then 'Cycle time' and 'Lead time'.
+          Counts and means are exact; percentiles are approximate (see
+          Histogram.percentile())
+        """
+        ret = []
+        columns = [(name, self.durations[idx]) for name, idx in self.statuses.items()]
+        columns.extend([('Cycle time', self.cycle_times), ('Lead time', self.lead_times)])
+        for name, histogram in columns:
+            if not histogram.count:
+                continue
+            ret.append((name, histogram.count, histogram.mean(), [histogram.percentile(pct) for pct in percentiles]))
+        return ret
+
+
+def _complete_changelog(jirate_obj, raw):
+    changelog = raw.get('changelog')
+    if not changelog or len(changelog['histories']) >= changelog.get('total', 0):
+        return
+    histories = []
+    while len(histories) < changelog['total']:
+        page = jirate_obj.jira._get_json(f'issue/{raw["key"]}/changelog', params={'startAt': len(histories), 'maxResults': _changelog_page})
+        if not page or not page.get('values'):
+            break
+        histories.extend(page['values'])
+    changelog['histories'] = histories
+
+
+def time_in_status(jirate_obj, search_query, now=None):
+    """Compute time spent in each status by the issues matching a search
+
+    Parameters:
+      jirate_obj: Jirate (or JiraProject) to use for searching
+      search_query: JQL query line (string)
+      now: Optional POSIX timestamp to measure unresolved issues to
+
+    Returns:
+      StatusDurations
+    """
+    ret = StatusDurations(now)
+    for issues in jirate_obj.iter_search(search_query, fields=_fields, expand='changelog'):
+        for issue in issues:
+            if jirate_obj.jira._is_cloud:
+                _complete_changelog(jirate_obj, issue.raw)
+            ret.add(issue.raw)
+    return ret
@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+#
+# Server field schema snapshots
+#
+# Everything Jirate works out from /field - the ID/alias/human name
+# maps, the clauses the server can sort by, a nym index over field IDs
+# and which renderer displays each field - only changes when the
+# server's fields do.  On instances with thousands of custom fields,
+# building it takes a noticeable part of a short command's run time,
+# so the result is saved along with a hash of the /field data it was
+# built from, and reused as long as that hash matches.
+#
+import hashlib
+import json
+import re
+
+from jirate.decor import nym
+from jirate.jira_fields import schema_renderer
+from jirate.localstate import pickle_read, pickle_write
+
+# Bumped when what FieldSchema holds changes
+_version = 2
+
+
+def field_digest(fields):
+    """Hash of /field data (list of dicts)"""
+    # Renderers may already have been attached to definitions we were given
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=repr).encode('utf-8')).hexdigest()
+
+
+class FieldSchema(object):
+    def __init__(self, fields, digest=None):
+        """Maps built from the /field data of a server
+
+        Parameters:
+          fields: /field data (list of dicts)
+          digest: field_digest() of fields, if already known
+
+        Attributes:
+          fields: /field data (not saved with the snapshot)
+          digest: field_digest() of fields
+          field_to_id, field_to_alias, field_to_human: ID, alias and
+              human-readable name of each field, by any of those (or
+              JQL clause name)
+          field_to_clause: field ID -> JQL clause to sort by
+          clause_ids: JQL clause name -> field ID (as used by python-jira)
+          nyms: nym() of field ID -> field ID
+          renderers: field ID -> renderer name; see schema_renderer()
+        """
+        self.fields = fields
+        self.digest = digest or field_digest(fields)
+        self.field_to_id = {}
+        self.field_to_alias = {}
+        self.field_to_human = {}
+        self.field_to_clause = {'key': 'key'}
+        self.clause_ids = {}
+        self.nyms = {}
+        self.renderers = {}
+
+        # For inscrutable reasons Jira returns all possible fields via the /field API...
+        # ...all but one: the "parent" field. We hardcode the translation so higher-level
+        # code doesn't need to deal with that.
+        self._builtin('parent', 'Parent')
+        self._builtin('fixVersions', 'fixversions')
+        self._builtin('lastViewed', 'lastviewed')
+
+        for field in fields:
+            field_id = field['id']
+            name = field['name']
+            alias = nym(name)
+            # append underscores for collisions
+            # XXX hopefully this is extremely rare
+            while alias in self.field_to_id:
+                alias = alias + '_'
+            # Everything maps to everything. field_to_id can return a field ID when fed
+            # either the human name, the alias, or even the ID itself.
+            for val in (field_id, name, alias):
+                self.field_to_id[val] = field_id
+                self.field_to_human[val] = name
+                self.field_to_alias[val] = alias
+            self.nyms.setdefault(nym(field_id), field_id)
+            if 'schema' in field:
+                self.renderers[field_id] = schema_renderer(field['schema'])
+            if field.get('navigable') and field.get('orderable') and field['clauseNames']:
+                # Fields the server can ORDER BY; cf[NNNN] is unambiguous for custom fields
+                clauses = [clause_name for clause_name in field['clauseNames'] if clause_name.startswith('cf[')]
+                clause = clauses[0] if clauses else field['clauseNames'][0]
+                self.field_to_clause[field_id] = f'"{clause}"' if ' ' in clause else clause
+            for clause_name in field['clauseNames']:
+                self.clause_ids[clause_name] = field_id
+                if (re.match('^cf\\[[0-9]+\\]$', clause_name) or clause_name in self.field_to_id):
+                    # Skip nonsense and duplicate alternative names
+                    continue
+                self.field_to_id[clause_name] = field_id
+                self.field_to_human[clause_name] = name
+                self.field_to_alias[clause_name] = alias
+
+    def _builtin(self, jira_val, human_val):
+        self.field_to_id[jira_val] = jira_val
+        self.field_to_id[human_val] = jira_val
+        self.field_to_alias[jira_val] = jira_val
+        self.field_to_alias[human_val] = jira_val
+        self.field_to_human[jira_val] = human_val
+        self.field_to_human[human_val] = human_val
+        self.nyms.setdefault(nym(jira_val), jira_val)
+
+    def __getstate__(self):
+        # The request cache already has /field; don't save it twice
+        return dict(self.__dict__, fields=None)
+
+
+def load_schema(fields, filename=None):
+    """Retrieve the FieldSchema for /field data, reusing the one saved in
+    filename if it was built from the same data, and saving it otherwise
+
+    Parameters:
+      fields: /field data (list of dicts)
+      filename: Optional path to the saved snapshot
+
+    Returns:
+      FieldSchema
+    """
+    digest = field_digest(fields)
+    if filename:
+        saved = pickle_read(filename)
+        if saved and saved.get('version') == _version and saved['schema'].digest == digest:
+            saved['schema'].fields = fields
+            return saved['schema']
+
+    ret = FieldSchema(fields, digest)
+    if filename:
+        pickle_write(filename, {'version': _version, 'schema': ret})
+    return ret
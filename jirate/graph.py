@@ -0,0 +1,239 @@
+#!/usr/bin/python3
+#
+# Issue relationship graphs
+#
+# Following issue links, subtasks and epics by hand costs one GET per
+# issue.  Instead, the graph is walked breadth-first: every issue on a
+# level which we still need to look at is retrieved with one projected
+# 'key in (...)' search, and the children of the epics on that level
+# with one more search per issue type, so a large dependency graph
+# costs a couple of requests per level rather than one per issue.
+#
+# Linked issues, subtasks and parents come with their key, summary and
+# status already embedded, so the issues on the last level are only
+# fetched when we know nothing about them (e.g. an Epic Link, which is
+# just a key).
+#
+from jira.exceptions import JIRAError
+
+default_depth = 5
+
+# Keys per search; keeps the JQL well under URL length limits
+_search_chunk = 100
+
+# What may be followed from an issue
+relation_kinds = ('links', 'children', 'parents')
+
+_graph_fields = ['summary', 'status', 'issuetype', 'issuelinks', 'subtasks', 'parent']
+
+
+class IssueGraph(object):
+    def __init__(self, roots):
+        """Result of walk()
+
+        Attributes:
+          roots: list of issue keys the walk started from
+          nodes: dict of issue key -> (possibly partial) raw fields
+          edges: dict of issue key -> list of (relation, issue key)
+          depth: dict of issue key -> level at which it was found
+          missing: set of issue keys which could not be retrieved
+          truncated: set of issue keys whose relations were not
+                     followed because the depth limit was reached
+        """
+        self.roots = roots
+        self.nodes = {}
+        self.edges = {}
+        self.depth = {}
+        self.missing = set()
+        self.truncated = set()
+
+    def add_edge(self, src, relation, dst):
+        edges = self.edges.setdefault(src, [])
+        for _, key in edges:
+            if key == dst:
+                return False
+        edges.append((relation, dst))
+        return True
+
+    def cycles(self):
+        """Find the edges which close a cycle
+
+        Returns:
+          set of (source key, destination key)
+        """
+        ret = set()
+        state = {}   # key -> 1 while on the current path, 2 when done
+        for root in list(self.roots) + list(self.edges):
+            if root in state:
+                continue
+            # Iterative DFS; large graphs would exceed the recursion limit
+            state[root] = 1
+            stack = [(root, iter(self.edges.get(root, [])))]
+            while stack:
+                src, children = stack[-1]
+                for _, dst in children:
+                    if state.get(dst) == 1:
+                        ret.add((src, dst))
+                    elif dst not in state:
+                        state[dst] = 1
+                        stack.append((dst, iter(self.edges.get(dst, []))))
+                        break
+                else:
+                    state[src] = 2
+                    stack.pop()
+        return ret
+
+    def dot(self):
+        """Render the graph in Graphviz DOT format (string)"""
+        cycles = self.cycles()
+        lines = ['digraph issues {', '  node [shape=box];']
+        for key in sorted(self.depth, key=lambda key: (self.depth[key], key)):
+            fields = self.nodes.get(key) or {}
+            label = key
+            if fields.get('summary'):
+                label = label + '\\n' + _dot_escape(fields['summary'])
+            if fields.get('status'):
+                label = label + '\\n[' + _dot_escape(fields['status']['name']) + ']'
+            attrs = f'label="{label}"'
+            if key in self.roots:
+                attrs = attrs + ', style=bold'
+            lines.append(f'  "{key}" [{attrs}];')
+        for src in self.edges:
+            for relation, dst in self.edges[src]:
+                attrs = f'label="{_dot_escape(relation)}"'
+                if (src, dst) in cycles:
+                    attrs = attrs + ', color=red'
+                lines.append(f'  "{src}" -> "{dst}" [{attrs}];')
+        lines.append('}')
+        return '\n'.join(lines)
+
+
+def _dot_escape(text):
+    return str(text).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _relations(fields, follow, epic_field=None):
+    # Yields (relation, key, embedded fields or None)
+    if 'links' in follow:
+        for link in fields.get('issuelinks') or []:
+            if 'outwardIssue' in link:
+                yield (link['type']['outward'], link['outwardIssue']['key'], link['outwardIssue'].get('fields'))
+            elif 'inwardIssue' in link:
+                yield (link['type']['inward'], link['inwardIssue']['key'], link['inwardIssue'].get('fields'))
+    if 'children' in follow:
+        for subtask in fields.get('subtasks') or []:
+            yield ('subtask', subtask['key'], subtask.get('fields'))
+    if 'parents' in follow:
+        parent = fields.get('parent')
+        if parent and parent.get('key'):
+            yield ('parent', parent['key'], parent.get('fields'))
+        if epic_field and fields.get(epic_field):
+            yield ('epic', fields[epic_field], None)
+
+
+def _search_chunks(jirate_obj, clause, keys, fields):
+    ret = []
+    for start in range(0, len(keys), _search_chunk):
+        chunk = keys[start:start + _search_chunk]
+        ret.extend(jirate_obj.search_issues(f'{clause} in (' + ', '.join(chunk) + ')', fields=fields))
+    return ret
+
+
+def _fetch(jirate_obj, graph, keys, fields):
+    try:
+        issues = _search_chunks(jirate_obj, 'key', keys, fields)
+    except JIRAError:
+        # At least one key did not resolve (deleted, or no permission);
+        # fall back to asking for each of them
+        issues = []
+        for key in keys:
+            try:
+                issues.extend(jirate_obj.search_issues(f'key = {key}', fields=fields))
+            except JIRAError:
+                pass
+    for issue in issues:
+        graph.nodes[issue.key] = issue.raw['fields']
+    for key in keys:
+        if key not in graph.nodes:
+            graph.missing.add(key)
+
+
+def walk(jirate_obj, roots, depth=default_depth, follow=('links',), fields=None):
+    """Walk the relationships of a set of issues breadth-first
+
+    Parameters:
+      jirate_obj: Jirate (or JiraProject) to use for searching
+      roots: list of issue keys to start from
+      depth: Maximum number of relationships to follow from a root
+      follow: Kinds of relationships to follow; any of relation_kinds:
+              'links' (issue links), 'children' (subtasks and issues in
+              epics) and 'parents' (parent issues and epics)
+      fields: Optional list of additional fields to retrieve; when given,
+              every issue in the graph is retrieved in full
+
+    Returns:
+      IssueGraph
+    """
+    for kind in follow:
+        if kind not in relation_kinds:
+            raise ValueError(f'Unknown relationship: {kind}')
+    roots = [jirate_obj._issue_key(key) for key in roots]
+    graph = IssueGraph(roots)
+
+    extra_fields = fields
+    fields = list(_graph_fields) + [field for field in fields or [] if field not in _graph_fields]
+    epic_field = None
+    if not jirate_obj.jira._is_cloud:
+        epic_field = jirate_obj.field_to_id('Epic Link')
+        if epic_field and epic_field not in fields:
+            fields.append(epic_field)
+
+    complete = set()
+    frontier = []
+    for key in roots:
+        if key not in graph.depth:
+            graph.depth[key] = 0
+            frontier.append(key)
+
+    level = 0
+    while frontier:
+        expand = level < depth
+        # On the last level, what the links told us is enough to draw it
+        wanted = [key for key in frontier if key not in complete and (expand or extra_fields or key not in graph.nodes)]
+        if wanted:
+            _fetch(jirate_obj, graph, wanted, fields)
+            complete.update(wanted)
+        if not expand:
+            for key in frontier:
+                if key in complete and any(True for _ in _relations(graph.nodes.get(key) or {}, follow, epic_field)):
+                    graph.truncated.add(key)
+            break
+
+        found = []
+
+        def _found(src, relation, dst, dst_fields=None):
+            graph.add_edge(src, relation, dst)
+            if dst not in graph.nodes and dst_fields:
+                graph.nodes[dst] = dst_fields
+            if dst not in graph.depth:
+                graph.depth[dst] = level + 1
+                found.append(dst)
+
+        for key in frontier:
+            for relation, dst, dst_fields in _relations(graph.nodes.get(key) or {}, follow, epic_field):
+                _found(key, relation, dst, dst_fields)
+
+        if 'children' in follow:
+            parents = [{'key': key, 'fields': graph.nodes[key]} for key in frontier if key in graph.nodes]
+            for parent, children in jirate_obj.child_issues(parents, fields).items():
+                for issue in children:
+                    issue_fields = issue.raw['fields']
+                    relation = 'subtask' if (issue_fields.get('issuetype') or {}).get('subtask') else 'child'
+                    if issue.key not in complete:
+                        graph.nodes[issue.key] = issue_fields
+                        complete.add(issue.key)
+                    _found(parent, relation, issue.key)
+
+        frontier = found
+        level = level + 1
+    return graph
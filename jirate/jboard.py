@@ -1,19 +1,29 @@
 #!/usr/bin/python3
 
 import copy
+import itertools
+import json
 import os
 import re
 import sys
+import threading
 import types
+from array import array
 
 from toolchest.strutil import list_or_splitstr
 
 from jira import JIRA, JIRAError
 from jira.utils import json_loads as _json_loads
-from jira.resources import Issue, User
+from jira.resources import Board, Component, Issue, IssueType, Sprint, User, Version
 
 from jirate.decor import nym
-from jirate.jira_input import transmogrify_input, setup_input
+from jirate.jira_input import transmogrify_input, input_renderers
+from jirate.jql import compile_jql
+from jirate.workers import parallel
+from jirate.sorting import parse_sort, priority_order, sort_issues
+from jirate.analytics import time_in_status
+from jirate.field_schema import load_schema
+from jirate.project_meta import ProjectMetadata
 
 
 # lhh - seems python 3.12.4 doesn't let us simply replace
@@ -23,6 +33,23 @@ _test_ = False
 if "pytest" in sys.modules:
     _test_ = True
 
+# Maximum number of keys to request in a single 'key in (...)' search
+_prefetch_chunk = 100
+
+# Group for issues with no value in a field (stats)
+_no_value = '(none)'
+
+# Issue types whose children are found via '"<type> Link"' on Data Center
+_megaliths = ('Epic', 'Feature')
+
+# Maximum number of issues Jira accepts in one bulk creation request
+_bulk_create_chunk = 50
+
+# Every project set up by sibling() in this process: server connection
+# (JIRA object) -> project key -> JiraProject
+_projects = {}
+_projects_lock = threading.Lock()
+
 
 def json_loads(val):
     if _test_:
@@ -56,21 +83,16 @@ def _resolve_field(obj, field_name):
     return obj._jirate.field(obj, field_name)
 
 
-# Intelligent field update for Issue
-def _update_field(issue, field_name_human, value_human, operation='set', fields=None):
-    if not fields:
-        # TODO use native python-jira issue.fields instead of raw json
-        # (Except operations are not captured, which we need)
-        fields = issue._jirate.fields(issue.key)
+def _field_update(fields, field_name_human, value_human, operation, renderers, where):
+    # Build the 'update' operations for one change to one field
     if not isinstance(value_human, list):
         value_human = str(value_human)
 
-    # TODO multi-field sets?
     field_args = {field_name_human: value_human}
-    output_args = transmogrify_input(fields, **field_args)[0]
+    output_args = transmogrify_input(fields, renderers, **field_args)[0]
 
     if not output_args:
-        raise AttributeError(f'No field like \'{field_name_human}\' in {issue.key}')
+        raise AttributeError(f'No field like \'{field_name_human}\' in {where}')
 
     # Set up for the rest
     field_ids = [key for key in output_args.keys()]
@@ -80,16 +102,64 @@ def _update_field(issue, field_name_human, value_human, operation='set', fields=
 
     ops = field['operations']
     if operation not in ops:
-        raise ValueError(f'Cannot perform \'{operation}\' on \'{field_name_human}\' of {issue.key}; try: {ops}')
+        raise ValueError(f'Cannot perform \'{operation}\' on \'{field_name_human}\' of {where}; try: {ops}')
 
     # Add and remove use a different format than 'set'.
     # There's also 'modify', but ... that one's even more complicated.
     if operation in ['add', 'remove']:
-        update_args = {field_id: [{operation: val} for val in send_val]}
-    else:
-        update_args = {field_id: [{operation: send_val}]}
+        return {field_id: [{operation: val} for val in send_val]}
+    return {field_id: [{operation: send_val}]}
+
+
+def _creation_meta_key(fields):
+    # (project key, issue type ID) of an issue about to be created, if
+    # known without asking; see Jirate.edit_metadata()
+    project = fields.get('project')
+    issuetype = fields.get('issuetype')
+    if isinstance(project, dict):
+        project = project.get('key')
+    if not project or not isinstance(issuetype, dict) or not issuetype.get('id'):
+        return None
+    return (str(project), str(issuetype['id']))
+
+
+def _creation_refs(fields):
+    # python-jira looks these up by name for create_issue(); the REST API
+    # itself takes them by key or name
+    ret = dict(fields)
+    if isinstance(ret.get('project'), (str, int)):
+        ret['project'] = {'key': str(ret['project'])}
+    if isinstance(ret.get('issuetype'), str):
+        ret['issuetype'] = {'name': ret['issuetype']}
+    elif isinstance(ret.get('issuetype'), int):
+        ret['issuetype'] = {'id': str(ret['issuetype'])}
+    return ret
+
+
+def _fields_update(fields, changes, renderers, where):
+    # Combine several changes into one 'update'
+    ret = {}
+    for field_name_human, operation, value_human in changes:
+        for field_id, ops in _field_update(fields, field_name_human, value_human, operation, renderers, where).items():
+            ret.setdefault(field_id, []).extend(ops)
+    return ret
+
 
-    return issue.update(**update_args)
+# Intelligent field update for Issue
+def _update_fields(issue, changes, fields=None):
+    if not fields:
+        # TODO use native python-jira issue.fields instead of raw json
+        # (Except operations are not captured, which we need)
+        fields = issue._jirate.fields(issue.key)
+
+    # Everything is checked before anything is sent, and it is all
+    # sent at once
+    update = _fields_update(fields, changes, issue._jirate._input_renderers, issue.key)
+    return issue.update(update=update)
+
+
+def _update_field(issue, field_name_human, value_human, operation='set', fields=None):
+    return _update_fields(issue, [(field_name_human, operation, value_human)], fields)
 
 
 def _resolve_field_setup(jirate_obj, issue_obj):
@@ -98,17 +168,46 @@ def _resolve_field_setup(jirate_obj, issue_obj):
         raise Exception('API BREAK: \'field\' is now part of jira.resources.Issue. Please file a bug against Jirate!')
     if hasattr(issue_obj, 'update_field'):
         raise Exception('API BREAK: \'update_field\' is now part of jira.resources.Issue. Please file a bug against Jirate!')
+    if hasattr(issue_obj, 'update_fields'):
+        raise Exception('API BREAK: \'update_fields\' is now part of jira.resources.Issue. Please file a bug against Jirate!')
     issue_obj._jirate = jirate_obj
     issue_obj.field = types.MethodType(_resolve_field, issue_obj)
     issue_obj.update_field = types.MethodType(_update_field, issue_obj)
+    issue_obj.update_fields = types.MethodType(_update_fields, issue_obj)
 
 
-def _check_fields(issue, name):
+def _group_values(value):
+    # Display values of a field for grouping purposes
+    if value is None or value == [] or value == '':
+        return [_no_value]
+    if isinstance(value, list):
+        ret = []
+        for item in value:
+            ret.extend(_group_values(item))
+        return ret
+    if isinstance(value, dict):
+        for key in ('displayName', 'name', 'value', 'key', 'id'):
+            if value.get(key):
+                return [str(value[key])]
+        return [_no_value]
+    if isinstance(value, float) and value.is_integer():
+        return [str(int(value))]
+    return [str(value)]
+
+
+def _check_fields(issue, name, schema=None):
     if name in issue.raw['fields']:
         return name
     if nym(name) in issue.raw['fields']:
         return nym(name)
-    for field in issue.raw['fields']:
+    fields = issue.raw['fields']
+    if schema:
+        field = schema.nyms.get(nym(name))
+        if field in fields:
+            return field
+        # Only fields the server did not tell us about are left to check
+        fields = [field for field in fields if field not in schema.field_to_id]
+    for field in fields:
         if nym(name) == nym(field):
             return field
     return None
@@ -117,14 +216,37 @@ def _check_fields(issue, name):
 class Jirate(object):
     """High-level wrapper for python-jira"""
 
+    # Whether issues retrieved are kept for issue(); see _index_issues()
+    _caches_issues = False
+
     def __init__(self, jira):
         self.jira = jira
+        # Optional path where the field schema snapshot is kept
+        self.schema_file = None
+        self._schema = None
         self._field_to_id = None
         self._field_to_alias = None
         self._field_to_human = None
+        self._field_to_clause = None
+        self.max_workers = None
         jira.user = types.MethodType(_user_fix, jira)
         jira.user_by_key = types.MethodType(_user_by_key, jira)
-        setup_input(jira)  # Need to make input more object-private
+        # Per-server; Cloud and Data Center expect users differently
+        self._input_renderers = input_renderers(jira)
+        # (project, issue type, status, target) -> transition
+        self._transition_plans = {}
+        # Users don't change during a command; look each up once
+        self._myself = None
+        self._user_ids = {}
+        self._priority_order = None
+        # Field rendering for this server (see jira_fields.output_renderers());
+        # None for the one set up by apply_field_renderers()
+        self.output_fields = None
+        # Optional jirate.userdir.UserDirectory, consulted before the server
+        self.user_directory = None
+        # (project, issue type) -> editmeta fields
+        self._edit_metadata = {}
+        self._bulk_create_ok = True
 
     def _issue_key(self, alias):
         if isinstance(alias, str):
@@ -137,7 +259,100 @@ class Jirate(object):
 
     @property
     def user(self):
-        return self.jira.myself()
+        if self._myself is None:
+            self._myself = self.jira.myself()
+        return self._myself
+
+    def _cached_issue(self, key):
+        # Base class has no issue cache
+        return None
+
+    def _index_issues(self, issues):
+        pass
+
+    def prefetch(self, issue_list):
+        """Retrieve a set of issues using as few searches as possible so
+        that subsequent calls to issue() for any of them are answered
+        locally.  Issues which are already known are not requested again.
+
+        Parameters:
+          issue_list: string of keys or list of keys (strings)
+
+        Returns:
+          list of jira.resources.Issue retrieved from the server
+        """
+        # Nowhere to keep them; the searches would be wasted
+        if not issue_list or not self._caches_issues:
+            return []
+        keys = []
+        for alias in list_or_splitstr(issue_list):
+            if isinstance(alias, Issue):
+                continue
+            key = self._issue_key(alias)
+            if key not in keys and not self._cached_issue(key):
+                keys.append(key)
+
+        # One lookup costs the same as a search; let issue() handle it
+        if len(keys) < 2:
+            return []
+
+        ret = []
+        for start in range(0, len(keys), _prefetch_chunk):
+            chunk = keys[start:start + _prefetch_chunk]
+            try:
+                ret.extend(self.search_issues('key in (' + ', '.join(chunk) + ')'))
+            except JIRAError:
+                # At least one key did not resolve. Leave these to
+                # issue(), which reports missing issues individually.
+                pass
+        self._index_issues(ret)
+        return ret
+
+    def child_issues(self, parents, fields=None):
+        """Retrieve the issues in a set of epics (or features) using one
+        search per issue type rather than one per parent.  Subtasks are
+        not included; they are listed in their parents already.
+
+        Parameters:
+          parents: list of jira.resources.Issue or raw issue data; those
+                   which cannot have children are ignored
+          fields: Optional list of fields to retrieve (default: all)
+
+        Returns:
+          dict of parent key -> list of jira.resources.Issue
+        """
+        groups = {}
+        for parent in parents:
+            raw = parent if isinstance(parent, dict) else parent.raw
+            issuetype = raw['fields'].get('issuetype') or {}
+            if self.jira._is_cloud:
+                if issuetype.get('hierarchyLevel', 0) > 0:
+                    groups.setdefault('parent', []).append(raw['key'])
+            elif issuetype.get('name') in _megaliths:
+                groups.setdefault(issuetype['name'] + ' Link', []).append(raw['key'])
+
+        ret = {}
+        for link_name, keys in groups.items():
+            if link_name == 'parent':
+                clause = link_field = 'parent'
+            else:
+                clause = f'"{link_name}"'
+                link_field = self.field_to_id(link_name)
+            search_fields = fields
+            if fields and link_field and link_field not in fields:
+                search_fields = list(fields) + [link_field]
+
+            for start in range(0, len(keys), _prefetch_chunk):
+                chunk = keys[start:start + _prefetch_chunk]
+                for issue in self.search_issues(f'{clause} in (' + ', '.join(chunk) + ')', fields=search_fields):
+                    value = issue.raw['fields'].get(link_field) if link_field else None
+                    if isinstance(value, dict):
+                        value = value.get('key')
+                    if value not in chunk and len(chunk) == 1:
+                        value = chunk[0]
+                    if value in chunk:
+                        ret.setdefault(value, []).append(issue)
+        return ret
 
     def attach(self, issue_alias, url, description):
         """Attach an external URL to an issue
@@ -160,6 +375,10 @@ class Jirate(object):
         Returns:
           list of jira.resources.User
         """
+        if self.user_directory:
+            found = self.user_directory.search(username)
+            if found is not None:
+                return [User(self.jira._options, self.jira._session, raw=raw) for raw in found]
         # Search userlist for a username.  This is provided like this
         # so we can expand functionality later. Max is 50 by default;
         # we'll start with that
@@ -167,6 +386,8 @@ class Jirate(object):
             users = self.jira.search_users(query=username)
         else:
             users = self.jira.search_users(username)
+        if self.user_directory:
+            self.user_directory.add([user.raw for user in users if getattr(user, 'raw', None)])
         return users
 
     def field_to_id(self, alias_or_human):
@@ -217,76 +438,234 @@ class Jirate(object):
             return self._field_to_human[id_or_alias]
         return None
 
-    def _builtin_map_init(self, jira_val, human_val):
-        self._field_to_id[jira_val] = jira_val
-        self._field_to_id[human_val] = jira_val
-        self._field_to_alias[jira_val] = jira_val
-        self._field_to_alias[human_val] = jira_val
-        self._field_to_human[jira_val] = human_val
-        self._field_to_human[human_val] = human_val
+    @property
+    def schema(self):
+        """jirate.field_schema.FieldSchema of the server; built from /field, or
+        loaded from schema_file if /field has not changed since"""
+        if self._schema is None:
+            self._schema = load_schema(self.jira.fields(), self.schema_file)
+            # python-jira builds the same thing with another /field call
+            if not self.jira._fields_cache_value:
+                self.jira._fields_cache_value = self._schema.clause_ids
+        return self._schema
 
     def _field_map_init(self):
-        # For inscrutable reasons Jira returns all possible fields via the /field API...
-        # ...all but one: the "parent" field. We hardcode the translation so higher-level
-        # code doesn't need to deal with that.
-        self._field_to_id = {}
-        self._field_to_alias = {}
-        self._field_to_human = {}
-        self._builtin_map_init('parent', 'Parent')
-        self._builtin_map_init('fixVersions', 'fixversions')
-        self._builtin_map_init('lastViewed', 'lastviewed')
-
-        fields = self.jira.fields()
-        for field in fields:
-            field_id = field['id']
-            name = field['name']
-            alias = nym(name)
-            # append underscores for collisions
-            # XXX hopefully this is extremely rare
-            while alias in self._field_to_id:
-                alias = alias + '_'
-            # Everything maps to everything. _field_to_id can return a field ID when fed
-            # either the human name, the alias, or even the ID itself.
-            for val in (field_id, name, alias):
-                self._field_to_id[val] = field_id
-                self._field_to_human[val] = name
-                self._field_to_alias[val] = alias
-            for clause_name in field['clauseNames']:
-                if (re.match('^cf\\[[0-9]+\\]$', clause_name) or clause_name in self._field_to_id):
-                    # Skip nonsense and duplicate alternative names
-                    continue
-                self._field_to_id[clause_name] = field_id
-                self._field_to_human[clause_name] = name
-                self._field_to_alias[clause_name] = alias
+        schema = self.schema
+        self._field_to_id = schema.field_to_id
+        self._field_to_alias = schema.field_to_alias
+        self._field_to_human = schema.field_to_human
+        self._field_to_clause = schema.field_to_clause
 
-    def search_issues(self, search_query):
-        """Run a JQL search and assemble the results into one list
+    def iter_search(self, search_query, fields=None, expand=None):
+        """Run a JQL search, yielding one page of results at a time so
+        callers processing large result sets need not hold all of them
 
         Parameters:
           search_query: JQL query line (string)
+          fields: Optional list of fields to retrieve (default: all)
+          expand: Optional expand parameter (e.g. 'changelog')
 
-        Returns:
+        Yields:
           list of jira.resources.Issue
         """
-        # Don't chunk in cloud.
+        search_args = {}
+        if fields:
+            search_args['fields'] = fields
+        if expand:
+            search_args['expand'] = expand
+
         if self.jira._is_cloud:
-            ret = self.jira.enhanced_search_issues(search_query, maxResults=0)
-        else:
-            index = 0
-            chunk_len = 50      # So we can detect end
-            ret = []
+            token = None
             while True:
-                issues = self.jira.search_issues(search_query, startAt=index, maxResults=chunk_len)
-                if not len(issues):
-                    break
-                ret.extend(issues)
-                index = index + len(issues)
-                if len(issues) < chunk_len:
+                issues = self.jira.enhanced_search_issues(search_query, nextPageToken=token, maxResults=100, **search_args)
+                for issue in issues:
+                    _resolve_field_setup(self, issue)
+                if len(issues):
+                    yield issues
+                token = issues.nextPageToken
+                if not token:
                     break
-        for issue in ret:
-            _resolve_field_setup(self, issue)
+            return
+
+        index = 0
+        chunk_len = 50      # So we can detect end
+        while True:
+            issues = self.jira.search_issues(search_query, startAt=index, maxResults=chunk_len, **search_args)
+            if not len(issues):
+                break
+            for issue in issues:
+                _resolve_field_setup(self, issue)
+            yield issues
+            index = index + len(issues)
+            if len(issues) < chunk_len:
+                break
+
+    def search_issues(self, search_query, fields=None, expand=None, order=None):
+        """Run a JQL search and assemble the results into one list
+
+        Parameters:
+          search_query: JQL query line (string)
+          fields: Optional list of fields to retrieve (default: all)
+          expand: Optional expand parameter (e.g. 'changelog')
+          order: Optional sort order from sort_order(); replaces any
+                 ORDER BY in search_query when the server can sort by
+                 every field, otherwise the results are sorted locally
+
+        Returns:
+          list of jira.resources.Issue
+        """
+        order_by = self.order_by(order) if order else None
+        if order_by:
+            search_query = re.split(r'(?:^|\s+)order\s+by\s+', search_query, flags=re.IGNORECASE)[0] + f' ORDER BY {order_by}'
+
+        ret = []
+        for issues in self.iter_search(search_query, fields, expand):
+            ret.extend(issues)
+        if order and not order_by:
+            ret = self.sort_issues(ret, order)
         return ret
 
+    def sort_order(self, spec):
+        """Resolve a sort specification to field IDs
+
+        Parameters:
+          spec: 'field[:desc],...' (string)
+
+        Returns:
+          list of (field ID, descending)
+        """
+        ret = []
+        for name, descending in parse_sort(spec):
+            if nym(name) in ('key', 'issuekey'):
+                field_id = 'key'
+            else:
+                field_id = self.field_to_id(name) or self.field_to_id(nym(name))
+            if not field_id:
+                raise ValueError(f'No such field: {name}')
+            ret.append((field_id, descending))
+        return ret
+
+    def priority_order(self):
+        """Sort positions of the server's priorities; see
+        jirate.sorting.priority_order()"""
+        if self._priority_order is None:
+            self._priority_order = priority_order([prio.raw for prio in self.jira.priorities()])
+        return self._priority_order
+
+    def sort_issues(self, issues, order, value_func=None):
+        """Sort issues locally, putting priorities in the server's order
+
+        Parameters:
+          issues: list of jira.resources.Issue or raw issue data
+          order: Sort order from sort_order()
+          value_func: Optional function (issue, field ID) -> raw value
+
+        Returns:
+          new list of issues
+        """
+        priorities = None
+        if 'priority' in [field_id for field_id, _ in order]:
+            priorities = self.priority_order()
+        return sort_issues(issues, order, value_func, priorities)
+
+    def order_by(self, order):
+        """JQL ORDER BY clause (without 'ORDER BY') for a sort order from
+        sort_order(), or None if the server cannot sort by every field"""
+        if self._field_to_clause is None:
+            self._field_map_init()
+        clauses = []
+        for field_id, descending in order:
+            if field_id not in self._field_to_clause:
+                return None
+            clauses.append(self._field_to_clause[field_id] + (' DESC' if descending else ' ASC'))
+        return ', '.join(clauses)
+
+    def count(self, search_query):
+        """Count issues matching a JQL search without retrieving them
+
+        Parameters:
+          search_query: JQL query line (string)
+
+        Returns:
+          number of matching issues (approximate on Jira Cloud)
+        """
+        if self.jira._is_cloud:
+            return self.jira.approximate_issue_count(search_query)
+        # maxResults=0 to python-jira's search_issues() means 'everything'
+        ret = self.jira._get_json('search', params={'jql': search_query, 'maxResults': 0, 'fields': 'key'})
+        return ret['total']
+
+    def latest_update(self, search_query):
+        """Find when the issues matching a JQL search last changed without
+        retrieving them
+
+        Parameters:
+          search_query: JQL query line (string) without ORDER BY
+
+        Returns:
+          (most recent 'updated' value or None, number of matching issues)
+        """
+        search_query = f'{search_query} ORDER BY updated DESC'
+        if self.jira._is_cloud:
+            issues = self.jira.enhanced_search_issues(search_query, maxResults=1, fields=['updated'])
+            latest = issues[0].raw['fields']['updated'] if len(issues) else None
+            return (latest, self.count(search_query))
+        ret = self.jira._get_json('search', params={'jql': search_query, 'maxResults': 1, 'fields': 'updated'})
+        latest = ret['issues'][0]['fields']['updated'] if ret['issues'] else None
+        return (latest, ret['total'])
+
+    def count_many(self, queries):
+        """Run several counts concurrently
+
+        Parameters:
+          queries: list of JQL query lines
+
+        Returns:
+          list of counts, in the same order as queries
+
+        Raises:
+          The first error encountered, if any count failed
+        """
+        ret = []
+        for query, count, err in parallel(self.count, queries, self.max_workers):
+            if err:
+                raise err
+            ret.append(count)
+        return ret
+
+    def group_counts(self, search_query, field_ids):
+        """Count issues grouped by the values of one or more fields.
+        Only the named fields are retrieved.  Issues with several values
+        in a field (labels, components...) count toward each value.
+
+        Parameters:
+          search_query: JQL query line (string)
+          field_ids: list of field IDs to group by
+
+        Returns:
+          (dict of value tuple -> count, total issues)
+        """
+        slots = {}
+        counts = array('L')
+        total = 0
+        for issues in self.iter_search(search_query, fields=field_ids):
+            for issue in issues:
+                total = total + 1
+                values = [_group_values(issue.raw['fields'].get(field_id)) for field_id in field_ids]
+                for group in itertools.product(*values):
+                    if group not in slots:
+                        slots[group] = len(counts)
+                        counts.append(0)
+                    counts[slots[group]] += 1
+        return ({group: counts[slot] for group, slot in slots.items()}, total)
+
+    def _issue_from_raw(self, raw):
+        """Build an Issue from raw JSON (e.g. stored locally) without
+        contacting the server"""
+        issue = Issue(self.jira._options, self.jira._session, raw=raw)
+        _resolve_field_setup(self, issue)
+        return issue
+
     def _field(self, issue, field_name):
         """Reconcile a field in an issue with custom field defs
         on the jira server or an issue's fields. Does not retrieve
@@ -309,7 +688,7 @@ class Jirate(object):
         fname = self.field_to_id(field_name)
         if fname in issue.raw['fields']:
             return fname
-        fname = _check_fields(issue, field_name)
+        fname = _check_fields(issue, field_name, self.schema)
         if fname in issue.raw['fields']:
             return fname
         raise AttributeError(str(issue) + f' has no field like {field_name}')
@@ -333,6 +712,45 @@ class Jirate(object):
         fname = self._field(issue, field_name)
         return issue.raw['fields'][fname]
 
+    def edit_metadata(self, issue):
+        """Retrieve the fields which may be edited in an issue.  Issues of
+        the same project and type share the result, so it is retrieved
+        once for each.
+
+        Parameters:
+          issue: jira.resources.Issue; partial issues are fine as long
+                 as they include the project and issuetype fields
+
+        Returns:
+          dict of fields (shared; do not modify)
+        """
+        fields = issue.raw.get('fields') or {}
+        try:
+            meta_key = (fields['project']['key'], fields['issuetype']['id'])
+        except (KeyError, TypeError):
+            meta_key = None
+        return self._cached_edit_metadata(meta_key, issue.raw['self'])
+
+    def _known_edit_metadata(self, meta_key):
+        # Edit metadata we have without asking the server, or None
+        return self._edit_metadata.get(meta_key)
+
+    def _remember_edit_metadata(self, meta_key, fields):
+        self._edit_metadata[meta_key] = fields
+
+    def _cached_edit_metadata(self, meta_key, issue_url):
+        ret = self._known_edit_metadata(meta_key) if meta_key else None
+        if ret is not None:
+            return ret
+
+        # XXX HERE THERE BE DRAGONS
+        # NOT IMPLEMENTED UPSTREAM
+        url = os.path.join(issue_url, 'editmeta')
+        ret = json_loads(self.jira._session.get(url))['fields']
+        if meta_key:
+            self._remember_edit_metadata(meta_key, ret)
+        return ret
+
     def fields(self, issue_alias):
         """Determine the fields available for an issue
 
@@ -343,14 +761,91 @@ class Jirate(object):
           dict of fields
         """
         issue = self.issue(issue_alias)
-        # XXX HERE THERE BE DRAGONS
-        # NOT IMPLEMENTED UPSTREAM
-        url = os.path.join(issue.raw['self'], 'editmeta')
-        field_blob = json_loads(self.jira._session.get(url))
-        return field_blob['fields']
+        return dict(self.edit_metadata(issue))
+
+    def edit_issues(self, edits):
+        """Change the fields of a set of issues; each issue gets one
+        update with all of its changes
+
+        editmeta is retrieved once per project and issue type, values are
+        translated once per set of changes and editmeta, and the updates
+        are sent concurrently.
+
+        Parameters:
+          edits: list of (jira.resources.Issue, changes); partial issues
+                 are fine as long as they include the project and
+                 issuetype fields.  changes is a list of (human readable
+                 field name, operation, value); operation is 'set', 'add'
+                 or 'remove', and value is a string or a list.  Issues
+                 may share the same changes list.
+
+        Returns:
+          list of (jira.resources.Issue, error), in the order given;
+          error is None for issues which were updated
+        """
+        ret = []
+        pending = []
+        updates = {}
+        for issue, changes in edits:
+            result = [issue, None]
+            ret.append(result)
+            try:
+                fields = self.edit_metadata(issue)
+            except JIRAError as e:
+                result[1] = e
+                continue
+            update_key = (id(fields), id(changes))
+            if update_key not in updates:
+                try:
+                    updates[update_key] = _fields_update(fields, changes, self._input_renderers, issue.key)
+                except (AttributeError, ValueError) as e:
+                    updates[update_key] = e
+            if isinstance(updates[update_key], Exception):
+                result[1] = updates[update_key]
+                continue
+            pending.append((result, updates[update_key]))
+
+        def _put(item):
+            result, update = item
+            # PUT /rest/api/2/issue/{issueIdOrKey}
+            self.jira._session.put(result[0].raw['self'], data={'update': update})
+
+        for (result, _), _, err in parallel(_put, pending, self.max_workers):
+            result[1] = err
+        return [tuple(result) for result in ret]
+
+    def edit_fields(self, issues, changes):
+        """Make the same changes to the fields of a set of issues; see
+        edit_issues()
+
+        Parameters:
+          issues: list of jira.resources.Issue
+          changes: list of (human readable field name, operation, value)
+
+        Returns:
+          list of (jira.resources.Issue, error)
+        """
+        return self.edit_issues([(issue, changes) for issue in issues])
+
+    def edit_field(self, issues, field_name, value, operation='set'):
+        """Make the same change to a field of a set of issues; see
+        edit_fields()
+
+        Parameters:
+          issues: list of jira.resources.Issue
+          field_name: human readable field name
+          value: value (string) or values (list)
+          operation: 'set', 'add' or 'remove'
+
+        Returns:
+          list of (jira.resources.Issue, error)
+        """
+        return self.edit_fields(issues, [(field_name, operation, value)])
 
     def get_user(self, username):
-        """Determine JIRA's normalized username for someone
+        """Determine JIRA's normalized username for someone.  Results are
+        remembered, so repeated lookups do not go to the server; with a
+        user_directory, users it already knows about are resolved locally.
 
         Parameters:
           username: email, display name or username
@@ -364,20 +859,32 @@ class Jirate(object):
             if 'name' in self.user:
                 return self.user['name']
             return self.user['accountId']
+        if username in self._user_ids:
+            return self._user_ids[username]
+        if self.user_directory:
+            ret = self.user_directory.resolve(username)
+            if ret:
+                self._user_ids[username] = ret
+                return ret
         if self.jira._is_cloud:
             users = self.jira.search_users(query=username)
         else:
             users = self.jira.search_users(username)
+        if self.user_directory:
+            self.user_directory.add([user.raw for user in users if getattr(user, 'raw', None)])
         if len(users) > 1:
             raise ValueError(f'Multiple matching users for \'{username}\'')
         elif not users:
             raise ValueError(f'No matching users for \'{username}\'')
 
         try:
-            return users[0].name
+            ret = users[0].name
         except Exception:
-            pass
-        return users[0].accountId
+            ret = users[0].accountId
+        self._user_ids[username] = ret
+        if self.user_directory:
+            self.user_directory.remember(username, ret)
+        return ret
 
     def api_call(self, uri, raw=False):
         url = self.jira._get_url(uri)
@@ -396,38 +903,33 @@ class Jirate(object):
 
         Parameters:
           issue_aliases: list of issue keys or IDs (list of strings)
-          users: list of users (list of strings)
+          users: list of users (list of strings); default is yourself
 
         Returns:
-          list of issues successfully assigned to the user(s)
+          list of (jira.resources.Issue, error), in the order given;
+          error is None for issues which were assigned
         """
         if isinstance(users, str):
             users = [users]
-        issues = self.issues(issue_aliases)
-
-        for issue in issues:
-            user_ids = []
-
-            # first is assignee
-            if users:
-                for user in users:
-                    uid = self.get_user(user)
-                    if uid not in user_ids:
-                        user_ids.append(uid)
-            else:
-                # Just me
-                if 'name' in self.user:
-                    user = self.user['name']
-                elif 'accountId' in self.user:
-                    user = self.user['accountId']
-                user_ids = [user]
-                # user_ids = [user['id']]
-
-            if not len(users):
-                return
-
-            user = user_ids.pop(0)
-            self.jira.assign_issue(issue.key, user)
+        # Resolve everyone before touching any issue
+        user_ids = []
+        for user in users or ['me']:
+            uid = self.get_user(user)
+            if uid not in user_ids:
+                user_ids.append(uid)
+        issues = [issue for issue in self.issues(issue_aliases) or [] if issue]
+
+        # first is assignee
+        user = user_ids.pop(0)
+        payload = {'accountId': user} if self.jira._is_cloud else {'name': user}
+
+        def _assign(issue):
+            # jira.assign_issue() would search for the user again
+            # PUT /rest/api/2/issue/{issueIdOrKey}/assignee
+            self.jira._session.put(os.path.join(issue.raw['self'], 'assignee'), data=payload)
+
+        results = parallel(_assign, issues, self.max_workers)
+        return [(issue, err) for issue, _, err in results]
 
     def sprint_info(self, project_key, states=['active', 'future']):
         """Retrieve all sprints and boards for a project.
@@ -494,14 +996,16 @@ class Jirate(object):
         return self.jira.comment(issue.raw['key'], comment_id)
 
     def comment(self, issues, text, visibility=None):
-        """Attach a new comment to a set of issues
+        """Attach a new comment to a set of issues.  The comments are
+        posted concurrently; the issues themselves are not retrieved.
 
         Parameters:
-          issues: issue key or ID (string)
+          issues: issue key or ID (string), or list of them
           text: Text to attach as comment
 
         Returns:
-          [jira.resources.Issue] for updated issues
+          list of (issue key, error), in the order given; error is None
+          for issues which were commented on
         """
         issue_list = list_or_splitstr(issues)
 
@@ -514,14 +1018,19 @@ class Jirate(object):
             elif isinstance(visibility, dict):
                 comment_data['visibility'] = visibility
 
-        ret = []
-        for alias in issue_list:
-            issue = self.issue(alias)
+        def _post(key):
             # Use simple comment mode to add a comment
-            url = os.path.join(issue.raw['self'], 'comment')
-            if self.jira._session.post(url, data=comment_data):
-                ret.append(issue)
-        return ret
+            # POST /rest/api/2/issue/{issueIdOrKey}/comment
+            self.jira._session.post(self.jira._get_url(f'issue/{key}/comment'), data=comment_data)
+
+        # Keys may repeat; comment once
+        keys = []
+        for alias in issue_list:
+            key = self._issue_key(alias)
+            if key not in keys:
+                keys.append(key)
+        # Rate limiting (429) is retried with backoff by the session
+        return [(key, err) for key, _, err in parallel(_post, keys, self.max_workers)]
 
     def close(self, issues, **args):
         """Close an issue
@@ -542,45 +1051,198 @@ class Jirate(object):
         """
         return self.move(issues, 'Closed', **args)
 
-    def create(self, field_definitions=None, **args):
+    def _creation_parent(self, args):
+        # Make sure we create in correct project if we're creating
+        # a subtask. Also resolve parent issue.
+        if 'parent' in args and isinstance(args['parent'], str):
+            # Only inherit the parent's project if no explicit project was specified.
+            # Jira supports cross-project parent links, so unconditionally overriding
+            # the project here breaks creation of issues whose parent is in a different
+            # project (e.g. an OSPRH Epic parented to a RHOSSTRAT Initiative).
+            if 'project' not in args:
+                parent_issue = self.issue(args['parent'])
+                args['parent'] = parent_issue.key
+                args['project'] = parent_issue.raw['fields']['project']['key']
+            else:
+                args['parent'] = self._issue_key(args['parent'])
+
+    def _refetch_creation_fields(self, meta_key):
+        # Field definitions for creating issues of a project and type,
+        # retrieved anew after the server refused one, or None if asking
+        # again would not change anything
+        return None
+
+    def _creation_update(self, meta_key, extra, issue_url=None):
+        # Values for the fields which could not be set at creation, or
+        # None if we need the new issue to find out
+        if not issue_url and (not meta_key or self._known_edit_metadata(meta_key) is None):
+            return None
+        update_fields = self._cached_edit_metadata(meta_key, issue_url)
+        return transmogrify_input(update_fields, self._input_renderers, **extra)[0]
+
+    def create(self, field_definitions=None, prefetch=True, **args):
         """Create a new issue using key/value pairs
 
+        Fields which cannot be set at creation are set by an update right
+        after it.  If the edit metadata for the project and issue type is
+        already known, they are checked before the issue is created.  If
+        the server refuses the issue and the field definitions came from
+        an earlier run, it is tried once more with current ones.
+
         Parameters:
           field_definitions: List of creation definitions for the
                              issue type.
+          prefetch: Retrieve the new issue; if False, the returned issue
+                    only has its key, ID and URL
           **args: Dictionary of key/value pairs (dict)
 
         Returns:
           jira.resources.Issue
         """
-        # Make sure we create in correct project if we're creating
-        # a subtask. Also resolve parent issue.
-        if 'parent' in args and isinstance(args['parent'], str):
-            parent_issue = self.issue(args['parent'])
-            args['parent'] = parent_issue.key
-            # Only inherit the parent's project if no explicit project was specified.
-            # Jira supports cross-project parent links, so unconditionally overriding
-            # the project here breaks creation of issues whose parent is in a different
-            # project (e.g. an OSPRH Epic parented to a RHOSSTRAT Initiative).
-            if 'project' not in args:
-                args['project'] = parent_issue.raw['fields']['project']['key']
+        self._creation_parent(args)
 
         # Transmogrify other fields
-        (new_args, extra) = transmogrify_input(field_definitions, **args)
-        issue = self.jira.create_issue(**new_args)
-        if extra:
-            # We had fields that weren't resolved on creation, so
-            # perform an immediate update to resolve them
-            update_fields = self.fields(issue)
-            (update_args, unused) = transmogrify_input(update_fields, **extra)
-            # If there's no actual fields to update, don't call it.
-            # XXX: What if the issue is created but the extra field(s) are
-            #      not part of update metadata?
-            #      What is correct error course here?
-            if update_args:
-                issue.update(update_args)
+        (new_args, extra) = transmogrify_input(field_definitions, self._input_renderers, **args)
+        meta_key = _creation_meta_key(new_args)
+        update_args = self._creation_update(meta_key, extra) if extra else None
+
+        try:
+            issue = self.jira.create_issue(prefetch=prefetch and not extra, **new_args)
+        except JIRAError as e:
+            # e.g. a field has been made required since
+            field_definitions = self._refetch_creation_fields(meta_key) if e.status_code == 400 else None
+            if not field_definitions:
+                raise
+            (new_args, extra) = transmogrify_input(field_definitions, self._input_renderers, **args)
+            update_args = self._creation_update(meta_key, extra) if extra else None
+            issue = self.jira.create_issue(prefetch=prefetch and not extra, **new_args)
+        if not extra:
+            return issue
+
+        # We had fields that weren't resolved on creation, so
+        # perform an immediate update to resolve them
+        if update_args is None:
+            update_args = self._creation_update(meta_key, extra, issue.raw['self'])
+        # If there's no actual fields to update, don't call it.
+        # XXX: What if the issue is created but the extra field(s) are
+        #      not part of update metadata?
+        #      What is correct error course here?
+        if update_args:
+            # PUT /rest/api/2/issue/{issueIdOrKey}
+            self.jira._session.put(issue.raw['self'], data={'fields': update_args})
+        if prefetch:
+            issue = self.jira.issue(issue.key)
         return issue
 
+    def _bulk_create(self, field_list):
+        # POST /rest/api/2/issue/bulk; list of (Issue or None, error)
+        url = self.jira._get_url('issue/bulk')
+        data = {'issueUpdates': [{'fields': _creation_refs(fields)} for fields in field_list]}
+        try:
+            raw = json_loads(self.jira._session.post(url, data=data))
+        except JIRAError as e:
+            # Some issues could not be created; the rest were
+            if e.status_code != 400 or e.response is None:
+                raise
+            raw = json.loads(e.response.text)
+
+        errors = {}
+        for error in raw.get('errors') or []:
+            element = error.get('elementErrors') or {}
+            messages = list(element.get('errorMessages') or []) + [f'{name}: {text}' for name, text in (element.get('errors') or {}).items()]
+            errors[error['failedElementNumber']] = JIRAError(status_code=400, text='; '.join(messages))
+        created = iter(raw.get('issues') or [])
+        ret = []
+        for idx in range(len(field_list)):
+            if idx in errors:
+                ret.append((None, errors[idx]))
+            else:
+                ret.append((Issue(self.jira._options, self.jira._session, raw=next(created)), None))
+        return ret
+
+    def create_issues(self, issue_list):
+        """Create several issues
+
+        Issues are created using Jira's bulk creation API, a batch at a
+        time.  If the server doesn't support it, they are created
+        concurrently instead.  Fields which can't be set at creation are
+        then set with one update per issue, as with create().
+
+        Parameters:
+          issue_list: list of (field definitions, dict of key/value
+                      pairs); see create()
+
+        Returns:
+          list of (jira.resources.Issue or None, error), in the order
+          given.  Returned issues only have their key, ID and URL.  An
+          issue may be returned along with an error if it was created
+          but its remaining fields could not be set.
+        """
+        ret = [[None, None] for _ in issue_list]
+        prepared = []
+        for idx, (field_definitions, args) in enumerate(issue_list):
+            args = dict(args)
+            try:
+                self._creation_parent(args)
+                (new_args, extra) = transmogrify_input(field_definitions, self._input_renderers, **args)
+                meta_key = _creation_meta_key(new_args)
+                update_args = self._creation_update(meta_key, extra) if extra else None
+            except (AttributeError, ValueError) as e:
+                ret[idx][1] = e
+                continue
+            prepared.append((idx, new_args, extra, meta_key, update_args))
+
+        todo = list(prepared)
+        while todo and self._bulk_create_ok:
+            chunk = todo[:_bulk_create_chunk]
+            try:
+                results = self._bulk_create([item[1] for item in chunk])
+            except JIRAError as e:
+                if e.status_code in (404, 405):
+                    # No bulk creation here
+                    self._bulk_create_ok = False
+                    break
+                results = [(None, e)] * len(chunk)
+            for item, result in zip(chunk, results):
+                ret[item[0]] = list(result)
+            todo = todo[_bulk_create_chunk:]
+
+        if todo:
+            def _create(item):
+                return self.jira.create_issue(prefetch=False, **item[1])
+
+            for item, issue, err in parallel(_create, todo, self.max_workers):
+                ret[item[0]] = [issue, err]
+
+        # Refused issues are not tried again, as the field definitions
+        # came from the caller, but the next run gets current ones
+        refused = set([item[3] for item in prepared if isinstance(ret[item[0]][1], JIRAError) and ret[item[0]][1].status_code == 400])
+        for meta_key in refused:
+            self._refetch_creation_fields(meta_key)
+
+        # Anything which couldn't be set at creation
+        updates = []
+        for idx, new_args, extra, meta_key, update_args in prepared:
+            issue = ret[idx][0]
+            if not extra or not issue:
+                continue
+            try:
+                if update_args is None:
+                    update_args = self._creation_update(meta_key, extra, issue.raw['self'])
+            except (AttributeError, ValueError, JIRAError) as e:
+                ret[idx][1] = e
+                continue
+            if update_args:
+                updates.append((idx, issue.raw['self'], update_args))
+
+        def _update(item):
+            # PUT /rest/api/2/issue/{issueIdOrKey}
+            self.jira._session.put(item[1], data={'fields': item[2]})
+
+        for item, _, err in parallel(_update, updates, self.max_workers):
+            ret[item[0]][1] = err
+        return [tuple(result) for result in ret]
+
     def update_issue(self, issue_alias, field_definitions=None, **kwargs):
         """Update an issue using key/value pairs
 
@@ -614,6 +1276,7 @@ class Jirate(object):
         for field in kwargs:
             args[self.field_to_id(field)] = kwargs[field]
         issues = list_or_splitstr(issue_list)
+        self.prefetch(issues)
         for issue_alias in issues:
             issue = self.issue(issue_alias)
             if not issue:
@@ -774,28 +1437,45 @@ class Jirate(object):
             return transitions['transitions']
 
     def _find_transition(self, issue, status):
-        transitions = self.transitions(issue)
-        for transition in transitions:
+        if isinstance(issue, str):
+            issue = self.issue(issue)
+        # Workflows are per project and issue type, so every issue which
+        # shares those and its current status shares the transition
+        fields = issue.raw.get('fields') or {}
+        try:
+            plan_key = (fields['project']['key'], fields['issuetype']['id'], fields['status']['id'], str(status))
+        except (KeyError, TypeError):
+            plan_key = None
+        if plan_key in self._transition_plans:
+            return self._transition_plans[plan_key]
+
+        ret = None
+        for transition in self.transitions(issue) or []:
             trans_state = transition['to']['name']
             trans_state_id = transition['to']['id']
             if trans_state == status or nym(trans_state) == status or str(status) == str(trans_state_id):
-                return transition
-        return None
+                ret = transition
+                break
+        if plan_key:
+            self._transition_plans[plan_key] = ret
+        return ret
 
-    def move(self, issue_list, status, **args):
-        """Execute a transition to move a set of issues to the desired status
+    def transition_issues(self, issue_list, status, **args):
+        """Move a set of issues to the desired status, reporting on each
 
-        Jira doesn't have a status you can update; you have to retrieve possible
-        transitions and satisfy those requirements. Each issue has its own transition map
-        according to the issue type within a given project
+        Transitions are looked up once per project, issue type and
+        current status, and every issue is checked before any of them
+        is moved.  The moves themselves are issued concurrently.
 
         Parameters:
-          issue_aliases: list keys or issue IDs (list of string)
+          issue_list: list keys or issue IDs (list of string)
           status: Desired status
           **args: field=value pairs to set on transition
 
         Returns:
-          list of successfully moved issues (list of string)
+          list of (jira.resources.Issue, error), in the order given;
+          error is None for issues which were moved, otherwise the
+          reason (string or exception) they were not
         """
         issue_aliases = list_or_splitstr(issue_list)
         issues = self.issues(issue_aliases)
@@ -804,31 +1484,62 @@ class Jirate(object):
             fails = list(set(issue_aliases) - set([issue.key for issue in issues]))
             raise ValueError('No such issue(s): ' + str(fails))
 
-        moved = []
+        ret = []
+        pending = []
+        payloads = {}
         for issue in issues:
             if not issue:
                 continue
             transition = self._find_transition(issue, status)
             if not transition:
+                ret.append([issue, f'No transition to {status}'])
                 continue
             # API cleanup:
             # If it's already in the target status, don't apply the move
             if transition['to']['name'] == issue.fields.status.name:
+                ret.append([issue, f'Already in {issue.fields.status.name}'])
                 continue
 
-            data = {'transition': {'id': transition['id']}}
-            if args and 'fields' in transition:
-                new_args = transmogrify_input(transition['fields'], **args)[0]
-                data['fields'] = new_args
-                if new_args == {}:
-                    oops = [args.keys()]
-                    raise ValueError(f'field(s) not allowed in transition: {oops}')
-
-            # POST /rest/api/2/issue/{issueIdOrKey}/transitions
-            url = os.path.join(issue.raw['self'], 'transitions')
+            # Cached transitions are shared, so is what we send
+            if id(transition) not in payloads:
+                data = {'transition': {'id': transition['id']}}
+                if args and 'fields' in transition:
+                    new_args = transmogrify_input(transition['fields'], self._input_renderers, **args)[0]
+                    data['fields'] = new_args
+                    if new_args == {}:
+                        oops = [args.keys()]
+                        raise ValueError(f'field(s) not allowed in transition: {oops}')
+                payloads[id(transition)] = data
+            result = [issue, None]
+            ret.append(result)
+            pending.append((result, payloads[id(transition)]))
+
+        def _post(item):
+            result, data = item
+            # POST /rest/api/2/issue/{issueIdOrKey}/transitions
+            url = os.path.join(result[0].raw['self'], 'transitions')
             self.jira._session.post(url, data=data)
-            moved.append(issue)
-        return moved
+
+        for (result, _), _, err in parallel(_post, pending, self.max_workers):
+            result[1] = err
+        return [tuple(result) for result in ret]
+
+    def move(self, issue_list, status, **args):
+        """Execute a transition to move a set of issues to the desired status
+
+        Jira doesn't have a status you can update; you have to retrieve possible
+        transitions and satisfy those requirements. Each issue has its own transition map
+        according to the issue type within a given project
+
+        Parameters:
+          issue_aliases: list keys or issue IDs (list of string)
+          status: Desired status
+          **args: field=value pairs to set on transition
+
+        Returns:
+          list of successfully moved issues (list of string)
+        """
+        return [issue for issue, err in self.transition_issues(issue_list, status, **args) if not err]
 
     def link_types(self):
         """Wrapper for jira.issue_link_types()"""
@@ -871,6 +1582,7 @@ class Jirate(object):
         Returns:
           count of links removed
         """
+        self.prefetch([left_alias, right_alias])
         left = self.issue(left_alias)
         right = self.issue(right_alias)
 
@@ -899,18 +1611,32 @@ class Jirate(object):
 
 
 class JiraProject(Jirate):
+    _caches_issues = True
+
     def __init__(self, jira, project, closed_status=None, readonly=False, allow_code=False):
         super().__init__(jira)
         self._ro = readonly
         self._config = None
         self._closed_status = closed_status
-        self._project = self.jira.project(project)
         self._issue_types = None
+        self._create_metadata = {}
+        # Statuses, issue types, etc. are retrieved as they are needed
+        self.metadata = ProjectMetadata('')
         self.custom_fields = None
         self.project_name = project
         self.allow_code = allow_code
+        self.mirror = None
+        # Projects ls/search cover (see sibling())
+        self.project_keys = [project]
+        # Projects asked for by name (-p), if any; other servers are only
+        # contacted for those configured on them
+        self.requested_keys = None
+        # JiraProjects on other servers to cover, once connected
+        self.servers = None
         self.refresh()
 
+    @property
+    def closed_status(self):
         if self._closed_status is None:
             # guess at common closed states
             for status in ['CLOSED', 'DONE', 'RESOLVED']:
@@ -920,6 +1646,65 @@ class JiraProject(Jirate):
                     break
                 except KeyError:
                     pass
+        return self._closed_status
+
+    def sibling(self, project):
+        """Another project on the same server, sharing this project's
+        session, request cache, field maps, issue cache, metadata caches,
+        mirror and user configuration; the project's own metadata is only
+        retrieved when it is needed.  Each project is only set up once
+        per server connection; later calls (from any JiraProject using the
+        same connection) return the same JiraProject.
+
+        Parameters:
+          project: Project key
+
+        Returns:
+          JiraProject
+        """
+        with _projects_lock:
+            known = _projects.setdefault(self.jira, {})
+            known.setdefault(self.project_name, self)
+            if project in known:
+                return known[project]
+        # Field maps are per-server; make sure they exist before sharing
+        self.field_to_id('key')
+        ret = JiraProject(self.jira, project, readonly=self._ro, allow_code=self.allow_code)
+        ret._field_to_id = self._field_to_id
+        ret._field_to_alias = self._field_to_alias
+        ret._field_to_human = self._field_to_human
+        ret._field_to_clause = self._field_to_clause
+        ret.schema_file = self.schema_file
+        ret._schema = self._schema
+        for key in self._config:
+            if key != 'states':
+                ret._config[key] = self._config[key]
+        ret.custom_fields = self.custom_fields
+        ret.mirror = self.mirror
+        ret.max_workers = self.max_workers
+        ret.project_keys = self.project_keys
+        if hasattr(self, 'request_cache'):
+            ret.request_cache = self.request_cache
+        # These are keyed by project (and issue type), so may be shared
+        ret._create_metadata = self._create_metadata
+        ret.metadata = self.metadata
+        ret._edit_metadata = self._edit_metadata
+        ret._transition_plans = self._transition_plans
+        ret._user_ids = self._user_ids
+        ret.user_directory = self.user_directory
+        ret.output_fields = self.output_fields
+        # Someone else may have gotten here first
+        with _projects_lock:
+            return known.setdefault(project, ret)
+
+    def siblings(self):
+        """JiraProjects for every key in project_keys, created concurrently"""
+        ret = []
+        for key, project, err in parallel(self.sibling, self.project_keys, self.max_workers):
+            if err:
+                raise err
+            ret.append(project)
+        return ret
 
     def _issue_key(self, alias):
         try:
@@ -933,14 +1718,56 @@ class JiraProject(Jirate):
         if not self._config:
             self._config = {'states': {},
                             'issue_map': {}}
+        self._states_loaded = False
 
-        self.refresh_lists()
+    def _project_meta(self, facet, fetch):
+        # The project isn't checked up front; the first request about it
+        # says clearly when it doesn't exist
+        def _fetch():
+            try:
+                return fetch()
+            except JIRAError as e:
+                if e.status_code != 404:
+                    raise
+                raise JIRAError(f'No such project: {self.project_name}', status_code=404, url=e.url) from e
+        return self.metadata.get(self.project_name, facet, _fetch)
+
+    def _project_raw(self):
+        def _fetch():
+            raw = self.jira.project(self.project_name).raw
+            # These come along with the project; no need to ask again
+            for facet in ('components', 'versions'):
+                if facet in raw:
+                    self.metadata.put(self.project_name, facet, raw[facet])
+            return raw
+        return self._project_meta('project', _fetch)
+
+    def _refetch_creation_fields(self, meta_key):
+        if not meta_key or self.metadata.retrieved(meta_key[0], ('createmeta', meta_key[1])):
+            return None
+        self._create_metadata.pop(meta_key, None)
+        self.metadata.invalidate(meta_key[0], ('createmeta', meta_key[1]))
+        metadata = self.issue_metadata(meta_key[1], meta_key[0])
+        return metadata['fields'] if metadata else None
+
+    def _known_edit_metadata(self, meta_key):
+        # Kept with the creation metadata, so creating an issue with fields
+        # which can only be set by an update costs one request less
+        if meta_key not in self._edit_metadata:
+            fields = self.metadata.peek(meta_key[0], ('editmeta', meta_key[1]))
+            if fields is not None:
+                self._edit_metadata[meta_key] = fields
+        return super()._known_edit_metadata(meta_key)
+
+    def _remember_edit_metadata(self, meta_key, fields):
+        super()._remember_edit_metadata(meta_key, fields)
+        self.metadata.put(meta_key[0], ('editmeta', meta_key[1]), fields)
 
     def refresh_lists(self):
-        # DANGER DANGER - using private stuff because upstream doesn't have it
-        spath = os.path.join(self._project._resource, 'statuses')
-        url = self._project._get_url(spath.format(str(self._project)))
-        status_info = json_loads(self.jira._session.get(url))
+        def _fetch():
+            return json_loads(self.jira._session.get(self.jira._get_url(f'project/{self.project_name}/statuses')))
+
+        status_info = self._project_meta('statuses', _fetch)
         status_ids = []
         statuses = []
 
@@ -950,6 +1777,7 @@ class JiraProject(Jirate):
                     status_ids.append(status['id'])
                     statuses.append(status)
 
+        self._config['states'] = {}
         for item in statuses:
             val = {}
             val['name'] = item['name']
@@ -958,6 +1786,12 @@ class JiraProject(Jirate):
             while name in self._config['states']:
                 name = name + '_'
             self._config['states'][name] = val
+        self._states_loaded = True
+
+    def _states(self):
+        if not self._states_loaded:
+            self.refresh_lists()
+        return self._config['states']
 
     def delete_issue_map(self):
         self._config['issue_map'] = {}
@@ -967,22 +1801,30 @@ class JiraProject(Jirate):
 
     def status_to_id(self, status):
         status = nym(status)
+        states = self._states()
 
-        if status not in self._config['states']:
+        if status not in states:
             raise KeyError('No such list: ' + status)
-        if status in self._config['states']:
-            return self._config['states'][status]['id']
+        if status in states:
+            return states[status]['id']
         return status  # must be the ID
 
-    def search_issues(self, text):
+    def search_issues(self, text, fields=None, expand=None, order=None):
         # Override so we can index our return values
         # TODO resolve fixversions?
         if not text:
             return None
-        ret = super().search_issues(text)
-        self._index_issues(ret)
+        ret = super().search_issues(text, fields, expand, order)
+        # Partial issues must not stand in for complete ones later
+        if not fields:
+            self._index_issues(ret)
         return ret
 
+    def _cached_issue(self, key):
+        if key in self._config['issue_map']:
+            return self._config['issue_map'][key]
+        return None
+
     def _index_issue(self, issue):
         if issue.key not in self._config['issue_map']:
             if not hasattr(issue, '_jirate'):
@@ -996,27 +1838,34 @@ class JiraProject(Jirate):
         for issue in issues:
             self._index_issue(issue)
 
-    def search(self, text):
+    def search(self, text, order=None):
         if not text:
             return None
-        return self.search_issues(f'PROJECT = {self.project_name} AND statusCategory NOT IN (Done) AND (text ~ "{text}")')
+        return self.search_issues(f'PROJECT = {self.project_name} AND statusCategory NOT IN (Done) AND (text ~ "{text}")', order=order)
 
-    def list(self, status=None, userid=None, all_issues=False):
+    def list(self, status=None, userid=None, all_issues=False, order=None):
         if all_issues:
             project_selector = ''
         else:
             project_selector = f'PROJECT = {self.project_name} AND '
 
         userid = self.get_user(userid)
+        if not all_issues and self.mirror and self.mirror.fresh(self.project_name):
+            issues = [self._issue_from_raw(raw) for raw in self.mirror.list(self.project_name, userid, status)]
+            if order:
+                issues = self.sort_issues(issues, order)
+            self._index_issues(issues)
+            return issues
+
         if userid is None:
             assignee_selection = 'assignee is EMPTY'
         else:
             assignee_selection = f'assignee = "{userid}"'
 
         if status:
-            issues = super().search_issues(f'{project_selector}{assignee_selection} AND STATUS = {status}')
+            issues = super().search_issues(f'{project_selector}{assignee_selection} AND STATUS = {status}', order=order)
         else:
-            issues = super().search_issues(f'{project_selector}{assignee_selection} AND statusCategory NOT IN (Done)')
+            issues = super().search_issues(f'{project_selector}{assignee_selection} AND statusCategory NOT IN (Done)', order=order)
 
         self._index_issues(issues)
         return issues
@@ -1042,6 +1891,62 @@ class JiraProject(Jirate):
                 pass
         return None
 
+    def mirrored_issue(self, issue_alias):
+        """Retrieve an issue from the local mirror if the mirror for its
+        project is fresh enough; otherwise None"""
+        if not self.mirror or isinstance(issue_alias, Issue):
+            return None
+        key = self._issue_key(issue_alias)
+        if not self.mirror.fresh(key.split('-')[0]):
+            return None
+        raw = self.mirror.issue(key)
+        if not raw:
+            return None
+        issue = self._issue_from_raw(raw)
+        self._index_issue(issue)
+        return issue
+
+    def search_local(self, text, projects=None):
+        """Full-text search of the local mirror
+
+        Parameters:
+          text: Search text (FTS5 syntax)
+          projects: List of project keys (default: this project)
+
+        Returns:
+          list of jira.resources.Issue, best match first
+        """
+        if not self.mirror:
+            return []
+        if not projects:
+            projects = [self.project_name]
+        return [self._issue_from_raw(raw) for raw in self.mirror.search(text, projects)]
+
+    def refine(self, query, issues=None):
+        """Narrow a set of issues we already have using (a subset of) JQL,
+        without contacting the server (see jirate.jql)
+
+        Parameters:
+          query: JQL query
+          issues: list of jira.resources.Issue or raw issue data; if None,
+                  every mirrored issue in this project is considered
+
+        Returns:
+          list of jira.resources.Issue
+        """
+        def _current_user():
+            return [self.user[key] for key in ('name', 'accountId', 'emailAddress') if self.user.get(key)]
+
+        matcher = compile_jql(query, self.field_to_id, _current_user, self.priority_order)
+        if issues is None:
+            issues = self.mirror.issues([self.project_name]) if self.mirror else []
+        ret = []
+        for issue in matcher.filter(issues):
+            if isinstance(issue, dict):
+                issue = self._issue_from_raw(issue)
+            ret.append(issue)
+        return ret
+
     def eausm_issue_votes(self, issue_alias):
         if 'eausm' in self._config and not self._config['eausm']:
             return None
@@ -1061,9 +1966,9 @@ class JiraProject(Jirate):
         return ret
 
     def states(self):
-        return copy.copy(self._config['states'])
+        return copy.copy(self._states())
 
-    def new(self, name, description=None, issue_type=None, parent=None):
+    def new(self, name, description=None, issue_type=None, parent=None, prefetch=True):
         # Simple New creation requires understanding what the issuetypes are,
         # which vary on a per-project basis.  This is why "create" is separate
         # (and lower-level)
@@ -1092,29 +1997,55 @@ class JiraProject(Jirate):
         if description:
             args['description'] = description
 
-        return self.create(**args)
+        return self.create(prefetch=prefetch, **args)
 
-    def create(self, field_definitions=None, **args):
-        # override so we can index our value
+    def _creation_args(self, field_definitions, args):
         if 'project' not in args:
             args['project'] = self.project_name
         if 'issuetype' not in args:
             args['issuetype'] = 'Task'
 
-        if not field_definitions:
+        metadata = None
+        if isinstance(args['issuetype'], str) and (not field_definitions or args['project'] == self.project_name):
+            # Cached; this is usually what field_definitions came from
             metadata = self.issue_metadata(args['issuetype'])
+        if not field_definitions:
+            if not metadata:
+                raise ValueError(f'No such issue type: {args["issuetype"]}')
             field_definitions = metadata['fields']
-        ret = super().create(field_definitions, **args)
-        self._index_issue(ret)
+        # Refer to the project and type the way the server does, so
+        # python-jira does not have to look them up
+        if metadata and metadata.get('id'):
+            args['issuetype'] = {'id': metadata['id']}
+        if isinstance(args['project'], str):
+            args['project'] = {'key': args['project']}
+        return field_definitions
+
+    def create(self, field_definitions=None, prefetch=True, **args):
+        # override so we can index our value
+        field_definitions = self._creation_args(field_definitions, args)
+        ret = super().create(field_definitions, prefetch, **args)
+        if prefetch:
+            self._index_issue(ret)
         return ret
 
+    def create_issues(self, issue_list):
+        prepared = []
+        for field_definitions, args in issue_list:
+            args = dict(args)
+            prepared.append((self._creation_args(field_definitions, args), args))
+        return super().create_issues(prepared)
+
     def components(self):
         """ Return list of components assigned to this project
 
         Returns:
            List[component]
         """
-        return self.jira.project_components(self._project)
+        def _fetch():
+            return [comp.raw for comp in self.jira.project_components(self.project_name)]
+        raw = self._project_meta('components', _fetch)
+        return [Component(self.jira._options, self.jira._session, raw=comp) for comp in raw]
 
     def add_component(self, name, description=None):
         """ Add a component to the project
@@ -1122,7 +2053,8 @@ class JiraProject(Jirate):
         Returns:
            component
         """
-        return self.jira.create_component(name, self._project, description=description)
+        self.metadata.invalidate(self.project_name, 'components')
+        return self.jira.create_component(name, self.project_name, description=description)
 
     def remove_component(self, name):
         """ Remove a component from the project. To do this, we have to run down
@@ -1135,21 +2067,97 @@ class JiraProject(Jirate):
         comps = self.components()
         for comp in comps:
             if comp.name == name:
+                self.metadata.invalidate(self.project_name, 'components')
                 return comp.delete()
         return 1
 
-    def subtask(self, parent, name, description=None):
-        return self.new(name, description, 'Sub-task', parent)
+    def subtask(self, parent, name, description=None, prefetch=True):
+        return self.new(name, description, 'Sub-task', parent, prefetch)
 
     @property
     def issue_types(self):
         if not self._issue_types:
-            self._issue_types = self._project.issueTypes
+            raw = self._project_raw()
+            self._issue_types = [IssueType(self.jira._options, self.jira._session, raw=itype) for itype in raw['issueTypes']]
         return self._issue_types
 
     @property
     def versions(self):
-        return self._project.versions
+        def _fetch():
+            return [version.raw for version in self.jira.project_versions(self.project_name)]
+        raw = self._project_meta('versions', _fetch)
+        return [Version(self.jira._options, self.jira._session, raw=version) for version in raw]
+
+    def _stat_groups(self, name):
+        # Groups whose possible values come from project metadata can be
+        # counted on the server: list of (value, JQL clause), or None
+        name = nym(name)
+        if name in ('status', 'state'):
+            return [(state['name'], f'status = {state["id"]}') for state in self.states().values()]
+        if name in ('component', 'components', 'component/s'):
+            ret = [(comp.name, f'component = {comp.id}') for comp in self.components()]
+            return ret + [(_no_value, 'component is EMPTY')]
+        if name in ('version', 'fixversion', 'fixversions', 'fix_version/s'):
+            clause = 'fixVersion'
+        elif name in ('affectedversion', 'affectsversion', 'affects_version/s', 'versions'):
+            clause = 'affectedVersion'
+        else:
+            return None
+        ret = [(version.name, f'{clause} = {version.id}') for version in self.versions if not version.raw.get('archived')]
+        return ret + [(_no_value, f'{clause} is EMPTY')]
+
+    def time_in_status(self, search_query=None, now=None):
+        """Measure how long the issues in this project spent in each
+        status; changelogs are streamed a page at a time
+
+        Parameters:
+          search_query: Optional JQL further restricting the issues
+          now: Optional POSIX timestamp to measure unresolved issues to
+
+        Returns:
+          jirate.analytics.StatusDurations
+        """
+        query = f'project = {self.project_name}'
+        if search_query:
+            query = f'{query} AND ({search_query})'
+        return time_in_status(self, query, now)
+
+    def stats(self, group_by, search_query=None):
+        """Count the issues in this project, grouped by one or more fields
+
+        When every field is status, component or (fix/affected) version,
+        one count query per group is run concurrently and no issues are
+        retrieved.  Otherwise, only the grouped fields of the matching
+        issues are retrieved and counted locally.
+
+        Parameters:
+          group_by: list of field names
+          search_query: Optional JQL further restricting the issues
+
+        Returns:
+          (list of (value tuple, count), total issues)
+        """
+        base = f'project = {self.project_name}'
+        if search_query:
+            base = f'{base} AND ({search_query})'
+
+        groups = [self._stat_groups(name) for name in group_by]
+        if None not in groups:
+            combos = list(itertools.product(*groups))
+            queries = [base] + [' AND '.join([base] + [clause for _, clause in combo]) for combo in combos]
+            counts = self.count_many(queries)
+            ret = [(tuple([value for value, _ in combo]), count) for combo, count in zip(combos, counts[1:]) if count]
+            return (ret, counts[0])
+
+        field_ids = []
+        for name in group_by:
+            field_id = self.field_to_id(name) or self.field_to_id(nym(name))
+            if not field_id:
+                raise ValueError(f'No such field: {name}')
+            field_ids.append(field_id)
+        counts, total = self.group_counts(base, field_ids)
+        ret = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return (ret, total)
 
     # Returns a dict that JIRA should just give us.
     def issue_metadata(self, issue_type_or_id, project_key=None):
@@ -1163,6 +2171,15 @@ class JiraProject(Jirate):
         if not itype:
             return None
 
+        meta_key = (project_key, itype.id)
+        if meta_key not in self._create_metadata:
+            self._create_metadata[meta_key] = self.metadata.get(project_key, ('createmeta', itype.id),
+                                                                lambda: self._fetch_issue_metadata(itype, project_key))
+        # The same object every time, so plans built from it are reused;
+        # callers must not modify it
+        return self._create_metadata[meta_key]
+
+    def _fetch_issue_metadata(self, itype, project_key):
         fields = []
         start = 0
         chunk_len = 50
@@ -1187,10 +2204,21 @@ class JiraProject(Jirate):
         metadata = {'self': itype.self, 'name': itype.name, 'id': itype.id, 'description': itype.description, 'subtask': itype.subtask, 'iconUrl': itype.iconUrl, 'fields': field_dict}
         return metadata
 
-    def sprint_info(self, project_key=None, states=['active', 'future']):
+    def sprint_info(self, project_key=None, states=['active', 'future'], refresh=False):
         if not project_key:
             project_key = self.project_name
-        return super().sprint_info(project_key, states)
+        if isinstance(states, list):
+            states = ','.join(states)
+        if refresh:
+            self.metadata.invalidate(project_key, ('sprints', states))
+
+        def _fetch():
+            info = super(JiraProject, self).sprint_info(project_key, states)
+            return dict([(kind, dict([(name, item.raw) for name, item in info[kind].items()])) for kind in info])
+
+        raw = self.metadata.get(project_key, ('sprints', states), _fetch)
+        return {'boards': dict([(name, Board(self.jira._options, self.jira._session, raw=board)) for name, board in raw['boards'].items()]),
+                'sprints': dict([(name, Sprint(self.jira._options, self.jira._session, raw=sprint)) for name, sprint in raw['sprints'].items()])}
 
     def config(self):
         return copy.copy(self._config)
@@ -22,9 +22,18 @@ from jirate.decor import issue_link_string, link_string
 from jirate.decor import pretty_print  # NOQA
 from jirate.decor import EscapedString
 from jirate.config import get_config, yaml_dump
-from jirate.jira_fields import apply_field_renderers, render_issue_fields, max_field_width, render_field_data, jirate_field
+from jirate.jira_fields import apply_field_renderers, output_renderers, render_issue_fields, max_field_width, render_field_data, jirate_field
 from jirate.template_vars import apply_values
 from jirate.rqcache import RequestCache
+from jirate.userdir import UserDirectory
+from jirate.project_meta import ProjectMetadata
+from jirate.mirror import IssueMirror
+from jirate.jql import JQLError
+from jirate.localstate import pickle_read, pickle_write
+from jirate.workers import parallel
+from jirate.graph import walk, relation_kinds, default_depth
+from jirate.analytics import default_percentiles
+from jirate.rollup import rollup, ISSUES, TODO, IN_PROGRESS, DONE, POINTS, POINTS_DONE
 
 try:
     import ollama
@@ -35,43 +44,71 @@ except (ImportError, ModuleNotFoundError):
 # Prevent case/typos/etc.
 _subtask = 'Sub-task'
 
+# Where the results of a search run with --keep are kept for 'search --refine'
+_last_search_file = '~/.jirate.last'
+_rollup_cache_file = '~/.jirate.rollup'
+
+
+def _report_transitions(results, target):
+    # Returns the number of issues moved
+    moved = []
+    for issue, err in results:
+        if err:
+            print(f'{issue.key}: {err}')
+        else:
+            moved.append(issue.key)
+    if moved:
+        print('Moved', moved, 'to', target)
+    return len(moved)
+
 
 def move(args):
-    if args.user:
-        args.project.assign(args.src, args.user)
-    if args.mine:
-        args.project.assign(args.src, 'me')
-    ret = args.project.move(args.src, args.target)
-    if ret:
-        print('Moved', [issue.key for issue in ret], 'to', args.target)
+    try:
+        if args.user:
+            _report_assignments(args.project.assign(args.src, args.user))
+        if args.mine:
+            _report_assignments(args.project.assign(args.src, 'me'))
+    except ValueError as e:
+        print(e)
+        return (1, False)
+    if _report_transitions(args.project.transition_issues(args.src, args.target), args.target):
         return (0, False)
     print('No issue(s) moved')
     return (1, False)
 
 
 def close_issues(args):
-    ret = 0
     close_args = {}
     if args.resolution:
         close_args['resolution'] = args.resolution
 
-    close_issues = []
+    # Close subtasks first, then main issues
+    phases = []
     if args.subtasks:
+        subtasks = []
+        parents = []
+        args.project.prefetch(args.target)
         for issue_key in args.target:
-            # Close subtasks first, then main issue
             issue = args.project.issue(issue_key)
-            if issue.key in close_issues:
+            if issue.key in subtasks or issue.key in parents:
                 continue
-            issue_subtasks = [subtask['key'] for subtask in issue.raw['fields']['subtasks']]
-            close_issues.extend(issue_subtasks)
-            close_issues.append(issue.key)
+            for subtask in issue.raw['fields']['subtasks']:
+                if subtask['key'] not in subtasks:
+                    subtasks.append(subtask['key'])
+            parents.append(issue.key)
+        phases = [subtasks, [key for key in parents if key not in subtasks]]
     else:
-        close_issues = args.target
+        phases = [args.target]
 
-    for issue in close_issues:
-        if not args.project.close(issue, **close_args):
-            ret = 1
-    return (ret, False)
+    failed = False
+    for close_issues in phases:
+        if not close_issues:
+            continue
+        results = args.project.transition_issues(close_issues, 'Closed', **close_args)
+        _report_transitions(results, 'Closed')
+        if [issue for issue, err in results if err]:
+            failed = True
+    return (1 if failed else 0, False)
 
 
 def parse_field_widths(field_string, allowed_fields=None, ignore_fields=None, starting_fields=None):
@@ -131,7 +168,6 @@ def _reorder_issues(issue_list):
 
 
 def print_issues_by_field(issue_list, args=None, exclude_fields=[]):
-    # TODO: sort by column
     fields = OrderedDict({'key': 0})
     ignore_fields = ['key']
     ignore_fields.extend(exclude_fields)
@@ -163,7 +199,8 @@ def print_issues_by_field(issue_list, args=None, exclude_fields=[]):
             if nym(issue.field('status')['name']) != nym(args.status):
                 continue
         row = []
-        key_string = issue_link_string(issue.key, args.project.jira.server_url)
+        jirate_obj = getattr(issue, '_jirate', args.project)
+        key_string = issue_link_string(issue.key, jirate_obj.jira.server_url)
         # Above, we reordered a subtask to be under its parent task in subtask
         # order according to the parent issue. Here, we want to show a visual break
         # to show this is associated with the above non-Subtask
@@ -182,7 +219,7 @@ def print_issues_by_field(issue_list, args=None, exclude_fields=[]):
             else:
                 # See if it's an alias for a field in jira
                 # (then real_key and field_key are the same)
-                field_key = args.project.field_to_id(field)
+                field_key = jirate_obj.field_to_id(field)
                 if not field_key:
                     row.append('N/A')
                     continue
@@ -192,7 +229,7 @@ def print_issues_by_field(issue_list, args=None, exclude_fields=[]):
             except AttributeError:
                 row.append('N/A')
                 continue
-            fk, fv = render_field_data(field_key, issue.raw['fields'], True, args.project.allow_code)
+            fk, fv = render_field_data(field_key, issue.raw['fields'], True, args.project.allow_code, field_map=jirate_obj.output_fields)
             if fk:
                 val = fv
             else:
@@ -239,7 +276,7 @@ def print_issues_by_state(issue_list, args=None):
         hbar_under(key)
         for issue in states[key]:
             printed = printed + 1
-            issue_info = EscapedString('  ') + issue_link_string(issue.key, args.project.jira.server_url)
+            issue_info = EscapedString('  ') + issue_link_string(issue.key, getattr(issue, '_jirate', args.project).jira.server_url)
             print(issue_info, end=' ')
             if args and hasattr(args, 'labels') and args.labels:
                 print_labels(issue.raw, prefix='')
@@ -369,10 +406,124 @@ def search_users(args):
     return (0, False)
 
 
+def _last_search_filename(args):
+    return args.project.get_user_data('last_search_file') or _last_search_file
+
+
+def save_search_results(args, search_query, issues):
+    pickle_write(_last_search_filename(args), {'query': search_query, 'issues': [issue.raw for issue in issues]})
+
+
+def refine_search(args):
+    if args.local:
+        # Whole local mirror of the project
+        issues = None
+    else:
+        last = pickle_read(_last_search_filename(args))
+        if not last:
+            print('No kept search results to refine; search with --keep first')
+            return None
+        issues = last['issues']
+    try:
+        return args.project.refine(args.refine, issues)
+    except JQLError as e:
+        print(e)
+        return None
+
+
+def _fan_out(args, func, order=None):
+    # Run func(project) for each project given by -p A,B,C (or the
+    # default_projects configuration) on each configured server
+    # concurrently and merge the results
+    servers = server_projects(args)
+    # Projects asked for by name are only searched where they live
+    claimed = set()
+    if args.project.requested_keys:
+        for server in servers:
+            claimed.update(server.project_keys)
+    targets = []
+    for server in [args.project] + servers:
+        keys = server.project_keys
+        if server is args.project:
+            keys = [key for key in keys if key not in claimed]
+        if keys == [server.project_name]:
+            targets.append(server)
+        elif keys == server.project_keys:
+            targets.extend(server.siblings())
+        else:
+            targets.extend([server.sibling(key) for key in keys])
+    if not targets:
+        return []
+    if len(targets) == 1:
+        return func(targets[0])
+
+    ret = []
+    for project, issues, err in parallel(func, targets, args.project.max_workers):
+        if err:
+            print(f'{project.project_name}: {err}')
+            continue
+        ret.extend(issues or [])
+    if order:
+        ret = args.project.sort_issues(ret, order)
+
+    # One table for everything, with a project column
+    fields = args.fields if getattr(args, 'fields', None) is not None else args.project.get_user_data('default_fields')
+    fields = parse_params(fields) if fields else ['status', 'summary']
+    if not [field for field in fields if field.split(':')[0] == 'project']:
+        fields = ['project'] + fields
+    setattr(args, 'fields', fields)
+    return ret
+
+
+def _project_query(project_key, search_query):
+    # Restrict a query to one project, keeping any ORDER BY at the end
+    parts = re.split(r'(?:^|\s+)order\s+by\s+', search_query, maxsplit=1, flags=re.IGNORECASE)
+    ret = f'project = {project_key}'
+    if parts[0].strip():
+        ret = f'{ret} AND ({parts[0]})'
+    if len(parts) > 1:
+        ret = f'{ret} ORDER BY {parts[1]}'
+    return ret
+
+
+def _sort_order(args):
+    # --sort field[:desc],... -> order for JiraProject.list() and friends
+    if not hasattr(args, 'sort') or not args.sort:
+        return None
+    return args.project.sort_order(args.sort)
+
+
+def _search_projects(args, search_query, order):
+    def _search(project):
+        # Free-form queries only get a project restriction when fanning
+        # out over several projects on one server
+        query = search_query
+        if len(project.project_keys) > 1:
+            query = _project_query(project.project_name, search_query)
+        return project.search_issues(query, order=order)
+    return _fan_out(args, _search, order)
+
+
 def search_jira(args):
     if args.user:
         return search_users(args)
 
+    try:
+        order = _sort_order(args)
+    except ValueError as e:
+        print(e)
+        return (1, False)
+
+    if args.refine:
+        ret = refine_search(args)
+        if ret is None:
+            return (1, False)
+        if order:
+            ret = args.project.sort_issues(ret, order)
+        if args.keep:
+            save_search_results(args, args.refine, ret)
+        return _print_search_results(ret, args)
+
     named = args.named_search
     fields = None
     if not args.text and not named:
@@ -393,14 +544,23 @@ def search_jira(args):
         # 3. global fields
         if (not hasattr(args, 'fields') or args.fields is None) and fields:
             setattr(args, 'fields', fields)
-        ret = args.project.search_issues(search_query)
+        ret = _search_projects(args, search_query, order)
     else:
         search_query = ' '.join(args.text)
-        if args.raw:
-            ret = args.project.search_issues(search_query)
+        if args.local:
+            ret = args.project.search_local(search_query, args.project.project_keys)
+            if order:
+                ret = args.project.sort_issues(ret, order)
+        elif args.raw:
+            ret = _search_projects(args, search_query, order)
         else:
-            ret = args.project.search(search_query)
+            ret = _fan_out(args, lambda project: project.search(search_query, order=order), order)
+    if args.keep:
+        save_search_results(args, search_query, ret)
+    return _print_search_results(ret, args)
 
+
+def _print_search_results(ret, args):
     # JIRA's text search borders on useless.
     # Prune any issues from output where the regex does not
     # match supplied field
@@ -422,7 +582,8 @@ def search_jira(args):
             except TypeError:
                 pass
             # Try rendering it to a string
-            (_, val) = render_field_data(fid, issue.raw['fields'], True, args.project.allow_code)
+            field_map = getattr(issue, '_jirate', args.project).output_fields
+            (_, val) = render_field_data(fid, issue.raw['fields'], True, args.project.allow_code, field_map=field_map)
             if val and re.search(regex, val):
                 stripped.append(issue)
         ret = stripped
@@ -442,7 +603,16 @@ def list_issues(args):
     else:
         userid = 'me'
 
-    issues = args.project.list(status=args.status, userid=userid, all_issues=args.all)
+    try:
+        order = _sort_order(args)
+    except ValueError as e:
+        print(e)
+        return (1, False)
+
+    if args.all:
+        issues = args.project.list(status=args.status, userid=userid, all_issues=True, order=order)
+    else:
+        issues = _fan_out(args, lambda project: project.list(status=args.status, userid=userid, order=order), order)
     print_issues(issues, args)
     return (0, True)
 
@@ -473,7 +643,131 @@ def list_issue_types(args):
     return (0, False)
 
 
+_field_operations = ('add', 'get', 'get-json', 'set', 'remove', 'sub')
+
+
+def _field_value(project, schema, values):
+    # Resolve users before passing down
+    if schema['type'] == 'user':
+        return project.get_user(values[0])
+    if schema['type'] == 'array':
+        if schema['items'] == 'user':
+            return [project.get_user(user) for user in values]
+        return values
+    return ' '.join(values)
+
+
+def _field_changes(args, fields):
+    # The change on the command line plus any given with --and, resolved
+    # against one set of editmeta; nothing is sent if any of them is bad
+    changes = [[args.operation, args.name] + args.values]
+    changes.extend(args.also or [])
+    ret = []
+    for change in changes:
+        if len(change) < 2:
+            raise ValueError('Each change needs an operation and a field name')
+        operation, name, values = change[0], change[1], change[2:]
+        if operation not in ('add', 'set', 'remove'):
+            raise ValueError(f'Only add, set and remove may be combined, not {operation}')
+        field_id = args.project.field_to_id(name)
+        if not field_id:
+            raise ValueError(f'Could not resolve {name} to an ID - typo?')
+        if field_id not in fields:
+            raise ValueError(f'Update to {name} ({field_id}) is not allowed at this point')
+        ret.append((name, operation, _field_value(args.project, fields[field_id]['schema'], values)))
+    return ret
+
+
+def _field_args_error(args):
+    if not args.operation:
+        return f'Operation required; try: {", ".join(_field_operations)}'
+    if args.operation not in _field_operations:
+        return f'Invalid operation: {args.operation}; try: {", ".join(_field_operations)}'
+    if not args.name:
+        return 'Field name required'
+    if args.also and args.operation in ('get', 'get-json', 'sub'):
+        return f'--and may not be used with {args.operation}'
+    return None
+
+
+def _bulk_field(args, search_query):
+    field_id = args.project.field_to_id(args.name)
+    if not field_id:
+        print(f'Could not resolve {args.name} to an ID - typo?')
+        return (1, False)
+
+    if args.operation in ('get', 'get-json'):
+        # Only the one field, a page at a time
+        for issues in args.project.iter_search(search_query, fields=[field_id]):
+            for issue in issues:
+                if args.operation == 'get':
+                    (_, value) = render_field_data(field_id, issue.raw['fields'], True, args.project.allow_code)
+                else:
+                    (_, value) = render_field_data(field_id, issue.raw['fields'], True, as_json=True)
+                print(issue.key, value)
+        return (0, False)
+
+    if args.operation == 'sub':
+        print('Substitution only works on one issue at a time')
+        return (1, False)
+
+    issues = args.project.search_issues(search_query, fields=['project', 'issuetype'])
+    if not issues:
+        print('No matching issues')
+        return (1, False)
+
+    # Issues of different projects or types may have different editmeta;
+    # check the changes against each
+    groups = {}
+    for issue in issues:
+        fields = issue.raw['fields']
+        groups.setdefault((fields['project']['key'], fields['issuetype']['id']), []).append(issue)
+    edits = []
+    ret = 0
+    for group in groups.values():
+        try:
+            changes = _field_changes(args, args.project.edit_metadata(group[0]))
+        except (AttributeError, ValueError) as e:
+            for issue in group:
+                print(f'{issue.key}: {e}')
+            ret = 1
+            continue
+        edits.extend([(issue, changes) for issue in group])
+
+    updated = 0
+    for issue, err in args.project.edit_issues(edits):
+        if err:
+            print(f'{issue.key}: {err}')
+            ret = 1
+        else:
+            updated = updated + 1
+    print(f'Updated {updated} issue(s)')
+    return (ret, False)
+
+
 def issue_fields(args):
+    if getattr(args, 'jql', None):
+        # There is no issue; everything after it moves up one
+        rest = [arg for arg in (args.issue, args.operation, args.name) if arg is not None] + list(args.values)
+        args.issue = None
+        args.operation = rest[0] if rest else None
+        args.name = rest[1] if len(rest) > 1 else None
+        args.values = rest[2:]
+        err = _field_args_error(args)
+        if err:
+            print(err)
+            return (1, False)
+        return _bulk_field(args, args.jql)
+
+    if getattr(args, 'operation', None) is not None or hasattr(args, 'jql'):
+        err = _field_args_error(args)
+        if err:
+            print(err)
+            return (1, False)
+        if ',' in args.issue:
+            keys = [args.project._issue_key(key.strip()) for key in args.issue.split(',') if key.strip()]
+            return _bulk_field(args, 'key in (' + ', '.join(keys) + ')')
+
     if args.issue:
         issue = args.project.issue(args.issue)
         if not issue:
@@ -483,7 +777,8 @@ def issue_fields(args):
     elif args.type:
         md = args.project.issue_metadata(args.type)
         if md:
-            fields = md['fields']
+            # Shared; pruned below
+            fields = dict(md['fields'])
         else:
             print(f'No metadata for {args.type}')
             return (1, False)
@@ -548,21 +843,19 @@ def issue_fields(args):
         print(orig_value)
         return (0, False)
 
+    if args.also:
+        try:
+            issue.update_fields(_field_changes(args, fields), fields)
+        except (AttributeError, ValueError) as e:
+            print(e)
+            return (1, False)
+        return (0, False)
+
     # Update a field
     if field_id not in fields:
         raise ValueError(f'Update to {field_name} ({field_id}) is not allowed at this point')
 
-    schema = fields[field_id]['schema']
-    if schema['type'] == 'user':
-        value = args.project.get_user(args.values[0])
-    elif schema['type'] == 'array':
-        # Special case: Resolve users before passing down
-        if schema['items'] == 'user':
-            value = [args.project.get_user(user) for user in args.values]
-        else:
-            value = args.values
-    else:
-        value = ' '.join(args.values)
+    value = _field_value(args.project, fields[field_id]['schema'], args.values)
 
     op = args.operation
     # Substitution only works on 'set' capable fields for now
@@ -609,7 +902,7 @@ def new_issue(args):
             print('Canceled')
             return (1, False)
 
-    issue = args.project.new(name, desc, issue_type=args.type)
+    issue = args.project.new(name, desc, issue_type=args.type, prefetch=not args.quiet)
     if args.quiet:
         print(issue.raw['key'])
     else:
@@ -715,7 +1008,7 @@ def create_issue(args):
     values['issuetype'] = metadata['name']
     values['project'] = args.project.project_name
 
-    issue = args.project.create(metadata['fields'], **values)
+    issue = args.project.create(metadata['fields'], prefetch=not args.quiet, **values)
     if args.quiet:
         print(issue.raw['key'])
     else:
@@ -781,29 +1074,172 @@ def create_from_template(args):
 
     all_filed = _create_from_template(args, template)
 
-    # Need to refresh to that issues get re-fetched to include subtasks
+    # An issue we applied the template to now has new subtasks
     # TODO: Have subtask() update parent issues in _config['issue_map']
     args.project.delete_issue_map()
-    for filed in all_filed:
+    ret = 0
+    for filed, raw_issue in zip(all_filed, template['issues']):
+        if 'error' in filed:
+            print(f'{filed.get("parent", raw_issue["summary"])}: {filed["error"]}')
+            ret = 1
+        if 'parent' not in filed:
+            continue
         if args.quiet:
             if 'subtasks' in filed:
                 print(filed['parent'] + ': ' + ', '.join(filed['subtasks']))
             else:
                 print(filed['parent'])
+            continue
+        # What we sent is what we'd have retrieved
+        status = ''
+        if filed.get('updated'):
+            status = ' (updated: ' + ', '.join([args.project.field_to_human(field) or field for field in filed['updated']]) + ')'
+        elif filed.get('existing'):
+            status = ' (up to date)'
+        print(filed['parent'], raw_issue['summary'] + status)
+        summaries = [subtask['summary'] for subtask in raw_issue.get('subtasks') or []]
+        if 'error' in filed or filed.get('existing'):
+            # Some subtasks may be missing or already there; can't tell
+            # which is which
+            summaries = []
+        for idx, key in enumerate(filed.get('subtasks', [])):
+            print('  ', key, summaries[idx] if idx < len(summaries) else '')
+    return (ret, True)
+
+
+# Template fields which are never compared with an existing issue
+_reconcile_skip = ('subtasks', 'issuetype', 'project', 'parent', 'key', 'issuekey')
+
+# Summaries per search when matching template issues to existing ones
+_reconcile_chunk = 20
+
+
+def _template_value(value):
+    # Comparable form of a template value or a rendered field value
+    if value is None or value == '' or value == []:
+        return None
+    if isinstance(value, list):
+        return sorted([_template_value(item) for item in value], key=str)
+    if isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value).strip()
+
+
+def _template_changes(template_issue, raw_fields):
+    """Fields of a template issue which differ from an existing issue
+
+    Parameters:
+      template_issue: template issue, with field IDs as keys (dict)
+      raw_fields: existing issue's fields (typically issue.raw['fields'])
+
+    Returns:
+      list of (field ID, 'set', template value)
+    """
+    ret = []
+    for field_id, value in template_issue.items():
+        if field_id in _reconcile_skip:
+            continue
+        try:
+            _, current = render_field_data(field_id, raw_fields, as_object=True)
+        except KeyError:
+            current = None
+        if isinstance(current, list) and isinstance(value, str):
+            value = parse_params(value)
+        if _template_value(value) != _template_value(current):
+            ret.append((field_id, 'set', value))
+    return ret
+
+
+def _quote_jql(text):
+    return '"' + str(text).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _reconcile_matches(project, wanted, marker=None):
+    """Find existing issues for the issues of a template: by key, if the
+    template gives one, otherwise by summary among the issues with the
+    marker label (or, without one, in the template issue's project).
+    Matching issues are retrieved with one search (per 20 summaries),
+    with only the fields the template uses.
+
+    Parameters:
+      project: JiraProject to search with
+      wanted: list of (template issue, project key); template issues
+              have field IDs as keys
+      marker: Optional label identifying issues created from the template
+
+    Returns:
+      dict of index into wanted -> jira.resources.Issue
+    """
+    fields = set(['summary', 'issuetype', 'project', 'subtasks'])
+    for issue, _ in wanted:
+        fields.update([field for field in issue if field not in _reconcile_skip])
+    fields = sorted(fields)
+
+    ret = {}
+    by_key = {}
+    by_summary = {}
+    for idx, (issue, pname) in enumerate(wanted):
+        key = issue.get('issuekey') or issue.get('key')
+        if key:
+            by_key[project._issue_key(key)] = idx
         else:
-            print_issue(args.project, args.project.issue(filed['parent']), False)
-    return (0, True)
+            by_summary.setdefault((pname, issue['summary'].strip()), idx)
+
+    if by_key:
+        moved = False
+        for existing in project.search_issues('key in (' + ', '.join(by_key) + ')', fields=fields):
+            if existing.key in by_key:
+                ret[by_key[existing.key]] = existing
+            else:
+                moved = True
+        # Moved issues are found under their new keys; the server
+        # still knows them by the old ones when asked one at a time
+        if moved:
+            for key, idx in by_key.items():
+                if idx not in ret:
+                    existing = project.issue(key)
+                    if existing:
+                        ret[idx] = existing
+
+    queries = []
+    if marker and by_summary:
+        queries.append(f'labels = {_quote_jql(marker)}')
+    elif by_summary:
+        summaries = list(by_summary)
+        for start in range(0, len(summaries), _reconcile_chunk):
+            clauses = [f'(project = {_quote_jql(pname)} AND summary ~ {_quote_jql(summary)})' for pname, summary in summaries[start:start + _reconcile_chunk]]
+            queries.append(' OR '.join(clauses))
+    for query in queries:
+        # Oldest first, should there be more than one
+        for existing in project.search_issues(f'{query} ORDER BY created ASC', fields=fields):
+            existing_fields = existing.raw['fields']
+            if (existing_fields.get('issuetype') or {}).get('subtask'):
+                continue
+            idx = by_summary.get((existing_fields['project']['key'], (existing_fields.get('summary') or '').strip()))
+            if idx is not None and idx not in ret:
+                ret[idx] = existing
+    return ret
 
 
 def _create_from_template(args, template):
-    # Cache for issue createmeta information
+    # (project, issue type) -> createmeta
     metadata_by_type = {}
 
-    # TODO: consider using Jira's bulk issue creation
     # TODO: support reading arbitrary fields from the template
-    all_filed = []  # We keep issue keys here because we'll need to refresh anyway
+    all_filed = []  # Issue keys (and errors), in template order
+
+    reserved_fields = ['subtasks']
+    required_fields = ['summary']
+    wanted = []
+    for raw_issue in template['issues']:
+        issue = {args.project.field_to_id(name) or name: value for name, value in raw_issue.items()}
+        pname = issue.get('project', args.project.project_name)
+        wanted.append((issue, pname))
 
-    existing_issue = None
+    existing = {}
     if args.apply:
         # Sanity checks:
         # 1. Issue exists
@@ -813,66 +1249,102 @@ def _create_from_template(args, template):
         # 2. Template's issues attribute length is 1
         if len(template['issues']) != 1:
             raise ValueError('Undefined request: template is for multiple issues')
-
-    projects = {}
-    projects[args.project.project_name] = args.project
-
-    for raw_issue in template['issues']:
-        issue = {args.project.field_to_id(name): value for name, value in raw_issue.items()}
-        reserved_fields = ['subtasks']
-        required_fields = ['summary']
-        if 'project' in issue:
-            pname = issue['project']
-        else:
-            pname = args.project.project_name
-        if pname not in metadata_by_type:
-            metadata_by_type[pname] = {}
-        if pname not in projects:
-            projects[pname] = JiraProject(args.project.jira, pname, readonly=False, allow_code=args.project.allow_code)
-
-        creation_fields = _parse_creation_args(issue, required_fields, reserved_fields)
-
-        # Cache all metadata now (so we can debug subtask creation if needed.
-        issuetype = creation_fields['issuetype']
-        if issuetype not in metadata_by_type:
-            metadata_by_type[pname][issuetype] = _metadata_by_type(projects[pname], issuetype)
-        if 'subtasks' in issue and issue['subtasks']:
-            metadata_by_type[pname][_subtask] = _metadata_by_type(projects[pname], _subtask)
-        metadata = metadata_by_type[pname][issuetype]
-
+        existing[0] = existing_issue
+    elif args.reconcile:
+        existing = _reconcile_matches(args.project, wanted, args.marker)
+
+    # Work out what needs doing first: changed fields of existing issues,
+    # and which issues and subtasks need to be created
+    plan = []
+    edits = []
+    pairs = set()
+    for idx, (issue, pname) in enumerate(wanted):
         filed = {}
-        if existing_issue:
-            # Do not mess with issuetype if we're applying to existing issue
-            del creation_fields['issuetype']
-            existing_issue.update(**creation_fields)
-            parent = existing_issue
+        all_filed.append(filed)
+        creation_fields = _parse_creation_args(issue, required_fields, reserved_fields)
+        subtasks = issue.get('subtasks') or []
+        match = existing.get(idx)
+        if match:
+            filed['parent'] = match.key
+            filed['existing'] = True
+            changes = _template_changes(creation_fields, match.raw['fields'])
+            if changes:
+                edits.append((filed, match, changes))
+            have = [subtask['fields']['summary'].strip() for subtask in match.raw['fields'].get('subtasks') or []]
+            if args.apply and have:
+                # Apply subtasks - but only to a parent which does not already have any
+                # subtasks
+                subtasks = []
+            else:
+                subtasks = [subtask for subtask in subtasks if subtask['summary'].strip() not in have]
+            creation_fields = None
         else:
-            parent = projects[pname].create(metadata['fields'], **creation_fields)
-        filed['parent'] = parent.key
-
-        # Apply subtasks - but only to a parent which does not already have any
-        # subtasks
-        if ('subtasks' in issue and issue['subtasks']) and ('subtasks' not in parent.raw['fields'] or not parent.raw['fields']['subtasks']):
-            # Set once
+            creation_fields['project'] = pname
+            if args.marker:
+                labels = parse_params(creation_fields.get('labels') or [])
+                if args.marker not in labels:
+                    creation_fields['labels'] = labels + [args.marker]
+            pairs.add((pname, creation_fields['issuetype']))
+        if subtasks:
             filed['subtasks'] = []
-            for subtask in issue['subtasks']:
-                metadata = metadata_by_type[pname][_subtask]
-                reserved_fields = ['subtasks', 'issuetype', 'parent']
-                # required_fields are the same
-                start_fields = {'issuetype': _subtask, 'project': pname}
-                start_fields['parent'] = parent.key
-                creation_fields = _parse_creation_args(subtask, required_fields, reserved_fields, start_vals=start_fields)
-
-                child = projects[pname].create(metadata['fields'], **creation_fields)
-                filed['subtasks'].append(child.key)
-        all_filed.append(filed)
+            pairs.add((pname, _subtask))
+        plan.append((filed, pname, subtasks, creation_fields))
+
+    # Set up every project we're creating issues in, then retrieve
+    # creation metadata for every issue type we need, concurrently; both
+    # are kept for the rest of the session
+    projects = {}
+    for pname, project, err in parallel(args.project.sibling, set([pname for pname, _ in pairs]), args.project.max_workers):
+        if err:
+            raise err
+        projects[pname] = project
+    for pair, metadata, err in parallel(lambda pair: _metadata_by_type(projects[pair[0]], pair[1]), pairs, args.project.max_workers):
+        if err:
+            raise err
+        metadata_by_type[pair] = metadata
+
+    # Only what changed, all at once
+    for (filed, _, changes), (_, err) in zip(edits, args.project.edit_issues([(match, changes) for _, match, changes in edits])):
+        filed['updated'] = [field for field, _, _ in changes]
+        if err:
+            filed['error'] = getattr(err, 'text', None) or str(err)
+
+    # Parents are created first, in bulk; then all of the subtasks, once
+    # we know their parents' keys
+    requests = [(metadata_by_type[(pname, fields['issuetype'])]['fields'], fields) for _, pname, _, fields in plan if fields]
+    created = iter(args.project.create_issues(requests))
+    children = []
+    for filed, pname, subtasks, creation_fields in plan:
+        if creation_fields:
+            issue, err = next(created)
+            if err:
+                filed['error'] = getattr(err, 'text', None) or str(err)
+            if not issue:
+                filed.pop('subtasks', None)
+                continue
+            filed['parent'] = issue.key
+
+        for subtask in subtasks:
+            metadata = metadata_by_type[(pname, _subtask)]
+            reserved_fields = ['subtasks', 'issuetype', 'parent']
+            # required_fields are the same
+            start_fields = {'issuetype': _subtask, 'project': pname}
+            start_fields['parent'] = filed['parent']
+            creation_fields = _parse_creation_args(subtask, required_fields, reserved_fields, start_vals=start_fields)
+            children.append((filed, (metadata['fields'], creation_fields)))
+
+    for (filed, _), (child, err) in zip(children, args.project.create_issues([item[1] for item in children])):
+        if child:
+            filed['subtasks'].append(child.key)
+        if err:
+            filed['error'] = getattr(err, 'text', None) or str(err)
 
     return all_filed
 
 
 def _validate_template(project, template):
     for i, issue in enumerate(template['issues']):
-        template['issues'][i] = {project.field_to_id(name): value for name, value in issue.items()}
+        template['issues'][i] = {project.field_to_id(name) or name: value for name, value in issue.items()}
 
     schema_dir = files('jirate').joinpath('schemas')
     schemas = {}
@@ -899,17 +1371,90 @@ def validate_template(args):
     return (0, True)
 
 
+# Fields (aliases) kept in generated templates unless all are requested
+_template_fields = [
+    'fixversions',
+    'priority',
+    'issue_type',
+    'summary',
+    'description',
+    'story_points',
+    'components',
+    'versions',
+    'labels',
+    'sub_tasks',
+]
+
+# Subtask keys per search when generating templates
+_template_chunk = 100
+
+
+def _generate_templates(project, search_query, all_fields=False, subtasks=True):
+    """Generate templates for the issues matching a search, a page at a
+    time.  Only the fields templates use are retrieved, and the
+    subtasks of each page of issues are retrieved with one search per
+    hundred of them.
+
+    Parameters:
+      project: JiraProject to search
+      search_query: JQL query line (string)
+      all_fields: Include all fields, even ones that may not make sense
+                  for a template
+      subtasks: Include issues which are subtasks (which are otherwise
+                only included under their parents)
+
+    Yields:
+      (issue key, template)
+    """
+    fields = None
+    if not all_fields:
+        fields = [project.field_to_id(field) for field in _template_fields]
+        fields = [field for field in fields if field]
+
+    for issues in project.iter_search(search_query, fields=fields):
+        if not subtasks:
+            issues = [issue for issue in issues if not (issue.raw['fields'].get('issuetype') or {}).get('subtask')]
+        keys = []
+        for issue in issues:
+            keys.extend([subtask['key'] for subtask in issue.raw['fields'].get('subtasks') or []])
+        found = {}
+        for start in range(0, len(keys), _template_chunk):
+            for subtask in project.search_issues('key in (' + ', '.join(keys[start:start + _template_chunk]) + ')', fields=fields):
+                found[subtask.key] = subtask
+
+        for issue in issues:
+            # TODO: allow customizing allow_fields in the config
+            yield (issue.key, _generate_template(issue.raw['fields'], project.field_to_alias, found.get, all_fields))
+
+
 def generate_template(args):
-    template = {}
-    issue = args.project.issue(args.issue_id)
-    if not issue:
-        print('No such issue:', args.issue_id)
+    if args.jql:
+        search_query = args.jql
+    elif args.issue_id:
+        keys = [args.project._issue_key(key) for key in args.issue_id]
+        search_query = 'key in (' + ', '.join(keys) + ')'
+    else:
+        print('Specify issue(s) or a search (--jql)')
         return (1, False)
 
-    # TODO: allow customizing allow_fields in the config
-    template = _generate_template(issue.raw['fields'], args.project.field_to_alias, args.project.issue, args.all_fields)
-
-    print(yaml_dump({'issues': [template]}, sort_keys=False))
+    templates = _generate_templates(args.project, search_query, args.all_fields, subtasks=not args.jql)
+    count = 0
+    try:
+        if not args.jql:
+            # Issues given by key come out in the order given
+            templates = sorted(templates, key=lambda item: keys.index(item[0]) if item[0] in keys else len(keys))
+        # One document, printed an issue at a time
+        for _, template in templates:
+            if not count:
+                print('issues:')
+            print(yaml_dump([template], sort_keys=False), end='')
+            count = count + 1
+    except JIRAError as e:
+        print(e.text)
+        return (1, False)
+    if not count:
+        print('No matching issues')
+        return (1, False)
     return (0, True)
 
 
@@ -945,7 +1490,9 @@ def _serialize_issue(raw_issue, translate_fields, fetch_issue=None):
             template[translate_fields(_subtasks)] = []
             for subtask_stub in raw_issue[_subtasks]:
                 subtask = fetch_issue(subtask_stub['key'])
-                template[translate_fields(_subtasks)].append(_serialize_issue(subtask.raw['fields'], translate_fields))
+                # Fall back to what the parent told us
+                subtask_fields = subtask.raw['fields'] if subtask else subtask_stub['fields']
+                template[translate_fields(_subtasks)].append(_serialize_issue(subtask_fields, translate_fields))
         else:
             _, template[translate_fields(field)] = render_field_data(field, raw_issue, as_object=True)
 
@@ -960,18 +1507,7 @@ def _trim_template(template, allow_fields=None):
     # Field names are already translated to aliases so we don't need to
     # deal with customfield_ nonsense here.
     if allow_fields is None:
-        allow_fields = [
-            'fixversions',
-            'priority',
-            'issue_type',
-            'summary',
-            'description',
-            'story_points',
-            'components',
-            'versions',
-            'labels',
-            'sub_tasks',
-        ]
+        allow_fields = _template_fields
     _subtasks = 'sub_tasks'  # Alias form, see above comment
 
     trimmed_fields = {}
@@ -1047,7 +1583,7 @@ def new_subtask(args):
             print('Canceled')
             return (1, False)
 
-    issue = args.project.subtask(parent_issue.raw['key'], name, desc)
+    issue = args.project.subtask(parent_issue.raw['key'], name, desc, prefetch=not args.quiet)
     if args.quiet:
         print(issue.raw['key'])
     else:
@@ -1191,8 +1727,12 @@ def comment(args):
         print('Canceled')
         return (0, False)
 
-    args.project.comment(issue_id, text, group_name)
-    return (0, False)
+    ret = 0
+    for key, err in args.project.comment(issue_id, text, group_name):
+        if err:
+            print(f'{key}: {err}')
+            ret = 1
+    return (ret, False)
 
 
 def display_comment(server_url, comment, verbose, no_format):
@@ -1320,12 +1860,12 @@ def print_issue_header(project, issue_obj, verbose=False, no_comments=False, no_
         issue = disp
 
     key_link = issue_link_string(issue_obj.key, project.jira.server_url)
-    lsize = max(len(key_link), max_field_width(issue, verbose, project.allow_code))
+    lsize = max(len(key_link), max_field_width(issue, verbose, project.allow_code, project.output_fields))
     lsize = max(lsize, len('Next States'))
 
     if 'summary' in issue and issue['summary']:
         vsep_print(' ', 0, key_link, lsize, issue['summary'])
-    render_issue_fields(issue, verbose, project.allow_code, lsize)
+    render_issue_fields(issue, verbose, project.allow_code, lsize, project.output_fields)
 
     if verbose:
         vsep_print(' ', 0, 'ID', lsize, issue_obj.raw['id'])
@@ -1337,7 +1877,7 @@ def print_issue_header(project, issue_obj, verbose=False, no_comments=False, no_
             vsep_print(None, 0, 'Next States', lsize, 'No valid transitions; cannot alter status')
 
 
-def print_issue(project, issue_obj, verbose=False, no_comments=False, no_format=False, allowed_fields=None):
+def print_issue(project, issue_obj, verbose=False, no_comments=False, no_format=False, allowed_fields=None, children=None):
 
     print_issue_header(project, issue_obj, verbose, no_comments, no_format, allowed_fields)
     print()
@@ -1368,7 +1908,10 @@ def print_issue(project, issue_obj, verbose=False, no_comments=False, no_format=
     if 'issuetype' in issue:
         for megalith in ('Epic', 'Feature'):
             if issue['issuetype']['name'] == megalith:
-                ret = project.search_issues(f'"{megalith} Link" = "' + issue_obj.raw['key'] + '"')
+                if children is not None:
+                    ret = children.get(issue_obj.key, [])
+                else:
+                    ret = project.search_issues(f'"{megalith} Link" = "' + issue_obj.raw['key'] + '"')
                 _print_issue_list(f'Issues in {megalith}', ret, project.jira.server_url)
 
     if no_comments or 'comment' not in issue:
@@ -1383,7 +1926,7 @@ def print_issue(project, issue_obj, verbose=False, no_comments=False, no_format=
 def cat(args):
     issues = []
     for issue_idx in args.issue_id:
-        issue = args.project.issue(issue_idx, True)
+        issue = args.project.mirrored_issue(issue_idx) or args.project.issue(issue_idx, True)
         if not issue:
             print('No such issue:', issue_idx)
             return (127, False)
@@ -1403,8 +1946,13 @@ def cat(args):
     else:
         no_format = args.project.get_user_data('no_format')
 
+    # One search per issue type for the contents of all epics/features
+    children = None
+    if len(issues) > 1:
+        children = args.project.child_issues(issues, fields=['summary', 'status'])
+
     for issue in issues:
-        print_issue(args.project, issue, args.verbose, args.no_comments, no_format, args.fields)
+        print_issue(args.project, issue, args.verbose, args.no_comments, no_format, args.fields, children)
     return (0, False)
 
 
@@ -1458,14 +2006,26 @@ def view_issue(args):
     return (0, False)
 
 
+def _report_assignments(results):
+    ret = 0
+    for issue, err in results:
+        if err:
+            print(f'{issue.key}: {err}')
+            ret = 1
+    return ret
+
+
 def assign_issue(args):
-    args.project.assign(args.issue_id, args.user)
-    return (0, False)
+    try:
+        results = args.project.assign(args.issue_id, args.user)
+    except ValueError as e:
+        print(e)
+        return (1, False)
+    return (_report_assignments(results), False)
 
 
 def unassign_issue(args):
-    args.project.assign(args.issue_id, 'none')
-    return (0, False)
+    return (_report_assignments(args.project.assign(args.issue_id, 'none')), False)
 
 
 def user_info(args):
@@ -1563,10 +2123,13 @@ def sprint_info(args):
         return (0, False)
 
     # General Sprit information
+    states = ['active', 'future']
     if args.closed:
-        info = args.project.sprint_info(states=['active', 'future', 'closed'])
-    else:
-        info = args.project.sprint_info()
+        states.append('closed')
+    info = args.project.sprint_info(states=states)
+    if not args.list and not [sprint for sprint in info['sprints'].values() if sprint.state == 'active']:
+        # The list is kept for a while; a sprint may have started since
+        info = args.project.sprint_info(states=states, refresh=True)
 
     board_by_id = {}
     for board in info['boards']:
@@ -1653,11 +2216,297 @@ def summaraize(args):  # Not a typo
     return (0, False)
 
 
+def sync_mirror(args):
+    if args.users:
+        count = args.project.user_directory.sync(args.project)
+        if not args.quiet:
+            print(f'{count} user(s)')
+        if not args.projects:
+            return (0, False)
+
+    projects = args.projects
+    if not projects:
+        projects = args.project.get_user_data('mirror_projects')
+    if not projects:
+        projects = [args.project.project_name]
+
+    for project_key in projects:
+        count = args.project.mirror.sync(args.project, project_key.upper(), full=args.full)
+        if not args.quiet:
+            print(f'{project_key.upper()}: {count} issue(s) updated')
+    return (0, False)
+
+
+def issue_stats(args):
+    group_by = [name.strip() for name in args.group_by.split(',') if name.strip()]
+    if not group_by or len(group_by) > 2:
+        print('Group by one or two fields')
+        return (1, False)
+    search_query = ' '.join(args.query)
+    try:
+        counts, total = args.project.stats(group_by, search_query)
+    except (JIRAError, ValueError) as e:
+        print(e)
+        return (1, False)
+
+    if len(group_by) == 1:
+        matrix = [[group_by[0], 'Count']]
+        for value, count in counts:
+            matrix.append([value[0], str(count)])
+    else:
+        # Rows are values of the first field, columns values of the second
+        columns = []
+        rows = {}
+        for value, count in counts:
+            if value[1] not in columns:
+                columns.append(value[1])
+            if value[0] not in rows:
+                rows[value[0]] = {}
+            rows[value[0]][value[1]] = count
+        matrix = [[f'{group_by[0]} / {group_by[1]}'] + columns]
+        for row in rows:
+            matrix.append([row] + [str(rows[row].get(column, 0)) for column in columns])
+
+    render_matrix(matrix, fmt=args.format, header=(args.format == 'default'))
+    if args.format == 'default':
+        hbar_over(f'{total} issue(s)')
+    return (0, False)
+
+
+def _graph_rows(graph, key, relation, indent, path, shown, matrix, baseurl):
+    fields = graph.nodes.get(key) or {}
+    text = EscapedString(indent + (relation + ' ' if relation else '')) + issue_link_string(key, baseurl)
+    status = (fields.get('status') or {}).get('name', '')
+    summary = fields.get('summary', '')
+    if key in path:
+        matrix.append([text, status, summary + ' (cycle)'])
+        return
+    if key in shown:
+        matrix.append([text, status, summary + ' (see above)'])
+        return
+    if key in graph.missing:
+        summary = '(not found)'
+    elif key in graph.truncated:
+        summary = summary + ' ...'
+    matrix.append([text, status, summary])
+    shown.add(key)
+    path.append(key)
+    for child_relation, child in graph.edges.get(key, []):
+        _graph_rows(graph, child, child_relation, indent + '  ', path, shown, matrix, baseurl)
+    path.pop()
+
+
+def _graph_matrix(graph, baseurl=None):
+    # Depth-first from each root; every issue is expanded once
+    matrix = []
+    shown = set()
+    for root in graph.roots:
+        _graph_rows(graph, root, None, '', [], shown, matrix, baseurl)
+    return matrix
+
+
+def _issue_graph(args, follow):
+    if args.all:
+        follow = relation_kinds
+    try:
+        graph = walk(args.project, args.issue_id, depth=args.depth, follow=follow)
+    except (JIRAError, ValueError) as e:
+        print(e)
+        return (1, False)
+
+    if args.dot:
+        print(graph.dot())
+        return (0, False)
+
+    render_matrix(_graph_matrix(graph, args.project.jira.server_url), False, False)
+    return (0, False)
+
+
+def issue_tree(args):
+    return _issue_graph(args, ('children',))
+
+
+def issue_deps(args):
+    return _issue_graph(args, ('links',))
+
+
+def _points_field(args):
+    name = args.points or args.project.get_user_data('points_field')
+    if name:
+        field_id = args.project.field_to_id(name)
+        if not field_id:
+            raise ValueError(f'No such field: {name}')
+        return field_id
+    # Not every instance has one
+    return args.project.field_to_id('Story Points')
+
+
+def issue_rollup(args):
+    try:
+        points_field = _points_field(args)
+    except ValueError as e:
+        print(e)
+        return (1, False)
+
+    cache_file = args.project.get_user_data('rollup_cache_file') or _rollup_cache_file
+    cache = None
+    if not args.no_cache:
+        cache = pickle_read(cache_file) or {}
+    server_cache = cache.setdefault(args.project.jira.server_url, {}) if cache is not None else None
+
+    try:
+        results = rollup(args.project, args.issue_id, points_field=points_field, cache=server_cache)
+    except (JIRAError, ValueError) as e:
+        print(e)
+        return (1, False)
+    if cache is not None:
+        pickle_write(cache_file, cache)
+
+    header = ['Issue', 'Issues', 'To Do', 'In Progress', 'Done', '% Done']
+    if points_field:
+        header.extend(['Points', 'Points Done', '% Points Done'])
+    matrix = [header]
+    for result in results:
+        totals = result.totals
+        row = [result.key] + [str(int(totals[idx])) for idx in (ISSUES, TODO, IN_PROGRESS, DONE)] + [f'{result.percent_done():.0f}%']
+        if points_field:
+            row.extend([f'{totals[POINTS]:g}', f'{totals[POINTS_DONE]:g}', f'{result.percent_points_done():.0f}%'])
+        matrix.append(row)
+    render_matrix(matrix, fmt=args.format, header=(args.format == 'default'))
+
+    if args.verbose and args.format == 'default':
+        for result in results:
+            print()
+            hbar_under(f'{result.key} by status')
+            render_matrix([[name, str(count)] for name, count in result.status_totals()], False, False)
+    return (0, False)
+
+
+def _duration(seconds, unit):
+    if seconds is None:
+        return ''
+    return f'{seconds / unit:.1f}'
+
+
+def issue_timing(args):
+    try:
+        percentiles = [float(pct) for pct in args.percentiles.split(',')] if args.percentiles else default_percentiles
+    except ValueError:
+        print('Invalid percentiles:', args.percentiles)
+        return (1, False)
+    unit = 3600 if args.hours else 86400
+
+    try:
+        durations = args.project.time_in_status(' '.join(args.query))
+    except JIRAError as e:
+        print(e)
+        return (1, False)
+    if not durations.issues:
+        print('No matching issues')
+        return (1, False)
+
+    matrix = [['Status', 'Issues', 'Mean'] + [f'p{pct:g}' for pct in percentiles]]
+    for name, count, mean, values in durations.summary(percentiles):
+        matrix.append([name, str(count), _duration(mean, unit)] + [_duration(value, unit) for value in values])
+    render_matrix(matrix, fmt=args.format, header=(args.format == 'default'))
+    if args.format == 'default':
+        hbar_over(f'{durations.issues} issue(s); ' + ('hours' if args.hours else 'days'))
+    return (0, False)
+
+
 def clean_cache(args):
     args.project.request_cache.flush(clean_all=True)
+    args.project.user_directory.clear()
+    args.project.metadata.clear()
     return (0, False)
 
 
+def _connect_project(jconfig, project, allow_code, server_name=None):
+    # Connection, caches and user data for one server
+    if 'proxies' not in jconfig:
+        jconfig['proxies'] = {"http": "", "https": ""}
+
+    if 'cache_expire' in jconfig:
+        expire = jconfig['cache_expire']
+    else:
+        expire = None
+
+    # Additional servers get their own cache and mirror by default
+    suffix = f'.{server_name}' if server_name else ''
+    if 'cache_file' in jconfig:
+        cache_file = jconfig['cache_file']
+    else:
+        cache_file = f'~/.jirate{suffix}.cache'
+
+    jira = get_jira(jconfig)
+    if not jira:
+        raise ValueError(f'Could not connect to {server_name or "JIRA"}')
+    cache = RequestCache(jira._session, filename=cache_file, expire=expire)
+    proj = JiraProject(jira, project, readonly=False, allow_code=allow_code)
+    proj.request_cache = cache
+    proj.schema_file = jconfig.get('schema_file', f'~/.jirate{suffix}.schema')
+    proj.mirror = IssueMirror(jconfig.get('mirror_file', f'~/.jirate{suffix}.mirror'), jconfig.get('mirror_max_age'))
+    proj.user_directory = UserDirectory(jconfig.get('users_file', f'~/.jirate{suffix}.users'), jconfig.get('users_max_age'))
+    proj.metadata = ProjectMetadata(jconfig.get('project_meta_file', f'~/.jirate{suffix}.projects'), jconfig.get('project_meta_max_age'))
+    if 'max_workers' in jconfig:
+        proj.max_workers = int(jconfig['max_workers'])
+    if 'default_projects' in jconfig:
+        proj.project_keys = [key.upper() for key in jconfig['default_projects']]
+    for key in jconfig:
+        if key not in ['custom_fields', 'proxies', 'here_there_be_dragons', 'url', 'token', 'default_project', 'proxies']:
+            proj.set_user_data(key, jconfig[key])
+    return proj
+
+
+def _connect_server(name, primary):
+    sconfig = copy.copy(primary.get_user_data('servers')[name])
+    if 'default_project' not in sconfig:
+        raise ValueError('No default_project configured')
+    if 'max_workers' not in sconfig and primary.max_workers:
+        sconfig['max_workers'] = primary.max_workers
+    return _connect_project(sconfig, sconfig['default_project'], primary.allow_code, server_name=name)
+
+
+def _server_keys(sconfig):
+    # Projects a server is configured to cover, without connecting to it
+    keys = [sconfig['default_project']] if sconfig.get('default_project') else []
+    return [key.upper() for key in keys + list(sconfig.get('default_projects') or [])]
+
+
+def server_projects(args):
+    """Connect to the additional servers in the 'servers' configuration
+    (concurrently, on first use) and return their JiraProjects.  When
+    projects were asked for by name, only the servers configured for one
+    of them are connected to, and each covers just those projects."""
+    if args.project.servers is not None:
+        return args.project.servers
+
+    args.project.servers = []
+    servers = args.project.get_user_data('servers')
+    if not servers:
+        return args.project.servers
+
+    wanted = {}
+    for name in servers:
+        keys = None
+        if args.project.requested_keys:
+            keys = [key for key in args.project.requested_keys if key in _server_keys(servers[name])]
+            if not keys:
+                continue
+        wanted[name] = keys
+
+    for name, proj, err in parallel(lambda name: _connect_server(name, args.project), list(wanted), args.project.max_workers):
+        if err:
+            print(f'{name}: {err}')
+            continue
+        if wanted[name]:
+            proj.project_keys = wanted[name]
+        # Custom field IDs mean different things on different servers
+        proj.output_fields = output_renderers(proj.schema.fields, proj.schema.renderers)
+        args.project.servers.append(proj)
+    return args.project.servers
+
+
 def get_jira_project(project=None, config=None, config_file=None, **kwargs):
     # project: Project key
     # config: dict / pre-read JSON data
@@ -1670,6 +2519,15 @@ def get_jira_project(project=None, config=None, config_file=None, **kwargs):
         return None
     jconfig = config['jira']
 
+    # -p A,B,C: ls/search cover all of them; everything else uses A.
+    # Without -p, ls/search cover default_projects, if configured.
+    project_keys = None
+    if project and ',' in project:
+        project_keys = [key.strip() for key in project.split(',') if key.strip()]
+        project = project_keys[0]
+    elif project:
+        project_keys = [project]
+
     if not project:
         if 'default_project' in jconfig and not project:
             project = jconfig['default_project']
@@ -1697,26 +2555,10 @@ def get_jira_project(project=None, config=None, config_file=None, **kwargs):
     if not project:
         # Not sure why I used an array here
         project = jconfig['default_project']
-    if 'proxies' not in jconfig:
-        jconfig['proxies'] = {"http": "", "https": ""}
-
-    if 'cache_expire' in jconfig:
-        expire = jconfig['cache_expire']
-    else:
-        expire = None
-
-    if 'cache_file' in jconfig:
-        cache_file = jconfig['cache_file']
-    else:
-        cache_file = '~/.jirate.cache'
-
-    jira = get_jira(jconfig)
-    cache = RequestCache(jira._session, filename=cache_file, expire=expire)
-    proj = JiraProject(jira, project, readonly=False, allow_code=allow_code)
-    proj.request_cache = cache
-    for key in jconfig:
-        if key not in ['custom_fields', 'proxies', 'here_there_be_dragons', 'url', 'token', 'default_project', 'proxies']:
-            proj.set_user_data(key, jconfig[key])
+    proj = _connect_project(jconfig, project, allow_code)
+    if project_keys:
+        proj.project_keys = project_keys
+        proj.requested_keys = project_keys
 
     if 'custom_fields' in jconfig:
         if isinstance(jconfig['custom_fields'], str):
@@ -1746,7 +2588,7 @@ def get_jira_project(project=None, config=None, config_file=None, **kwargs):
             field_info['name'] = proj.field_to_human(field_id)
             proj.custom_fields.append(field_info)
 
-    apply_field_renderers(proj.jira.fields(), False)
+    apply_field_renderers(proj.schema.fields, False, proj.schema.renderers)
     if proj.custom_fields:
         reorder = True
         if 'custom_reorder' in jconfig:
@@ -1765,11 +2607,18 @@ def add_list_options(cmd,
     cmd.add_argument('--compact', default=False, help='Delete columns with no value set in matrix output', action='store_true')
 
 
+def add_graph_options(cmd):
+    cmd.add_argument('-d', '--depth', default=default_depth, type=int, help=f'Follow at most this many levels of relationships (default: {default_depth})')
+    cmd.add_argument('-a', '--all', default=False, action='store_true', help='Follow links, subtasks, epics and parents')
+    cmd.add_argument('--dot', default=False, action='store_true', help='Print the graph in Graphviz DOT format')
+    cmd.add_argument('issue_id', nargs='+', help='Issue(s) to start from', type=str.upper)
+
+
 def create_parser():
     parser = ComplicatedArgs()
 
     parser.add_argument('-c', '--config', help='Use this config file (instead of ~/.jirate.json)', default=None)
-    parser.add_argument('-p', '--project', help='Use this JIRA project instead of default', default=None, type=str.upper)
+    parser.add_argument('-p', '--project', help='Use this JIRA project instead of default; ls and search accept a comma-separated list', default=None, type=str.upper)
     parser.add_argument('-f', '--format', help='Use this format for issue list output', default='default', choices=['default', 'csv'], type=str.lower)
     parser.add_argument('--x-format-field', nargs=2, help='Experimental: apply field formatting from the CLI (field, json)', default=None)
     parser.add_argument('--debug', help='Enable debugging', default=False, action='store_true')
@@ -1783,6 +2632,7 @@ def create_parser():
     cmd.add_argument('-a', '--all', action='store_true', help='Display all issues; do not restrict to one project.')
     add_list_options(cmd)
 
+    cmd.add_argument('-s', '--sort', help='Sort by these fields (field[:desc],...)')
     cmd.add_argument('status', nargs='?', default=None, help='Restrict to issues in this state')
 
     cmd = parser.command('search', help='Search issue(s)/user(s) with matching text', handler=search_jira)
@@ -1790,6 +2640,10 @@ def create_parser():
     cmd.add_argument('-n', '--named-search', help='Perform preconfigured named search for issues')
     cmd.add_argument('-r', '--raw', action='store_true', help='Perform raw JQL query')
     cmd.add_argument('--prune-regex', nargs=2, help='Prune results by checking named field against regular expression, removing any that do not match')
+    cmd.add_argument('-L', '--local', action='store_true', help='Full-text search of the local issue mirror (see "sync")')
+    cmd.add_argument('-s', '--sort', help='Sort by these fields (field[:desc],...)')
+    cmd.add_argument('-R', '--refine', metavar='JQL', help='Narrow the results kept by the last search with --keep (or with --local, the local mirror) using a subset of JQL without contacting the server')
+    cmd.add_argument('-k', '--keep', action='store_true', help='Keep the results for a later --refine')
     add_list_options(cmd, quiet_help='Only print issue IDs (issue search) / first specified field (user search)')
     cmd.add_argument('text', nargs='*', help='Search text')
 
@@ -1807,13 +2661,13 @@ def create_parser():
     parser.command('lt', help='List issue types available to project', handler=list_issue_types)
     parser.command('link-types', help='Display link types', handler=list_link_types)
 
-    cmd = parser.command('assign', help='Assign issue', handler=assign_issue)
-    cmd.add_argument('issue_id', help='Target issue', type=str.upper)
+    cmd = parser.command('assign', help='Assign issue(s)', handler=assign_issue)
+    cmd.add_argument('issue_id', nargs='+', help='Target issue(s)', type=str.upper)
     cmd.add_argument('user', help='Target assignee')
     # cmd.add_argument('users', help='First is assignee; rest are watchers (if none, assign to self)', nargs='*')
 
-    cmd = parser.command('unassign', help='Remove assignee from issue', handler=unassign_issue)
-    cmd.add_argument('issue_id', help='Target issue', type=str.upper)
+    cmd = parser.command('unassign', help='Remove assignee from issue(s)', handler=unassign_issue)
+    cmd.add_argument('issue_id', nargs='+', help='Target issue(s)', type=str.upper)
 
     cmd = parser.command('mv', help='Move issue(s) to new state', handler=move)
     cmd.add_argument('-m', '--mine', action='store_true', help='Also assign to myself')
@@ -1857,7 +2711,7 @@ def create_parser():
     cmd.add_argument('-r', '--remove', help='Comment ID to remove')
     cmd.add_argument('-q', '--reply', nargs='?', help='Comment ID to quote and reply', default=False, const=True)
     cmd.add_argument('-g', '--group', help='Specify comment group visibility')
-    cmd.add_argument('issue', help='Issue to operate on')
+    cmd.add_argument('issue', help='Issue to operate on; new comments may go to several (comma-separated)')
     cmd.add_argument('text', nargs='*', help='Comment text')
 
     cmd = parser.command('edit', help='Edit issue description or summary', handler=edit_issue)
@@ -1866,11 +2720,14 @@ def create_parser():
     cmd.add_argument('-f', '--file', default=None, help='Update summary and description from a file')
     cmd.add_argument('text', nargs='*', help='New text')
 
-    cmd = parser.command('field', help='Update field values for an issue', handler=issue_fields)
-    cmd.add_argument('issue', help='Issue')
-    cmd.add_argument('operation', help='Operation', choices=['add', 'get', 'get-json', 'set', 'remove', 'sub'])
-    cmd.add_argument('name', help='Name of field to update')
+    cmd = parser.command('field', help='Update field values for issue(s)', handler=issue_fields)
+    cmd.add_argument('-j', '--jql', help='Operate on every issue matching this search (quoted) instead; the issue is left out')
+    cmd.add_argument('issue', help='Issue, or comma-separated issues')
+    cmd.add_argument('operation', help='Operation: ' + ', '.join(_field_operations), nargs='?')
+    cmd.add_argument('name', help='Name of field to update', nargs='?')
     cmd.add_argument('values', help='Value(s) to update', nargs='*')
+    cmd.add_argument('-a', '--and', dest='also', action='append', nargs='+', metavar='OP NAME VALUE',
+                     help='Another change to make in the same update (repeatable)')
 
     cmd = parser.command('fields', help='List fields (and allowed values, when applicable)', handler=issue_fields)
     cmd.add_argument('-t', '--type', default=None, help='Fields available at creation time for the specified type')
@@ -1896,6 +2753,10 @@ def create_parser():
     cmd = parser.command('template', help='Create issue from YAML template', handler=create_from_template)
     cmd.add_argument('template_file', help='Path to the template file')
     cmd.add_argument('--apply', help='Apply template to existing issue')
+    cmd.add_argument('-r', '--reconcile', default=False, action='store_true',
+                     help='Update issues which already exist (matched by key, or by summary) with only the fields which differ, '
+                          'and create the rest, including missing subtasks')
+    cmd.add_argument('-m', '--marker', help='Label to add to created issues; with --reconcile, match by summary only among issues with it')
     cmd.add_argument('-n', '--non-interactive', default=False, help='Do not prompt for variables', action='store_true')
     cmd.add_argument('-q', '--quiet', default=False, help='Only print new issue IDs after creation (for scripting)', action='store_true')
     cmd.add_argument('--dry-run', default=False, help='Print template with variables substituted; do not file issues', action='store_true')
@@ -1906,7 +2767,8 @@ def create_parser():
     cmd.add_argument('template_file', help='Path to the template file')
 
     cmd = parser.command('generate-template', help='Generate YAML template from existing issue', handler=generate_template)
-    cmd.add_argument('issue_id', help='Issue to generate the template from', type=str.upper)
+    cmd.add_argument('-j', '--jql', help='Generate from every issue matching this JQL (subtasks are included under their parents)')
+    cmd.add_argument('issue_id', help='Issue(s) to generate the template from', type=str.upper, nargs='*')
     cmd.add_argument('-a', '--all-fields', default=False, help='Include all fields, even ones that may not make sense for a '
                                                                'template',
                      action='store_true')
@@ -1930,6 +2792,33 @@ def create_parser():
 
     cmd = parser.command('clean', help='Clear cache', handler=clean_cache)
 
+    cmd = parser.command('stats', help='Count issues by status, component, version or any other field', handler=issue_stats)
+    cmd.add_argument('-g', '--group-by', default='status', help='Field or two comma-separated fields to group by (default: status)')
+    cmd.add_argument('query', nargs='*', help='JQL restricting the issues counted (e.g. "type = Bug AND resolution is EMPTY")')
+
+    cmd = parser.command('tree', help='Show subtasks and issues in epics, recursively', handler=issue_tree)
+    add_graph_options(cmd)
+
+    cmd = parser.command('deps', help='Show linked issues, recursively', handler=issue_deps)
+    add_graph_options(cmd)
+
+    cmd = parser.command('rollup', help='Totals across the issues in epics or features', handler=issue_rollup)
+    cmd.add_argument('-P', '--points', help='Field to sum as story points (default: points_field from config, or Story Points)')
+    cmd.add_argument('-v', '--verbose', default=False, action='store_true', help='Also count issues by status')
+    cmd.add_argument('--no-cache', default=False, action='store_true', help='Do not use or update the rollup cache')
+    cmd.add_argument('issue_id', nargs='+', help='Epic(s) or feature(s)', type=str.upper)
+
+    cmd = parser.command('cycle-time', help='Time spent in each status, cycle time and lead time', handler=issue_timing)
+    cmd.add_argument('--percentiles', help='Comma-separated percentiles to report (default: 50,85,95)')
+    cmd.add_argument('--hours', default=False, action='store_true', help='Report hours instead of days')
+    cmd.add_argument('query', nargs='*', help='JQL restricting the issues measured (e.g. "sprint = 1234")')
+
+    cmd = parser.command('sync', help='Update local issue mirror', handler=sync_mirror)
+    cmd.add_argument('--full', default=False, action='store_true', help='Discard local data and reload all issues')
+    cmd.add_argument('-u', '--users', default=False, action='store_true', help='Load every user into the local user directory (only, unless projects are given)')
+    cmd.add_argument('-q', '--quiet', default=False, action='store_true', help='Do not print issue counts')
+    cmd.add_argument('projects', nargs='*', help='Projects to sync (default: mirror_projects from config or current project)')
+
     if ollama:
         cmd = parser.command('summarize', help='Summarize using Ollama', handler=summaraize)  # no that's not a typo
         cmd.add_argument('issue_id', nargs='+', help='Target issue(s)', type=str.upper)
@@ -1998,6 +2887,12 @@ def main():
         save = False  # NOQA
 
     project.request_cache.save()
+    project.user_directory.save()
+    project.metadata.save()
+    for server in project.servers or []:
+        server.request_cache.save()
+        server.user_directory.save()
+        server.metadata.save()
     if ns.debug:
         project.request_cache.debug_dump()
     sys.exit(ret)
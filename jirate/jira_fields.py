@@ -319,6 +319,12 @@ _base_fields = [
         'verbose': True,
         'display': 'date'
     },
+    {
+        'id': 'project',
+        'name': 'Project',
+        'verbose': True,
+        'display': 'key'
+    },
     {
         'id': 'labels',
         'name': 'Labels',
@@ -368,7 +374,6 @@ _quiet_fields = [
     'environment',
     'lastViewed',
     'progress',
-    'project',
     'reporter',
     'timeestimate',
     'timeoriginalestimate',
@@ -420,21 +425,31 @@ _jirate_fields = {}
 _loaded_mods = {}
 
 
-def apply_schema_renderer(field):
-    schema = field['schema']
+def schema_renderer(schema):
+    """Name of the renderer for a field with no configured display: a key
+    of custom_field_renderers or _field_renderers
+
+    Parameters:
+      schema: The field's schema from /field
+    """
     if 'custom' in schema and schema['custom'] in custom_field_renderers:
-        field['display'] = custom_field_renderers[schema['custom']]
-        return
+        return schema['custom']
     if schema['type'] == 'array':
-        try:
-            field['display'] = _array_renderers[schema['items']]
-        except KeyError:
-            field['display'] = array
+        return _array_renderers.get(schema['items'], 'array')
+    if schema['type'] in _field_renderers:
+        return schema['type']
+    return 'string'
+
+
+def apply_schema_renderer(field, renderer=None):
+    if renderer is None:
+        renderer = schema_renderer(field['schema'])
+    if renderer in custom_field_renderers:
+        field['display'] = custom_field_renderers[renderer]
+    elif field['schema']['type'] == 'array' and renderer != 'array':
+        field['display'] = renderer
     else:
-        try:
-            field['display'] = _field_renderers[schema['type']]
-        except KeyError:
-            field['display'] = string
+        field['display'] = _field_renderers[renderer]
 
 
 def func_from_path(filename, function, field, fields):
@@ -482,18 +497,8 @@ def eval_custom_field(__code__, field, fields):
     return eval(str(__code__))
 
 
-def apply_field_renderers(custom_field_defs=None, reorder_custom=True):
-    """Custom field rendering setup function
-
-    Parameters:
-      custom_field_defs: Dictionary (typically retrieved from
-        /rest/api/latest/field) with custom code snippets or
-        field rendering definitions
-
-    Returns:
-      nothing in particular
-    """
-    global _fields
+def _field_map(custom_field_defs, reorder_custom, renderers):
+    # Rendering configuration for a set of field definitions
     base_fields = OrderedDict()
     custom_fields = OrderedDict()
     ret = OrderedDict()
@@ -506,8 +511,7 @@ def apply_field_renderers(custom_field_defs=None, reorder_custom=True):
             if field['id'] in _ignore_fields:
                 continue
             ret[field['id']] = field
-        _fields = ret
-        return
+        return ret
 
     # First go through base fields
     for field in _base_fields:
@@ -530,7 +534,7 @@ def apply_field_renderers(custom_field_defs=None, reorder_custom=True):
                 continue
         custom_fields[field['id']] = field
         if 'display' not in field and 'code' not in field and 'schema' in field:
-            apply_schema_renderer(field)
+            apply_schema_renderer(field, (renderers or {}).get(field['id']))
         if '_jirate_reference' in field:
             # Just keep track of reference
             _jirate_fields[field['id']] = field['_jirate_reference']
@@ -546,8 +550,25 @@ def apply_field_renderers(custom_field_defs=None, reorder_custom=True):
             ret[key] = base_fields[key]
         for key in custom_fields:
             ret[key] = custom_fields[key]
+    return ret
+
+
+def apply_field_renderers(custom_field_defs=None, reorder_custom=True, renderers=None):
+    """Custom field rendering setup function
+
+    Parameters:
+      custom_field_defs: Dictionary (typically retrieved from
+        /rest/api/latest/field) with custom code snippets or
+        field rendering definitions
+      renderers: Optional dict of field ID -> schema_renderer() result,
+        already worked out for custom_field_defs
 
-    if _fields:
+    Returns:
+      nothing in particular
+    """
+    global _fields
+    ret = _field_map(custom_field_defs, reorder_custom, renderers)
+    if custom_field_defs and _fields:
         # If we were called twice, tack on the things we'd already set up
         for key in _fields:
             if key not in ret:
@@ -556,13 +577,30 @@ def apply_field_renderers(custom_field_defs=None, reorder_custom=True):
     _fields = ret
 
 
+def output_renderers(field_defs, renderers=None):
+    """Rendering configuration for another server's fields.  The same
+    custom field ID usually means a different field on each server, so
+    rather than adding to the configuration set up by
+    apply_field_renderers(), this is kept with the server and passed to
+    render_field_data() as field_map.
+
+    Parameters:
+      field_defs: /field data (list of dicts)
+      renderers: Optional dict of field ID -> schema_renderer() result
+
+    Returns:
+      field map
+    """
+    return _field_map(field_defs, False, renderers)
+
+
 def jirate_field(field_key):
     if field_key in _jirate_fields:
         return _jirate_fields[field_key]
     return None
 
 
-def render_field_data(field_key, fields, verbose=False, allow_code=False, as_object=False, as_json=False):
+def render_field_data(field_key, fields, verbose=False, allow_code=False, as_object=False, as_json=False, field_map=None):
     """Render the field using custom-renderers or user-supplied code
     Note: you must first configure the rendering engine using apply_field_renderers()
 
@@ -573,6 +611,8 @@ def render_field_data(field_key, fields, verbose=False, allow_code=False, as_obj
       allow_code: Allow eval() during execution (dangerous whenever source
                   is untrusted)
       as_object: Return a Python object instead of a string representation
+      field_map: Rendering configuration from output_renderers() (default:
+                 the one set up by apply_field_renderers())
 
     Returns:
       field_name: Human-readable field name (string)
@@ -583,9 +623,11 @@ def render_field_data(field_key, fields, verbose=False, allow_code=False, as_obj
             return field_key, json(fields[field_key])
         else:
             raise ValueError(f'{field_key} not in issue fields')
-    if field_key not in _fields:
+    if field_map is None:
+        field_map = _fields
+    if field_key not in field_map:
         return field_key, fields[field_key]
-    field_name = _fields[field_key]['name']
+    field_name = field_map[field_key]['name']
     if field_key not in fields and field_key not in _jirate_fields:
         return field_name, None
     if field_key in _jirate_fields:
@@ -597,7 +639,7 @@ def render_field_data(field_key, fields, verbose=False, allow_code=False, as_obj
         field = fields[field_key]
     if not field:
         return field_name, None
-    field_config = _fields[field_key]
+    field_config = field_map[field_key]
 
     if 'verbose' in field_config:
         if field_config['verbose'] is True and not verbose:
@@ -640,23 +682,23 @@ def field_ordering():
     return [_fields.keys()]
 
 
-def max_field_width(issue, verbose, allow_code):
+def max_field_width(issue, verbose, allow_code, field_map=None):
     width = 0
 
-    for field_key in _fields:
-        field_name, val = render_field_data(field_key, issue, verbose, allow_code)
+    for field_key in (_fields if field_map is None else field_map):
+        field_name, val = render_field_data(field_key, issue, verbose, allow_code, field_map=field_map)
         if not val:
             continue
         width = max(width, len(field_name))
     return width
 
 
-def render_issue_fields(issue, verbose=False, allow_code=False, width=None):
+def render_issue_fields(issue, verbose=False, allow_code=False, width=None, field_map=None):
     if not width:
-        width = max_field_width(issue, verbose, allow_code)
+        width = max_field_width(issue, verbose, allow_code, field_map)
 
-    for field_key in _fields:
-        field_name, val = render_field_data(field_key, issue, verbose, allow_code)
+    for field_key in (_fields if field_map is None else field_map):
+        field_name, val = render_field_data(field_key, issue, verbose, allow_code, field_map=field_map)
         if not val:
             continue
         vsep_print(' ', 0, field_name, width, val)
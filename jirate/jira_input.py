@@ -148,9 +148,76 @@ def check_value(check, value):
     return 0
 
 
+# Splits values into the tokens check_value() matches partial values on
+_token_rx = re.compile(r'[\s\-]')
+# Values containing these may match differently than their tokens suggest
+_regex_chars = frozenset('.^$*+?{}[]\\|()')
+
+
+class AllowedValues(object):
+    def __init__(self, allowed_values):
+        """Index of a field's allowed values, so that a user-provided value
+        can be matched without calling check_value() on every one of them.
+        Gives the same results as doing so: the last exact match, or else
+        the only partial match.
+
+        Parameters:
+            allowed_values: allowedValues list from field metadata
+        """
+        self.allowed_values = allowed_values
+        self.values = []
+        self.exact = {}
+        self.tokens = {}
+        for av in allowed_values:
+            # Ignore archived or disabled allowed values
+            if 'archived' in av and av['archived']:
+                continue
+            if 'disabled' in av and av['disabled']:
+                continue
+
+            # Not sure why we care about name vs. value; value only is fine
+            for key in ['name', 'value', 'displayName']:
+                if key not in av:
+                    continue
+                idx = len(self.values)
+                self.values.append(av[key])
+                for possible_value in (av[key], nym(av[key]), av[key].lower()):
+                    self.exact.setdefault(possible_value, []).append(idx)
+                    for token in set(_token_rx.split(possible_value)):
+                        self.tokens.setdefault(token, []).append(idx)
+
+    def _candidates(self, check):
+        # A partial match starts at the beginning of the value or after a
+        # space or dash, so the first token of check is a token of the value
+        if not isinstance(check, str) or not check or _token_rx.match(check) or _regex_chars.intersection(check):
+            return range(len(self.values))
+        first = _token_rx.split(check, 1)[0]
+        return sorted(set(self.exact.get(check, []) + self.tokens.get(first, [])))
+
+    def match(self, check):
+        """Find the allowed values matching a user-provided value
+
+        Returns:
+            (list of matching values, exact match)
+        """
+        ret = []
+        exact = False
+        for idx in self._candidates(check):
+            cv = check_value(check, self.values[idx])
+            if cv == 2:
+                ret = [self.values[idx]]
+                exact = True
+            elif cv == 1 and not (ret and exact):
+                ret.append(self.values[idx])
+                exact = False
+        return (ret, exact)
+
+
 def allowed_value_validate(field_name, values, allowed_values=None):
     if not allowed_values:
         return values
+    if not isinstance(allowed_values, AllowedValues):
+        allowed_values = AllowedValues(allowed_values)
 
     # Validate that the name or value exists and create our array of IDs
     # corresponding to them.
@@ -161,41 +228,22 @@ def allowed_value_validate(field_name, values, allowed_values=None):
 
     info = {}
     for val in check:
-        for av in allowed_values:
-            # Ignore archived or disabled allowed values
-            if 'archived' in av and av['archived']:
-                continue
-            if 'disabled' in av and av['disabled']:
-                continue
-
-            # Not sure why we care about name vs. value; value only is fine
-            for key in ['name', 'value', 'displayName']:
-                if key not in av:
-                    continue
-                cv = check_value(val, av[key])
-                if cv == 2:
-                    info[val] = {'values': [av[key]], 'exact': True}
-                    continue
-                if cv == 1:
-                    if val in info:
-                        if not info[val]['exact']:
-                            info[val]['values'].append(av[key])
-                    else:
-                        info[val] = {'values': [av[key]], 'exact': False}
+        matches, _ = allowed_values.match(val)
 
         # If we didn't find a match, raise an error
-        if val not in info:
+        if not matches:
             raise ValueError(f'Value {val} not allowed for {field_name}')
+        info[val] = matches
 
     # We should only have one match per value
     for key in info:
-        if len(info[key]['values']) > 1:
+        if len(info[key]) > 1:
             raise ValueError(f'{key}: More than one match for {key}')
 
     ret = []
     # Output order MUST match input order
     for val in check:
-        ret.append(info[val]['values'][0])
+        ret.append(info[val][0])
 
     if not isinstance(values, list):
         return ret[0]
@@ -203,67 +251,175 @@ def allowed_value_validate(field_name, values, allowed_values=None):
     return ret
 
 
-def transmogrify_value(value, field_info):
+def _converter(field_info, renderers=None):
+    # Function translating input for one field; the renderer tables are
+    # consulted on each call, since setup_input() may change the defaults
     schema = field_info['schema']
     av = field_info['allowedValues'] if 'allowedValues' in field_info else None
+    index = []
+    if renderers:
+        (basic_renderers, array_renderers) = renderers
+    else:
+        (basic_renderers, array_renderers) = (_input_renderers, _input_array_renderers)
 
     if 'custom' in schema and schema['custom'] in _custom_field_input:
-        return _custom_field_input[schema['custom']](value)
+        return _custom_field_input[schema['custom']]
 
+    def _index():
+        # Built on first use, and kept as long as the converter is
+        if av and not index:
+            index.append(AllowedValues(av))
+        return index[0] if index else av
+
+    name = field_info['name']
     if schema['type'] == 'array':
-        vals = allowed_value_validate(field_info['name'], parse_params(value), av)
-        try:
-            ret = _input_array_renderers[schema['items']](vals)
-        except KeyError:
-            ret = in_string_list(vals)
-    else:
+        items = schema['items']
+
+        def _array(value):
+            vals = allowed_value_validate(name, parse_params(value), _index())
+            try:
+                return array_renderers[items](vals)
+            except KeyError:
+                return in_string_list(vals)
+        return _array
+
+    field_type = schema['type']
+
+    def _basic(value):
         try:
-            out_val = allowed_value_validate(field_info['name'], value, av)
-            ret = _input_renderers[schema['type']](out_val)
+            out_val = allowed_value_validate(name, value, _index())
+            return basic_renderers[field_type](out_val)
         except KeyError:
-            ret = in_string(value)
+            return in_string(value)
+    return _basic
+
+
+def transmogrify_value(value, field_info, renderers=None):
+    return _converter(field_info, renderers)(value)
+
+
+class InputPlan(object):
+    # Fields which are not set during create/update
+    drop_fields = ('attachment', 'reporter', 'issuelinks')
+    # Fields which are passed through as-is
+    simple_fields = ('project', 'issuetype', 'summary', 'description')
+
+    def __init__(self, field_definitions, renderers=None):
+        """Everything needed to translate input for a set of field
+        definitions, worked out once: which field each name or alias
+        refers to, and (as they are used) how to translate each field's
+        values.  See input_plan().
+
+        Parameters:
+            field_definitions: Create/Update metadata or /field dictionary
+            renderers: Input renderers for the server, from
+                       input_renderers() (default: those set up by the
+                       last setup_input() call)
+        """
+        self.field_definitions = field_definitions
+        self.renderers = renderers
+        # Shallow copy, to notice fields being added, removed or replaced
+        self.snapshot = dict(field_definitions)
+        self.def_map = {}
+        self.converters = {}
+        for field in field_definitions:
+            self.def_map[field] = field
+            self.def_map[nym(field)] = field
+            self.def_map[field_definitions[field]['name']] = field
+            self.def_map[nym(field_definitions[field]['name'])] = field
+
+    def convert(self, field_id, value):
+        converter = self.converters.get(field_id)
+        if converter is None:
+            converter = self.converters[field_id] = _converter(self.field_definitions[field_id], self.renderers)
+        return converter(value)
+
+    def apply(self, **args):
+        """Translate user-provided key,value pairs; see transmogrify_input()"""
+        output = {}
+        unused = {}
+        for field in args:
+            value = args[field]
+            if field in self.simple_fields:
+                output[field] = value
+                continue
+            if field not in self.def_map:
+                unused[field] = value
+                continue
+            field_id = self.def_map[field]
+            if field_id in self.drop_fields:
+                continue
+            output[field_id] = self.convert(field_id, value)
+        return (output, unused)
 
-    return ret
+
+# Recently used plans, by identity of their field definitions and renderers
+_plans = {}
+_max_plans = 64
+
+
+def input_plan(field_definitions, renderers=None):
+    """Retrieve (or build) the InputPlan for a set of field definitions.
+    Plans are kept for the most recently used definitions, so translating
+    input for many issues sharing metadata only builds one.
+
+    Parameters:
+        field_definitions: Create/Update metadata or /field dictionary
+        renderers: Input renderers, from input_renderers()
+
+    Returns:
+        InputPlan
+    """
+    key = (id(field_definitions), id(renderers))
+    plan = _plans.get(key)
+    # Held by the plan, so the IDs can't be reused while it is cached.
+    # Comparing against the snapshot is cheap, as unchanged values are
+    # the same objects
+    if plan is not None and plan.field_definitions is field_definitions and plan.renderers is renderers and plan.snapshot == field_definitions:
+        return plan
+    if len(_plans) >= _max_plans:
+        _plans.clear()
+    plan = _plans[key] = InputPlan(field_definitions, renderers)
+    return plan
 
 
 # Channelling ... Calvin
-def transmogrify_input(field_definitions, **args):
+def transmogrify_input(field_definitions, _renderers=None, **args):
     """ Translate text input into something Jira understands natively when
     pasting to the API.
 
     Parameters:
         field_definitions: Create/Update metadata or /field dictionary
+        _renderers: Input renderers for the server, from input_renderers()
+                    (default: those set up by the last setup_input() call)
         args: User-provided key,value pairs (strings)
 
     Returns:
         Updated dictionary with JIRA field IDs and values corresponding to
         metadata in field_definitions
     """
-    drop_fields = ['attachment', 'reporter', 'issuelinks']  # These are not set during create/update
-    simple_fields = ['project', 'issuetype', 'summary', 'description']                # Don't process these fields at all
-    output = {}
-    unused = {}
-    def_map = {}
-
-    for field in field_definitions:
-        def_map[field] = field
-        def_map[nym(field)] = field
-        def_map[field_definitions[field]['name']] = field
-        def_map[nym(field_definitions[field]['name'])] = field
-
-    for field in args:
-        value = args[field]
-        if field in simple_fields:
-            output[field] = value
-            continue
-        if field not in def_map:
-            unused[field] = value
-            continue
-        field_id = def_map[field]
-        if field_id in drop_fields:
-            continue
-        output[field_id] = transmogrify_value(value, field_definitions[field_id])
-    return (output, unused)
+    return input_plan(field_definitions, _renderers).apply(**args)
+
+
+def input_renderers(jira):
+    """Input renderers for one server, leaving the module defaults alone,
+    so connections to Cloud and Data Center servers can coexist
+
+    Parameters:
+        jira: python-jira JIRA object
+
+    Returns:
+        (basic renderers, array renderers) for transmogrify_input()
+    """
+    basic = dict(_input_renderers)
+    array = dict(_input_array_renderers)
+    if jira._is_cloud:
+        basic.update(_cloud_field_input_basic)
+        array.update(_cloud_field_input_array)
+    else:
+        basic.update(_dc_field_input_basic)
+        array.update(_dc_field_input_array)
+    return (basic, array)
 
 
 def setup_input(jira):
@@ -0,0 +1,351 @@
+#!/usr/bin/python3
+#
+# Client-side evaluation of a useful subset of JQL
+#
+# Iterating on a query (adding a label filter, narrowing the status,
+# changing the assignee) normally means another full search on the
+# server.  When the issues are already in hand - from the previous
+# search or the local mirror - we can narrow them locally instead.
+#
+# Supported:
+#   field = value, field != value
+#   field ~ text, field !~ text
+#   field in (a, b, ...), field not in (a, b, ...)
+#   field is EMPTY, field is not EMPTY (NULL is accepted for EMPTY)
+#   AND, OR, NOT and parentheses
+#   currentUser()
+#   ORDER BY field [ASC|DESC], ...
+#
+# Comparisons are case-insensitive.  Object values (users, statuses,
+# components, versions, options...) match on any of their key, name,
+# value, display name, account ID or email address.
+#
+import re
+
+from jirate.decor import nym
+from jirate.sorting import sort_issues
+
+_token_rx = re.compile(r'''\s*(?:
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+   |(?P<op>!=|!~|>=|<=|=|~|>|<|\(|\)|,)
+   |(?P<word>[^\s=!~<>(),"']+)
+)''', re.X)
+
+_keywords = ('and', 'or', 'not', 'in', 'is', 'empty', 'null', 'order', 'by', 'asc', 'desc')
+
+# Attributes of JSON objects we consider to be the object's value
+_object_keys = ('key', 'name', 'value', 'displayName', 'accountId', 'emailAddress', 'id')
+
+# Fields which are not fields in issue JSON
+_key_fields = ('key', 'issuekey', 'id')
+_text_fields = ('summary', 'description', 'environment')
+
+
+class JQLError(ValueError):
+    pass
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _token_rx.match(text, pos)
+        if not match or match.end() == pos:
+            raise JQLError(f'Cannot parse query at: {text[pos:]}')
+        pos = match.end()
+        if match.group('string') is not None:
+            val = match.group('string')[1:-1]
+            tokens.append(('str', re.sub(r'\\(.)', r'\1', val)))
+        elif match.group('op') is not None:
+            tokens.append(('op', match.group('op')))
+        else:
+            word = match.group('word')
+            if word.lower() in _keywords:
+                tokens.append(('kw', word.lower()))
+            else:
+                tokens.append(('str', word))
+    return tokens
+
+
+def _flatten(value):
+    """Reduce a raw field value to a list of strings"""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        ret = []
+        for item in value:
+            ret.extend(_flatten(item))
+        return ret
+    if isinstance(value, dict):
+        ret = [str(value[key]) for key in _object_keys if key in value and value[key] is not None]
+        if 'child' in value:
+            ret.extend(_flatten(value['child']))
+        return ret
+    if isinstance(value, bool):
+        return [str(value).lower()]
+    if isinstance(value, float) and value.is_integer():
+        return [str(int(value))]
+    if value == '':
+        return []
+    return [str(value)]
+
+
+def _words(text):
+    return [word for word in re.split(r'[^\w.]+', text.lower().replace('*', '')) if word]
+
+
+def _raw(issue):
+    if isinstance(issue, dict):
+        return issue
+    return issue.raw
+
+
+class Query(object):
+    """A compiled query; see compile_jql()"""
+
+    def __init__(self, text, resolve_field=None, current_user=None, priorities=None):
+        self.text = text
+        self._resolve_field = resolve_field
+        self._current_user = current_user
+        self._priorities = priorities
+        self._field_ids = {}
+        self._tokens = _tokenize(text)
+        self._pos = 0
+        self.order_by = []
+
+        if self._peek() and self._peek() != ('kw', 'order'):
+            self._match = self._or_expr()
+        else:
+            self._match = None
+        if self._peek() == ('kw', 'order'):
+            self._next()
+            self._expect('kw', 'by')
+            self._order_by()
+        if self._peek():
+            raise JQLError(f'Unexpected \'{self._peek()[1]}\' in query')
+
+    # Parser
+    def _peek(self):
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise JQLError('Unexpected end of query')
+        self._pos = self._pos + 1
+        return token
+
+    def _expect(self, kind, value=None):
+        token = self._next()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise JQLError(f'Expected \'{value or kind}\', got \'{token[1]}\'')
+        return token
+
+    def _or_expr(self):
+        terms = [self._and_expr()]
+        while self._peek() == ('kw', 'or'):
+            self._next()
+            terms.append(self._and_expr())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda issue: any(term(issue) for term in terms)
+
+    def _and_expr(self):
+        terms = [self._not_expr()]
+        while self._peek() == ('kw', 'and'):
+            self._next()
+            terms.append(self._not_expr())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda issue: all(term(issue) for term in terms)
+
+    def _not_expr(self):
+        token = self._peek()
+        if token == ('kw', 'not'):
+            self._next()
+            term = self._not_expr()
+            return lambda issue: not term(issue)
+        if token == ('op', '('):
+            self._next()
+            term = self._or_expr()
+            self._expect('op', ')')
+            return term
+        return self._clause()
+
+    def _value(self):
+        token = self._next()
+        if token[0] != 'str':
+            raise JQLError(f'Expected a value, got \'{token[1]}\'')
+        if self._peek() == ('op', '('):
+            # Function call; only currentUser() is understood
+            self._next()
+            self._expect('op', ')')
+            if token[1].lower() != 'currentuser':
+                raise JQLError(f'Unsupported function: {token[1]}()')
+            return self._user_ids()
+        return [token[1]]
+
+    def _value_list(self):
+        self._expect('op', '(')
+        values = self._value()
+        while self._peek() == ('op', ','):
+            self._next()
+            values.extend(self._value())
+        self._expect('op', ')')
+        return values
+
+    def _clause(self):
+        field = self._field_id(self._expect('str')[1])
+        token = self._next()
+        negate = False
+
+        if token == ('kw', 'is'):
+            if self._peek() == ('kw', 'not'):
+                self._next()
+                negate = True
+            token = self._next()
+            if token not in (('kw', 'empty'), ('kw', 'null')):
+                raise JQLError(f'Expected EMPTY after IS, got \'{token[1]}\'')
+            return self._negated(lambda issue: not self._values(issue, field), negate)
+
+        if token == ('kw', 'not'):
+            self._expect('kw', 'in')
+            token = ('kw', 'in')
+            negate = True
+        if token == ('kw', 'in'):
+            wanted = set([value.lower() for value in self._value_list()])
+            return self._negated(lambda issue: bool(wanted.intersection(self._values(issue, field))), negate)
+
+        if token in (('op', '='), ('op', '!=')):
+            wanted = set([value.lower() for value in self._value()])
+            return self._negated(lambda issue: bool(wanted.intersection(self._values(issue, field))), token[1] == '!=')
+
+        if token in (('op', '~'), ('op', '!~')):
+            words = _words(' '.join(self._value()))
+            return self._negated(lambda issue: self._contains(issue, field, words), token[1] == '!~')
+
+        raise JQLError(f'Unsupported operator: {token[1]}')
+
+    def _order_by(self):
+        while True:
+            field = self._field_id(self._expect('str')[1])
+            descending = False
+            if self._peek() in (('kw', 'asc'), ('kw', 'desc')):
+                descending = self._next()[1] == 'desc'
+            self.order_by.append((field, descending))
+            if self._peek() != ('op', ','):
+                break
+            self._next()
+
+    # Evaluation
+    def _negated(self, func, negate):
+        if negate:
+            return lambda issue: not func(issue)
+        return func
+
+    def _user_ids(self):
+        users = self._current_user
+        if callable(users):
+            users = users()
+        if not users:
+            raise JQLError('currentUser() is not available')
+        if isinstance(users, str):
+            return [users]
+        return list(users)
+
+    def _field_id(self, name):
+        if name in self._field_ids:
+            return self._field_ids[name]
+        lname = name.lower()
+        if lname in _key_fields or lname in ('text', 'statuscategory'):
+            field_id = lname
+        elif self._resolve_field:
+            field_id = self._resolve_field(name) or self._resolve_field(nym(name))
+        else:
+            field_id = name
+        if not field_id:
+            raise JQLError(f'Unknown field: {name}')
+        self._field_ids[name] = field_id
+        return field_id
+
+    def field_values(self, issue, field):
+        """Raw values of a field in an issue, flattened to strings"""
+        raw = _raw(issue)
+        if field in ('key', 'issuekey'):
+            return [raw['key']]
+        if field == 'id':
+            return [str(raw['id'])]
+        fields = raw['fields']
+        if field == 'statuscategory':
+            status = fields.get('status') or {}
+            return _flatten(status.get('statusCategory'))
+        if field == 'text':
+            ret = [fields[key] for key in _text_fields if fields.get(key)]
+            if fields.get('comment'):
+                ret.extend([cmt['body'] for cmt in fields['comment']['comments'] if cmt.get('body')])
+            return ret
+        return _flatten(fields.get(field))
+
+    def _values(self, issue, field):
+        return set([val.lower() for val in self.field_values(issue, field)])
+
+    def _contains(self, issue, field, words):
+        # Like the server, match words (or their prefixes) rather than
+        # arbitrary substrings
+        found = _words(' '.join(self.field_values(issue, field)))
+        return all(any(have.startswith(word) for have in found) for word in words)
+
+    def match(self, issue):
+        """Determine whether an issue (Issue or raw dict) matches"""
+        if self._match is None:
+            return True
+        return self._match(issue)
+
+    def _sort_value(self, issue, field):
+        raw = _raw(issue)
+        if field in ('key', 'issuekey', 'id'):
+            return raw.get(field, raw['key'])
+        if field == 'statuscategory':
+            return (raw['fields'].get('status') or {}).get('statusCategory')
+        return raw['fields'].get(field)
+
+    def sort(self, issues):
+        """Sort issues according to ORDER BY, if present"""
+        if not self.order_by:
+            return list(issues)
+        priorities = self._priorities
+        if callable(priorities) and 'priority' in [field for field, _ in self.order_by]:
+            priorities = priorities()
+        elif callable(priorities):
+            priorities = None
+        return sort_issues(issues, self.order_by, self._sort_value, priorities)
+
+    def filter(self, issues):
+        """Return the matching issues, ordered if ORDER BY was given"""
+        return self.sort([issue for issue in issues if self.match(issue)])
+
+
+def compile_jql(text, resolve_field=None, current_user=None, priorities=None):
+    """Compile a JQL query for evaluation against issues we already have
+
+    Parameters:
+      text: JQL query (string)
+      resolve_field: Function mapping a clause name to a field ID
+                     (typically a JiraProject's field_to_id method)
+      current_user: User ID(s) for currentUser(), or a function
+                    returning them (string, list or callable)
+      priorities: Sort positions of priorities for ORDER BY priority
+                  (see jirate.sorting.priority_order()), or a function
+                  returning them (dict or callable)
+
+    Returns:
+      Query
+
+    Raises:
+      JQLError (a ValueError) if the query can not be parsed or uses
+      unsupported operators or functions
+    """
+    return Query(text, resolve_field, current_user, priorities)
@@ -6,6 +6,7 @@ import os
 import struct
 import fcntl
 import pickle
+import threading
 import time
 
 
@@ -89,3 +90,50 @@ def pickle_write(fn, obj):
     ret = pickle.dump(obj, fp)
     fp.close()
     return ret
+
+
+class PickledState(object):
+    """State kept in a versioned pickle file.  The file is read on first
+    use and written back by save() if anything changed; a file name of
+    '' keeps the state in memory only.  Saved data with another version
+    is ignored.
+
+    Subclasses set _version, bumped when the layout of the saved data
+    changes, and implement:
+
+      _reset()        set up empty state
+      _restore(data)  set up state from a dict returned by _state()
+      _state()        dict of the state to save
+    """
+    _version = 1
+
+    def __init__(self, filename, default_filename):
+        self._filename = filename if filename is not None else default_filename
+        self._loaded = False
+        self._dirty = False
+        # Siblings are set up from several threads at once
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            data = pickle_read(self._filename) if self._filename else None
+            if isinstance(data, dict) and data.get('version') == self._version:
+                self._restore(data)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or not self._filename:
+                return
+            pickle_write(self._filename, dict(self._state(), version=self._version))
+            self._dirty = False
+
+    def clear(self):
+        """Forget everything, including what was saved"""
+        with self._lock:
+            self._loaded = True
+            self._dirty = True
+            self._reset()
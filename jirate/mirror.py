@@ -0,0 +1,297 @@
+#!/usr/bin/python3
+#
+# Local issue mirror
+#
+# JIRA's text search borders on useless, and every query - however
+# small - is a round trip to the server.  The mirror keeps the raw JSON
+# of every issue in a set of projects in an SQLite database along with
+# an FTS5 index over the summary, description and comments, so text
+# searches can be answered locally with real ranking.
+#
+# The first sync of a project pulls every issue; subsequent syncs only
+# pull issues updated since the most recently updated issue already in
+# the mirror.  That bound comes from the server's own timestamps, so the
+# client's clock doesn't matter; it is written in the time zone of the
+# user's profile, which is how the server reads JQL dates.  Issues which
+# are deleted or
+# moved out of a project are not noticed by incremental syncs; use a
+# full sync to rebuild a project's contents.
+#
+import datetime
+import json
+import os
+import sqlite3
+import time
+import zoneinfo
+
+from jirate.decor import nym
+from jirate.sorting import parse_date
+
+default_mirror_file = '~/.jirate.mirror'
+
+# Incremental syncs go back this many seconds before the newest update
+# in the mirror, in case updates made around the time of the last sync
+# were committed out of order; re-fetching a few issues is harmless
+# since writes are idempotent
+_sync_overlap = 300
+
+_schema = [
+    '''CREATE TABLE IF NOT EXISTS issues (
+           id INTEGER PRIMARY KEY,
+           key TEXT UNIQUE NOT NULL,
+           project TEXT NOT NULL,
+           updated TEXT,
+           assignee TEXT,
+           status TEXT,
+           status_category TEXT,
+           raw TEXT NOT NULL)''',
+    'CREATE INDEX IF NOT EXISTS issues_project ON issues (project)',
+    '''CREATE TABLE IF NOT EXISTS projects (
+           project TEXT PRIMARY KEY,
+           last_sync REAL NOT NULL)''',
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS issue_text
+           USING fts5(summary, description, comments)'''
+]
+
+# Relative weights for bm25() ranking: summary, description, comments
+_rank = 'bm25(issue_text, 10.0, 4.0, 1.0)'
+
+
+def _jql_since(updated, time_zone):
+    # JQL date for _sync_overlap seconds before a timestamp from the
+    # server, in the user's profile time zone
+    stamp = parse_date(updated) - _sync_overlap
+    try:
+        zone = zoneinfo.ZoneInfo(time_zone) if time_zone else None
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        zone = None
+    if zone is None:
+        # Early enough in any time zone (UTC-12 to UTC+14)
+        since = datetime.datetime.fromtimestamp(stamp - 14 * 3600, datetime.timezone.utc)
+    else:
+        since = datetime.datetime.fromtimestamp(stamp, zone)
+    return since.strftime('%Y/%m/%d %H:%M')
+
+
+def _user_id(user):
+    if not user:
+        return None
+    if 'name' in user:
+        return user['name']
+    return user.get('accountId')
+
+
+def _comment_text(fields):
+    if 'comment' not in fields or not fields['comment']:
+        return ''
+    return '\n'.join([cmt['body'] for cmt in fields['comment']['comments'] if cmt.get('body')])
+
+
+class IssueMirror(object):
+    def __init__(self, filename=None, max_age=None):
+        """Local SQLite copy of issues
+
+        Parameters:
+          filename: Path to database (default: ~/.jirate.mirror)
+          max_age: Number of seconds after a sync during which the mirror
+                   may stand in for the server in ls/cat. None or 0 means
+                   the mirror is only used when explicitly requested.
+        """
+        if not filename:
+            filename = default_mirror_file
+        self._filename = os.path.expanduser(filename)
+        self.max_age = max_age
+        self._db = None
+
+    def _open(self, create=False):
+        if self._db:
+            return self._db
+        if not create and not os.path.exists(self._filename):
+            return None
+        db = sqlite3.connect(self._filename)
+        try:
+            for statement in _schema:
+                db.execute(statement)
+        except sqlite3.OperationalError as e:
+            db.close()
+            raise ValueError(f'Cannot initialize issue mirror {self._filename}: {e}')
+        db.commit()
+        self._db = db
+        return db
+
+    def close(self):
+        if self._db:
+            self._db.close()
+            self._db = None
+
+    def last_sync(self, project_key):
+        db = self._open()
+        if not db:
+            return None
+        row = db.execute('SELECT last_sync FROM projects WHERE project = ?', (project_key,)).fetchone()
+        if not row:
+            return None
+        return row[0]
+
+    def last_updated(self, project_key):
+        """Most recent 'updated' timestamp (as sent by the server) of
+        any mirrored issue in a project, or None"""
+        db = self._open()
+        if not db:
+            return None
+        row = db.execute('SELECT max(updated) FROM issues WHERE project = ?', (project_key,)).fetchone()
+        return row[0]
+
+    def fresh(self, project_key):
+        """Determine whether a project's mirror is recent enough to be
+        used in place of the server"""
+        if not self.max_age:
+            return False
+        last = self.last_sync(project_key)
+        if last is None:
+            return False
+        return time.time() - last <= float(self.max_age)
+
+    def store(self, raw_issues):
+        """Insert or replace a set of raw issues (e.g. Issue.raw)"""
+        db = self._open(create=True)
+        for raw in raw_issues:
+            fields = raw['fields']
+            issue_id = int(raw['id'])
+            status = fields.get('status') or {}
+            db.execute('INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       (issue_id, raw['key'], fields['project']['key'], fields.get('updated'),
+                        _user_id(fields.get('assignee')), status.get('name'),
+                        (status.get('statusCategory') or {}).get('name'), json.dumps(raw)))
+            db.execute('DELETE FROM issue_text WHERE rowid = ?', (issue_id,))
+            db.execute('INSERT INTO issue_text (rowid, summary, description, comments) VALUES (?, ?, ?, ?)',
+                       (issue_id, fields.get('summary') or '', fields.get('description') or '', _comment_text(fields)))
+        db.commit()
+
+    def forget(self, project_key):
+        """Drop all local data for a project"""
+        db = self._open()
+        if not db:
+            return
+        db.execute('DELETE FROM issue_text WHERE rowid IN (SELECT id FROM issues WHERE project = ?)', (project_key,))
+        db.execute('DELETE FROM issues WHERE project = ?', (project_key,))
+        db.execute('DELETE FROM projects WHERE project = ?', (project_key,))
+        db.commit()
+
+    def sync(self, jirate_obj, project_key, full=False):
+        """Bring the local copy of a project up to date
+
+        Parameters:
+          jirate_obj: Jirate (or JiraProject) to use for searching
+          project_key: Project to sync
+          full: Discard local data and reload everything
+
+        Returns:
+          number of issues retrieved
+        """
+        self._open(create=True)
+        if full:
+            self.forget(project_key)
+        started = time.time()
+        newest = self.last_updated(project_key)
+
+        query = f'project = {project_key}'
+        if newest:
+            time_zone = (getattr(jirate_obj, 'user', None) or {}).get('timeZone')
+            query = query + f' AND updated >= "{_jql_since(newest, time_zone)}"'
+        query = query + ' ORDER BY updated ASC'
+
+        count = 0
+        for issues in jirate_obj.iter_search(query):
+            self.store([issue.raw for issue in issues])
+            count = count + len(issues)
+
+        self._db.execute('INSERT OR REPLACE INTO projects VALUES (?, ?)', (project_key, started))
+        self._db.commit()
+        return count
+
+    def issue(self, key):
+        """Retrieve the raw data of one issue, or None"""
+        db = self._open()
+        if not db:
+            return None
+        row = db.execute('SELECT raw FROM issues WHERE key = ?', (key,)).fetchone()
+        if not row:
+            return None
+        return json.loads(row[0])
+
+    def issues(self, projects):
+        """Iterate over the raw data of every issue in a set of projects"""
+        db = self._open()
+        if not db:
+            return
+        query = 'SELECT raw FROM issues WHERE project IN (' + ', '.join(['?'] * len(projects)) + ')'
+        for row in db.execute(query, list(projects)):
+            yield json.loads(row[0])
+
+    def _match(self, db, text, projects, limit):
+        query = '''SELECT issues.raw FROM issue_text JOIN issues ON issues.id = issue_text.rowid
+                    WHERE issue_text MATCH ?'''
+        params = [text]
+        if projects:
+            query = query + ' AND issues.project IN (' + ', '.join(['?'] * len(projects)) + ')'
+            params.extend(projects)
+        query = query + f' ORDER BY {_rank} LIMIT ?'
+        params.append(limit)
+        return db.execute(query, params).fetchall()
+
+    def search(self, text, projects=None, limit=500):
+        """Full-text search, best matches first
+
+        Parameters:
+          text: FTS5 query; if it does not parse, each word is searched
+                for literally
+          projects: Optional list of project keys to restrict results to
+          limit: Maximum number of results
+
+        Returns:
+          list of raw issue data
+        """
+        db = self._open()
+        if not db:
+            return []
+        try:
+            rows = self._match(db, text, projects, limit)
+        except sqlite3.OperationalError:
+            quoted = ' '.join(['"' + word.replace('"', '""') + '"' for word in text.split()])
+            rows = self._match(db, quoted, projects, limit)
+        return [json.loads(row[0]) for row in rows]
+
+    def list(self, project_key, userid=None, status=None):
+        """Local equivalent of JiraProject.list()
+
+        Parameters:
+          project_key: Project to list
+          userid: Assignee name/account ID, or None for unassigned issues
+          status: Status name or ID; if not specified, all issues not in
+                  the 'Done' status category are returned
+
+        Returns:
+          list of raw issue data
+        """
+        db = self._open()
+        if not db:
+            return []
+        query = 'SELECT raw, status FROM issues WHERE project = ?'
+        params = [project_key]
+        if userid is None:
+            query = query + ' AND assignee IS NULL'
+        else:
+            query = query + ' AND assignee = ?'
+            params.append(userid)
+        if not status:
+            query = query + " AND (status_category IS NULL OR status_category != 'Done')"
+        query = query + ' ORDER BY updated DESC'
+
+        ret = []
+        for row in db.execute(query, params):
+            raw = json.loads(row[0])
+            if status and nym(row[1]) != nym(status) and raw['fields']['status'].get('id') != str(status):
+                continue
+            ret.append(raw)
+        return ret
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+#
+# Project metadata bundles
+#
+# A project's statuses, issue types, components, versions, creation
+# metadata and boards/sprints are each a GET (or several) which used to
+# be made up front or on every use.  They are kept here, per project,
+# as raw JSON "facets", each with the time it was retrieved:
+#
+#   'project'                 /project/KEY (issue types)
+#   'statuses'                /project/KEY/statuses
+#   'components'              /project/KEY/components
+#   'versions'                /project/KEY/versions
+#   ('createmeta', type ID)   creation metadata for one issue type
+#   ('editmeta', type ID)     edit metadata for one issue type
+#   ('sprints', states)       boards and their sprints in those states
+#
+# Nothing is retrieved until a facet is asked for, and each facet is
+# reused until it is older than its own maximum age, so commands which
+# never look at statuses don't pay for them, and sprints can be kept
+# for much less time than issue types.  The bundle is saved between
+# runs.
+#
+import time
+
+from jirate.localstate import PickledState
+
+default_project_meta_file = '~/.jirate.projects'
+
+# Seconds each facet may be reused for
+default_max_age = {
+    'project': 86400,
+    'statuses': 86400,
+    'components': 3600,
+    'versions': 3600,
+    'createmeta': 86400,
+    'editmeta': 86400,
+    'sprints': 600
+}
+
+
+def _facet_name(facet):
+    if isinstance(facet, tuple):
+        return facet[0]
+    return facet
+
+
+class ProjectMetadata(PickledState):
+    _version = 1
+
+    def __init__(self, filename=None, max_age=None):
+        """Raw metadata of the projects on one server
+
+        Parameters:
+          filename: Path to the saved bundle (default: ~/.jirate.projects)
+          max_age: Optional dict of facet name -> seconds, overriding
+                   default_max_age
+        """
+        self.max_age = dict(default_max_age, **(max_age or {}))
+        # (project key, facet) retrieved from the server by this process
+        self._retrieved = set()
+        super().__init__(filename, default_project_meta_file)
+
+    def _reset(self):
+        self._projects = {}
+
+    def _restore(self, data):
+        self._projects = data['projects']
+
+    def _state(self):
+        return {'projects': self._projects}
+
+    def fresh(self, project_key, facet):
+        """Whether a facet of a project may be used without asking the server"""
+        self._load()
+        entry = self._projects.get(project_key, {}).get(facet)
+        if entry is None:
+            return False
+        max_age = self.max_age.get(_facet_name(facet))
+        return not max_age or entry[0] + max_age > time.time()
+
+    def retrieved(self, project_key, facet):
+        """Whether a facet of a project was retrieved from the server
+        since this bundle was created, rather than read from the file"""
+        return (project_key, facet) in self._retrieved
+
+    def peek(self, project_key, facet):
+        """Retrieve a facet of a project if it is fresh, without ever
+        asking the server
+
+        Returns:
+          raw data, or None
+        """
+        if not self.fresh(project_key, facet):
+            return None
+        return self._projects[project_key][facet][1]
+
+    def put(self, project_key, facet, value):
+        """Record a facet of a project"""
+        self._load()
+        with self._lock:
+            self._projects.setdefault(project_key, {})[facet] = (time.time(), value)
+            self._dirty = True
+
+    def get(self, project_key, facet, fetch):
+        """Retrieve a facet of a project, calling fetch() to retrieve it
+        from the server if it is missing or too old
+
+        Parameters:
+          project_key: Project key
+          facet: Facet name, or (name, qualifier) tuple
+          fetch: Function returning the raw data for the facet
+
+        Returns:
+          raw data
+        """
+        if not self.fresh(project_key, facet):
+            self.put(project_key, facet, fetch())
+            self._retrieved.add((project_key, facet))
+        return self._projects[project_key][facet][1]
+
+    def invalidate(self, project_key, facet=None):
+        """Forget a facet of a project (default: all of them)"""
+        self._load()
+        with self._lock:
+            if project_key not in self._projects:
+                return
+            if facet is None:
+                del self._projects[project_key]
+            else:
+                self._projects[project_key].pop(facet, None)
+            self._dirty = True
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+#
+# Epic/feature hierarchy rollups
+#
+# Totals across everything below an issue: number of issues by status
+# category and by status, story points, and how much of it is done.
+# The hierarchy is fetched with graph.walk() - a couple of projected
+# searches per level - and the totals are accumulated locally.
+#
+# Results are cached with the queries which match the hierarchy (its
+# members and anything which might have been added under them) and
+# the most recent 'updated' of those.  A later rollup of the same issue
+# only asks the server for that, and reuses the totals if nothing has
+# changed.
+#
+from array import array
+
+from jirate.graph import walk, default_depth
+
+# Indices into Rollup.totals
+ISSUES, TODO, IN_PROGRESS, DONE, POINTS, POINTS_DONE = range(6)
+
+_categories = {'new': TODO, 'indeterminate': IN_PROGRESS, 'done': DONE}
+
+# Keys per query when checking whether a hierarchy has changed
+_stamp_chunk = 100
+
+
+def _points(value):
+    if isinstance(value, bool):
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Rollup(object):
+    def __init__(self, key, points_field=None):
+        """Totals for the issues below one issue
+
+        Attributes:
+          key: Issue key at the top of the hierarchy
+          points_field: Field ID summed as story points, or None
+          totals: array of counts and points; see ISSUES, TODO, ...
+          statuses: dict of status name -> index into status_counts
+          status_counts: array of issue counts by status
+          members: list of issue keys in the hierarchy, top first
+          queries: JQL matching the hierarchy and anything added to it
+          stamp: (most recent 'updated', count) for queries
+        """
+        self.key = key
+        self.points_field = points_field
+        self.totals = array('d', [0.0] * 6)
+        self.statuses = {}
+        self.status_counts = array('l')
+        self.members = []
+        self.queries = []
+        self.stamp = None
+
+    def add(self, fields):
+        """Account for one issue, given its raw fields"""
+        self.totals[ISSUES] += 1
+        status = fields.get('status') or {}
+        category = _categories.get((status.get('statusCategory') or {}).get('key'))
+        if category is not None:
+            self.totals[category] += 1
+        if status.get('name'):
+            idx = self.statuses.get(status['name'])
+            if idx is None:
+                idx = self.statuses[status['name']] = len(self.status_counts)
+                self.status_counts.append(0)
+            self.status_counts[idx] += 1
+        if self.points_field:
+            points = _points(fields.get(self.points_field))
+            self.totals[POINTS] += points
+            if category == DONE:
+                self.totals[POINTS_DONE] += points
+
+    def status_totals(self):
+        """list of (status name, count), largest first"""
+        ret = [(name, self.status_counts[idx]) for name, idx in self.statuses.items()]
+        return sorted(ret, key=lambda item: (-item[1], item[0]))
+
+    def percent_done(self):
+        if not self.totals[ISSUES]:
+            return 0.0
+        return 100.0 * self.totals[DONE] / self.totals[ISSUES]
+
+    def percent_points_done(self):
+        if not self.totals[POINTS]:
+            return 0.0
+        return 100.0 * self.totals[POINTS_DONE] / self.totals[POINTS]
+
+
+def _descendants(graph, key):
+    ret = []
+    seen = set([key])
+    stack = [key]
+    while stack:
+        for _, child in reversed(graph.edges.get(stack.pop(), [])):
+            if child not in seen:
+                seen.add(child)
+                ret.append(child)
+                stack.append(child)
+    return ret
+
+
+def _hierarchy_queries(jirate_obj, graph, members):
+    # Matches every member, and any issue since added as a child of one
+    ret = []
+    for start in range(0, len(members), _stamp_chunk):
+        chunk = members[start:start + _stamp_chunk]
+        keys = ', '.join(chunk)
+        clauses = [f'key in ({keys})', f'parent in ({keys})']
+        if not jirate_obj.jira._is_cloud:
+            for megalith in ('Epic', 'Feature'):
+                parents = [key for key in chunk if ((graph.nodes.get(key) or {}).get('issuetype') or {}).get('name') == megalith]
+                if parents and jirate_obj.field_to_id(f'{megalith} Link'):
+                    clauses.append(f'"{megalith} Link" in (' + ', '.join(parents) + ')')
+        ret.append(' OR '.join(clauses))
+    return ret
+
+
+def _stamp(jirate_obj, queries):
+    latest = None
+    count = 0
+    for query in queries:
+        updated, total = jirate_obj.latest_update(query)
+        if updated and (latest is None or updated > latest):
+            latest = updated
+        count = count + total
+    return (latest, count)
+
+
+def rollup(jirate_obj, keys, points_field=None, cache=None, depth=default_depth):
+    """Compute totals across the hierarchies below a set of issues
+
+    Parameters:
+      jirate_obj: Jirate (or JiraProject) to use for searching
+      keys: list of issue keys (typically epics or features)
+      points_field: Optional field ID to sum as story points
+      cache: Optional dict of issue key -> Rollup from earlier calls;
+             unchanged results are reused and new ones stored in it
+      depth: Maximum number of levels below each issue
+
+    Returns:
+      list of Rollup, in the same order as keys
+    """
+    keys = [jirate_obj._issue_key(key) for key in keys]
+    ret = {}
+    stale = []
+    for key in keys:
+        old = cache.get(key) if cache is not None else None
+        if old and old.points_field == points_field and _stamp(jirate_obj, old.queries) == old.stamp:
+            ret[key] = old
+        elif key not in stale:
+            stale.append(key)
+
+    if stale:
+        fields = ['updated']
+        if points_field:
+            fields.append(points_field)
+        graph = walk(jirate_obj, stale, depth=depth, follow=('children',), fields=fields)
+        for key in stale:
+            result = Rollup(key, points_field)
+            below = _descendants(graph, key)
+            for member in below:
+                result.add(graph.nodes.get(member) or {})
+            result.members = [key] + below
+            ret[key] = result
+            if cache is None:
+                continue
+
+            result.queries = _hierarchy_queries(jirate_obj, graph, result.members)
+            result.stamp = _stamp(jirate_obj, result.queries)
+            # Something changed while we were looking; don't keep it
+            fetched = [(graph.nodes.get(member) or {}).get('updated') or '' for member in result.members]
+            if result.stamp[0] and result.stamp[0] > max(fetched):
+                cache.pop(key, None)
+            else:
+                cache[key] = result
+
+    return [ret[key] for key in keys]
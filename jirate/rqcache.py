@@ -21,6 +21,7 @@
 #
 import os
 import re
+import threading
 import time
 import types
 
@@ -72,6 +73,8 @@ class RequestCache(object):
         self.cache_patterns = default_cache_patterns
         self.debug_reqs = {}
         self.user_breaks = {}
+        # Requests may be issued from worker threads (see jirate.workers)
+        self._lock = threading.RLock()
 
         self.session = session
         session.request = types.MethodType(_cached_request, self)
@@ -80,6 +83,10 @@ class RequestCache(object):
         self.load(filename)
 
     def _cache_read(self, method, url, args_dict=None):
+        with self._lock:
+            return self._cache_read_locked(method, url, args_dict)
+
+    def _cache_read_locked(self, method, url, args_dict):
         if method not in self.cached_reqs:
             return None
         if url not in self.cached_reqs[method]:
@@ -99,12 +106,13 @@ class RequestCache(object):
     def _dbg_request(self, method, url, **kwargs):
         if method in self.user_breaks and url in self.user_breaks[method]:
             raise Exception(f'User break @ {method} {url}')
-        if method not in self.debug_reqs:
-            self.debug_reqs[method] = {}
-        if url not in self.debug_reqs[method]:
-            self.debug_reqs[method][url] = {'count': 1}
-        else:
-            self.debug_reqs[method][url]['count'] += 1
+        with self._lock:
+            if method not in self.debug_reqs:
+                self.debug_reqs[method] = {}
+            if url not in self.debug_reqs[method]:
+                self.debug_reqs[method][url] = {'count': 1}
+            else:
+                self.debug_reqs[method][url]['count'] += 1
 
     def debug_dump(self):
         total = 0
@@ -130,11 +138,12 @@ class RequestCache(object):
         if not urlmatch:
             return
         expire = time.time() + float(self._expire_time)
-        if url not in self.cached_reqs[method]:
-            self.cached_reqs[method][url] = []
-        self.cached_reqs[method][url].append({'args': args_dict,
-                                              'expire': expire,
-                                              'value': value})
+        with self._lock:
+            if url not in self.cached_reqs[method]:
+                self.cached_reqs[method][url] = []
+            self.cached_reqs[method][url].append({'args': args_dict,
+                                                  'expire': expire,
+                                                  'value': value})
 
     def load(self, filename=None):
         if filename is None:
@@ -165,6 +174,10 @@ class RequestCache(object):
         return False
 
     def flush(self, clean_all=False):
+        with self._lock:
+            self._flush_locked(clean_all)
+
+    def _flush_locked(self, clean_all):
         for method in self.cached_reqs:
             if method == 'magic':
                 continue
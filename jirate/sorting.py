@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+#
+# Local sorting of issues
+#
+# Raw field values are a mix of strings, numbers, dates (as strings) and
+# JSON objects.  Comparing them directly either fails or gives silly
+# results (e.g. '10' < '9', or users ordered by account ID), so each
+# value is converted once into a typed sort key:
+#
+#   numbers          -> numbers
+#   dates/datetimes  -> POSIX timestamps
+#   issue keys       -> (project, number)
+#   users            -> display name
+#   priorities       -> position in the server's list of priorities, when
+#                       given (see priority_order()); otherwise name
+#   other objects    -> name or value
+#   lists            -> tuple of the keys of their items
+#
+# Issues with no value in a field always sort last.
+#
+import re
+from datetime import datetime, timezone
+
+_date_rx = re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}($|T)')
+_key_rx = re.compile(r'^([A-Z][A-Z0-9_]*)-([0-9]+)$')
+_number_rx = re.compile(r'^-?[0-9]+(\.[0-9]+)?$')
+
+# Keys of different types must never be compared with each other
+_number, _date, _issue_key, _string, _list = range(5)
+
+
+def parse_sort(spec):
+    """Parse a sort specification
+
+    Parameters:
+      spec: 'field[:desc],...' (asc is also accepted)
+
+    Returns:
+      list of (field name, descending)
+    """
+    ret = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, direction = item.partition(':')
+        direction = direction.strip().lower()
+        if direction not in ('', 'asc', 'desc'):
+            raise ValueError(f'Invalid sort direction for {name}: {direction}')
+        ret.append((name.strip(), direction == 'desc'))
+    return ret
+
+
+def parse_date(value):
+    """Convert a Jira date or datetime string to a POSIX timestamp, or None"""
+    if len(value) == 10:
+        return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+    for fmt in ('%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S%z'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            pass
+    return None
+
+
+def priority_order(priorities):
+    """Sort positions of priorities, for sort_key()
+
+    Parameters:
+      priorities: list of raw priority data as the server lists them
+                  (GET /priority; highest first)
+
+    Returns:
+      dict of priority ID -> position; like the server, ascending order
+      puts the lowest priority first
+    """
+    return dict([(str(prio['id']), len(priorities) - idx) for idx, prio in enumerate(priorities)])
+
+
+def sort_key(value, field_id=None, priorities=None):
+    """Convert a raw field value to a typed sort key; None if empty
+
+    Parameters:
+      value: Raw field value
+      field_id: Field ID the value came from
+      priorities: Optional sort positions from priority_order()
+    """
+    if value is None or value == '' or value == []:
+        return None
+    if isinstance(value, bool):
+        return (_number, int(value))
+    if isinstance(value, (int, float)):
+        return (_number, value)
+    if isinstance(value, list):
+        keys = [sort_key(item, field_id, priorities) for item in value]
+        return (_list, tuple([key for key in keys if key is not None]))
+    if isinstance(value, dict):
+        if field_id == 'priority' and priorities and str(value.get('id')) in priorities:
+            return (_number, priorities[str(value['id'])])
+        for attr in ('displayName', 'name', 'value', 'key'):
+            if value.get(attr):
+                return sort_key(value[attr])
+        return None
+
+    value = str(value)
+    if _number_rx.match(value):
+        return (_number, float(value))
+    if _date_rx.match(value):
+        stamp = parse_date(value)
+        if stamp is not None:
+            return (_date, stamp)
+    match = _key_rx.match(value)
+    if match:
+        return (_issue_key, (match.group(1), int(match.group(2))))
+    return (_string, value.lower())
+
+
+def _raw_value(issue, field_id):
+    raw = issue if isinstance(issue, dict) else issue.raw
+    if field_id in ('key', 'issuekey'):
+        return raw['key']
+    return raw['fields'].get(field_id)
+
+
+def sort_issues(issues, order, value_func=None, priorities=None):
+    """Sort issues locally
+
+    Parameters:
+      issues: list of jira.resources.Issue or raw issue data
+      order: list of (field ID, descending)
+      value_func: Optional function (issue, field ID) -> raw value
+      priorities: Optional sort positions from priority_order(); without
+                  them, priorities sort by name
+
+    Returns:
+      new list of issues
+    """
+    if not value_func:
+        value_func = _raw_value
+    issues = list(issues)
+    # Stable sorts, least significant field first
+    for field_id, descending in reversed(order):
+        keys = [sort_key(value_func(issue, field_id), field_id, priorities) for issue in issues]
+        present = [idx for idx in range(len(issues)) if keys[idx] is not None]
+        empty = [idx for idx in range(len(issues)) if keys[idx] is None]
+        present.sort(key=lambda idx: keys[idx], reverse=descending)
+        issues = [issues[idx] for idx in present + empty]
+    return issues
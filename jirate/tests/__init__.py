@@ -1,7 +1,10 @@
 #!/usr/bin/env python
 
+import re
+
 from jira.client import JIRA
-from jira.resources import Issue, dict2resource, Project
+from jira.exceptions import JIRAError
+from jira.resources import Issue, dict2resource, Priority, Project
 from jirate.args import GenericArgs
 from jirate.decor import pretty_print
 
@@ -947,6 +950,7 @@ class fake_jira_session():
     def __init__(self):
         self.get_urls = []
         self.post_urls = {}
+        self.put_urls = {}
         self.delete_urls = []
 
     def get(self, url):
@@ -956,6 +960,12 @@ class fake_jira_session():
 
     def post(self, url, data=None):
         self.post_urls[url] = data
+        if url.endswith('/issue/bulk'):
+            # Not here; issues are created one at a time with create_issue()
+            raise JIRAError(status_code=404)
+
+    def put(self, url, data=None):
+        self.put_urls[url] = data
 
     def delete(self, url):
         self.delete_urls.append(url)
@@ -967,15 +977,26 @@ class fake_jira_session():
         self.__init__()
 
 
+# As GET /priority lists them: highest first
+fake_priorities = [{'id': '101', 'name': 'Blocker'},
+                   {'id': '102', 'name': 'Critical'},
+                   {'id': '103', 'name': 'Major'},
+                   {'id': '104', 'name': 'Normal'},
+                   {'id': '105', 'name': 'Minor'}]
+
+
 class fake_jira(JIRA):
     def __init__(self, **kwargs):
         self._fields_cache_value = {}
         self.deploymentType = 'Server'
         self._version = (9, 0, 0)
         self._options = {'async': False}
+        self.searches = []
+        self.fetched = []
+        self.created = {}
 
     def _get_url(self, url_fragment, **args):
-        pass
+        return f'https://domain.com/rest/api/2/{url_fragment}'
 
     def _get_json(self, url_fragment, **args):
         pass
@@ -989,22 +1010,33 @@ class fake_jira(JIRA):
     def fields(self):
         return fake_fields
 
-    def search_issues(self, seach_query, startAt=None, maxResults=None):
-        pass
+    def search_issues(self, seach_query, startAt=None, maxResults=None, **kwargs):
+        # Only 'key in (...)' is understood here
+        self.searches.append(seach_query)
+        match = re.match(r'key in \((.*)\)$', seach_query)
+        if not match:
+            return []
+        keys = [key.strip() for key in match.group(1).split(',')]
+        ret = [self.issue(key) for key in keys if key in fake_issues]
+        return ret[startAt or 0:]
 
-    def create_issue(self, **args):
+    def create_issue(self, prefetch=True, **args):
         global testx
 
         ret = GenericArgs()
         proj = args['project']
+        if isinstance(proj, dict):
+            proj = proj['key']
         ret.key = f'{proj}-{testx}'
         testx = testx + 1
         ret.raw = {'fields': args}
         ret.raw['fields']['project'] = {'key': proj}
         pretty_print(ret)
+        self.created[ret.key] = ret
         return ret
 
     def issue(self, issue_key):
+        self.fetched.append(issue_key)
         if issue_key.upper() not in fake_issues:
             return None
         ret = Issue(None, None)
@@ -1027,6 +1059,9 @@ class fake_jira(JIRA):
     def delete_issue_link(self, left_key, right_key):
         pass
 
+    def priorities(self):
+        return [Priority(self._options, None, raw=prio) for prio in fake_priorities]
+
     def project(self, project_key):
         ret = Project({'server': 'issues.pie.com', 'rest_path': 'rest/api/2', 'rest_api_version': 2, 'async': False}, None)
         ret.raw = fake_project
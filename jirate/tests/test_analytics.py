@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+import random
+
+from jirate.analytics import percentile, Histogram, StatusDurations, time_in_status
+from jirate.jboard import JiraProject
+from jirate.sorting import parse_date
+from jirate.tests import fake_jira, fake_issues
+
+import pytest  # NOQA
+
+
+_day = 86400.0
+
+
+def _change(when, from_status, to_status):
+    return {'created': when, 'items': [{'field': 'assignee', 'fromString': None, 'toString': 'rory'},
+                                       {'field': 'status', 'fromString': from_status, 'toString': to_status}]}
+
+
+def _issue(created, status, changes, resolved=None):
+    return {'key': 'A-1', 'fields': {'created': created, 'status': {'name': status}, 'resolutiondate': resolved},
+            'changelog': {'histories': changes, 'total': len(changes)}}
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([4.0], 95) == 4.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0) == 1.0
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    histogram.add(4.0)
+    assert histogram.percentile(95) == 4.0
+
+    # Within half a bucket of the exact answer, however many values
+    rng = random.Random(1)
+    values = [rng.expovariate(1 / (3 * _day)) for _ in range(20000)] + [0.0, 0.5]
+    for value in values:
+        histogram.add(value)
+    values.append(4.0)
+    ordered = sorted(values)
+    assert histogram.count == len(values)
+    assert histogram.mean() == pytest.approx(sum(values) / len(values))
+    for pct in (1, 50, 85, 95, 99):
+        assert histogram.percentile(pct) == pytest.approx(percentile(ordered, pct), rel=0.01)
+    assert histogram.percentile(0) == 0.0
+    assert histogram.percentile(100) == ordered[-1]
+    # Durations beyond the last bucket are still counted
+    histogram.add(1e12)
+    assert histogram.percentile(100) == 1e12
+
+
+def test_status_durations():
+    now = parse_date('2024-01-11T00:00:00.000+0000')
+    durations = StatusDurations(now)
+    # Out of order on purpose; resolved issues stop counting at the last change
+    durations.add(_issue('2024-01-01T00:00:00.000+0000', 'Done',
+                         [_change('2024-01-05T00:00:00.000+0000', 'In Progress', 'Done'),
+                          _change('2024-01-02T00:00:00.000+0000', 'New', 'In Progress')],
+                         resolved='2024-01-05T00:00:00.000+0000'))
+    durations.add(_issue('2024-01-01T00:00:00.000+0000', 'In Progress',
+                         [_change('2024-01-03T00:00:00.000+0000', 'New', 'In Progress')]))
+    durations.add(_issue('2024-01-10T00:00:00.000+0000', 'New', []))
+
+    assert durations.issues == 3
+    new = durations.durations[durations.statuses['New']]
+    assert (new.count, new.total, new.low, new.high) == (3, 4 * _day, 1 * _day, 2 * _day)
+    in_progress = durations.durations[durations.statuses['In Progress']]
+    assert (in_progress.count, in_progress.low, in_progress.high) == (2, 3 * _day, 8 * _day)
+    assert 'Done' not in durations.statuses
+    assert (durations.cycle_times.count, durations.cycle_times.total) == (1, 3 * _day)
+    assert (durations.lead_times.count, durations.lead_times.total) == (1, 4 * _day)
+
+    summary = durations.summary((50,))
+    assert [row[0] for row in summary] == ['New', 'In Progress', 'Cycle time', 'Lead time']
+    assert summary[0][1:] == (3, 4 * _day / 3, [pytest.approx(1 * _day, rel=0.01)])
+    assert summary[1][3] == [pytest.approx(5.5 * _day, rel=0.01)]
+    assert summary[2][1:] == (1, 3 * _day, [3 * _day])
+
+
+def test_time_in_status_streamed(monkeypatch):
+    monkeypatch.setitem(fake_issues['TEST-1'], 'changelog', {'histories': [_change('2023-08-03T11:28:48.366+0000', 'New', 'In Progress')], 'total': 1})
+    project = JiraProject(fake_jira(), 'TEST', readonly=True)
+    durations = time_in_status(project, 'key in (TEST-1, TEST-2)', now=parse_date('2023-08-03T12:28:48.366+0000'))
+    assert durations.issues == 2
+    assert durations.durations[durations.statuses['New']].total == 3600.0 + 7200.0
+    assert durations.durations[durations.statuses['In Progress']].total == 3600.0
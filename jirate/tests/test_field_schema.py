@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+import copy
+
+from jirate.field_schema import FieldSchema, load_schema
+from jirate.jboard import _check_fields
+from jirate.tests import fake_fields, fake_issues
+
+import pytest  # NOQA
+
+
+def test_field_schema_maps():
+    schema = FieldSchema(copy.deepcopy(fake_fields))
+    assert schema.field_to_id['Fixed in Build'] == 'customfield_1234567'
+    assert schema.field_to_id['fixed_in_build'] == 'customfield_1234567'
+    assert schema.field_to_alias['customfield_1234567'] == 'fixed_in_build'
+    assert schema.field_to_human['parent'] == 'Parent'
+    assert schema.nyms['fixversions'] == 'fixVersions'
+    assert schema.renderers['components'] == 'array'
+    assert schema.renderers['customfield_1234570'] == 'name_list'
+    assert schema.renderers['customfield_10390940'] == 'com.pyxis.greenhopper.jira:gh-sprint'
+    assert schema.renderers['priority'] == 'string'
+
+
+def test_field_schema_snapshot(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'schema')
+    fields = copy.deepcopy(fake_fields)
+    schema = load_schema(fields, filename)
+    assert schema.fields is fields
+
+    # Same /field data: nothing is rebuilt
+    built = []
+    monkeypatch.setattr('jirate.field_schema.FieldSchema._builtin', lambda self, *args: built.append(args))
+    fields = copy.deepcopy(fake_fields)
+    saved = load_schema(fields, filename)
+    assert built == []
+    assert saved.fields is fields
+    assert saved.field_to_id == schema.field_to_id
+    assert saved.renderers == schema.renderers
+
+    # A new field means a new snapshot
+    monkeypatch.undo()
+    fields.append({'id': 'customfield_9999', 'name': 'New Field', 'clauseNames': ['cf[9999]', 'New Field'], 'schema': {'type': 'string'}})
+    schema = load_schema(fields, filename)
+    assert schema.field_to_id['new_field'] == 'customfield_9999'
+    assert load_schema(fields, filename).digest == schema.digest
+
+
+def test_check_fields_schema():
+    schema = FieldSchema(copy.deepcopy(fake_fields))
+    issue = type('issue', (), {'raw': {'fields': dict(fake_issues['TEST-1']['fields'], someField='x')}})
+    assert _check_fields(issue, 'FixVersions', schema) == 'fixVersions'
+    assert _check_fields(issue, 'somefield', schema) == 'someField'
+    assert _check_fields(issue, 'nothing', schema) is None
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+from jirate.graph import walk, IssueGraph
+from jirate.jboard import JiraProject
+from jirate.tests import fake_jira, fake_issues
+
+import pytest  # NOQA
+
+
+def _link(direction, key, outward='blocks', inward='is blocked by'):
+    return {'type': {'name': 'Blocks', 'outward': outward, 'inward': inward},
+            direction: {'key': key, 'fields': {'summary': fake_issues[key]['fields']['summary'],
+                                               'status': fake_issues[key]['fields']['status']}}}
+
+
+def test_graph_links_by_level(monkeypatch):
+    monkeypatch.setitem(fake_issues['TEST-1']['fields'], 'issuelinks', [_link('outwardIssue', 'TEST-2')])
+    monkeypatch.setitem(fake_issues['TEST-2']['fields'], 'issuelinks', [_link('inwardIssue', 'TEST-1'), _link('outwardIssue', 'TEST-3')])
+    jira = fake_jira()
+    jira.searches = []
+    proj = JiraProject(jira, 'TEST', readonly=True)
+
+    graph = walk(proj, ['test-1'])
+    assert graph.edges['TEST-1'] == [('blocks', 'TEST-2')]
+    assert graph.edges['TEST-2'] == [('is blocked by', 'TEST-1'), ('blocks', 'TEST-3')]
+    assert graph.depth == {'TEST-1': 0, 'TEST-2': 1, 'TEST-3': 2}
+    assert graph.cycles() == set([('TEST-2', 'TEST-1')])
+    # One search per level, not one request per issue
+    assert jira.searches == ['key in (TEST-1)', 'key in (TEST-2)', 'key in (TEST-3)']
+
+    # Linked issues on the last level are drawn from what the links say
+    jira.searches = []
+    graph = walk(proj, ['TEST-1'], depth=1)
+    assert jira.searches == ['key in (TEST-1)']
+    assert graph.nodes['TEST-2']['summary'] == 'Test 1'
+    assert 'TEST-3' not in graph.depth
+
+
+def test_graph_children_and_parents():
+    proj = JiraProject(fake_jira(), 'TEST', readonly=True)
+    graph = walk(proj, ['TEST-3'], follow=('children',))
+    assert graph.edges == {'TEST-3': [('subtask', 'TEST-4')]}
+
+    graph = walk(proj, ['TEST-4'], follow=('parents',))
+    assert graph.edges == {'TEST-4': [('parent', 'TEST-3')]}
+
+    with pytest.raises(ValueError):
+        walk(proj, ['TEST-4'], follow=('siblings',))
+
+
+def test_graph_dot():
+    graph = IssueGraph(['A-1'])
+    graph.depth = {'A-1': 0, 'A-2': 1}
+    graph.nodes = {'A-1': {'summary': 'Say "hi"', 'status': {'name': 'New'}}}
+    graph.add_edge('A-1', 'blocks', 'A-2')
+    graph.add_edge('A-1', 'blocks', 'A-2')
+    graph.add_edge('A-2', 'is blocked by', 'A-1')
+    assert graph.dot() == '\n'.join(['digraph issues {',
+                                     '  node [shape=box];',
+                                     '  "A-1" [label="A-1\\nSay \\"hi\\"\\n[New]", style=bold];',
+                                     '  "A-2" [label="A-2"];',
+                                     '  "A-1" -> "A-2" [label="blocks"];',
+                                     '  "A-2" -> "A-1" [label="is blocked by", color=red];',
+                                     '}'])
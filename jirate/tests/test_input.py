@@ -2,8 +2,8 @@
 
 from jirate.args import GenericArgs
 from jirate.tests import fake_metadata, fake_fields
-from jirate.jira_input import transmogrify_input, setup_input
-from jirate.jira_input import check_value, allowed_value_validate, in_owc
+from jirate.jira_input import transmogrify_input, setup_input, input_renderers
+from jirate.jira_input import check_value, allowed_value_validate, in_owc, input_plan, AllowedValues
 
 import os
 import time
@@ -294,3 +294,63 @@ def test_avv_multiple():
     allowed_values = fake_fields[3]['allowedValues']  # components
 
     assert allowed_value_validate('components', ['fuzzy', 'python'], allowed_values) == ['fuzzy match', 'python']
+
+
+def test_trans_per_server_renderers():
+    # Data Center and Cloud connections coexist without touching the defaults
+    dc = GenericArgs()
+    dc._is_cloud = False
+    cloud = GenericArgs()
+    cloud._is_cloud = True
+    dc_renderers = input_renderers(dc)
+    cloud_renderers = input_renderers(cloud)
+
+    inp = {'User Value': 'user1', 'array_of_users': 'user1,user2'}
+    assert transmogrify_input(fake_metadata, dc_renderers, **inp) == ({'customfield_1234580': {'name': 'user1'},
+                                                                      'customfield_1234571': [{'name': 'user1'}, {'name': 'user2'}]}, {})
+    assert transmogrify_input(fake_metadata, cloud_renderers, **inp) == ({'customfield_1234580': {'accountId': 'user1'},
+                                                                         'customfield_1234571': [{'accountId': 'user1'}, {'accountId': 'user2'}]}, {})
+    assert transmogrify_input(fake_metadata, **{'User Value': 'user1'}) == ({'customfield_1234580': {'accountId': 'user1'}}, {})
+
+
+def test_input_plan_reused():
+    renderers = input_renderers(GenericArgs())
+    plan = input_plan(fake_metadata, renderers)
+    assert input_plan(fake_metadata, renderers) is plan
+    # Other renderers, or other definitions, get their own
+    assert input_plan(fake_metadata, input_renderers(GenericArgs())) is not plan
+    definitions = dict(fake_metadata)
+    other = input_plan(definitions, renderers)
+    assert other is not plan
+
+    assert plan.apply(option_value='one') == ({'customfield_1234578': {'value': 'One'}}, {})
+    converter = plan.converters['customfield_1234578']
+    assert plan.apply(option_value='two', nonexistent='x') == ({'customfield_1234578': {'value': 'Two'}}, {'nonexistent': 'x'})
+    assert plan.converters['customfield_1234578'] is converter
+
+    # Edited definitions are noticed
+    del definitions['customfield_1234578']
+    assert input_plan(definitions, renderers) is not other
+    assert input_plan(definitions, renderers).apply(option_value='one') == ({}, {'option_value': 'one'})
+
+    # ... even when the number of fields stays the same
+    other = input_plan(definitions, renderers)
+    definitions['customfield_1234578'] = definitions.pop('customfield_1234579')
+    assert input_plan(definitions, renderers) is not other
+
+
+def test_allowed_values_index():
+    allowed_values = [{'id': idx, 'name': f'Component {idx}'} for idx in range(2000)]
+    allowed_values.extend([{'name': 'Foo-Bar baz'}, {'name': 'old', 'archived': True}])
+    index = AllowedValues(allowed_values)
+
+    assert index.match('component 1234') == (['Component 1234'], True)
+    assert index.match('bar baz') == (['Foo-Bar baz'], False)
+    assert index.match('old') == ([], False)
+    # Every value has this token
+    assert len(index.match('component')[0]) == 2000
+    assert allowed_value_validate('components', ['Component 7', 'foo'], index) == ['Component 7', 'Foo-Bar baz']
+    with pytest.raises(ValueError):
+        allowed_value_validate('components', 'component', index)
+    with pytest.raises(ValueError):
+        allowed_value_validate('components', '12345', index)
@@ -2,18 +2,23 @@
 
 from jirate.tests import fake_jira, fake_metadata, fake_fields
 from jirate.args import GenericArgs
-from jirate.jira_cli import _parse_creation_args, _create_from_template, _generate_template, \
-    _sort_template_fields, validate_template, parse_user_glyph
+from jirate.jira_cli import _parse_creation_args, _create_from_template, _generate_template, _generate_templates, \
+    _sort_template_fields, validate_template, parse_user_glyph, _fan_out, _project_query, _search_projects, _graph_matrix, \
+    issue_fields, search_jira, server_projects, create_parser, _reconcile_matches
 from jirate.jboard import JiraProject
+from jirate.graph import walk, relation_kinds
 from jirate.jira_fields import apply_field_renderers
 
 import pytest  # NOQA
+from argparse import Namespace
 import types
 from jsonschema.exceptions import ValidationError
 from pathlib import Path
 
 
 fake_jirate = JiraProject(fake_jira(), 'TEST', closed_status='Done', allow_code=True)
+# Create issues in order, so their keys are predictable
+fake_jirate.max_workers = 1
 
 # These are used in the template tests below
 args = GenericArgs()
@@ -153,7 +158,7 @@ def test_create_from_template_simple():
 
     issue = _create_from_template(args, template)
     assert issue == [{'parent': 'TEST-1'}]
-    issue = fake_jirate.issue('TEST-1')
+    issue = fake_jirate.jira.created['TEST-1']
     assert issue == {'key': 'TEST-1', 'raw': {'fields': {'description': 'Description', 'issuetype': 'Task', 'project': {'key': 'TEST'}, 'summary': 'whatever'}}}
 
 
@@ -168,7 +173,7 @@ def test_create_from_template_customfield():
 
     issue = _create_from_template(args, template)
     assert issue == [{'parent': 'TEST-2'}]
-    issue = fake_jirate.issue('TEST-2')
+    issue = fake_jirate.jira.created['TEST-2']
     assert issue == {'key': 'TEST-2', 'raw': {'fields': {'description': 'Test of custom field transmogrify', 'issuetype': 'Task', 'customfield_1234567': 'abc123', 'project': {'key': 'TEST'}, 'summary': 'custom field test'}}}
 
 
@@ -183,8 +188,8 @@ def test_create_from_template_subtasks():
 
     _create_from_template(args, template)
     # Creates TEST-3 and TEST-4
-    assert fake_jirate.issue('TEST-3') == {'key': 'TEST-3', 'raw': {'fields': {'issuetype': 'Task', 'project': {'key': 'TEST'}, 'summary': 'Sub Tasks Check'}}}
-    assert fake_jirate.issue('TEST-4') == {'key': 'TEST-4', 'raw': {'fields': {'issuetype': 'Sub-task', 'parent': {'key': 'TEST-3'}, 'project': {'key': 'TEST'}, 'summary': 'Child Task'}}}
+    assert fake_jirate.jira.created['TEST-3'] == {'key': 'TEST-3', 'raw': {'fields': {'issuetype': 'Task', 'project': {'key': 'TEST'}, 'summary': 'Sub Tasks Check'}}}
+    assert fake_jirate.jira.created['TEST-4'] == {'key': 'TEST-4', 'raw': {'fields': {'issuetype': 'Sub-task', 'parent': {'key': 'TEST-3'}, 'project': {'key': 'TEST'}, 'summary': 'Child Task'}}}
 
 
 def test_create_from_template_multiple_types():
@@ -201,9 +206,108 @@ def test_create_from_template_multiple_types():
 
     _create_from_template(args, template)
     # Creates TEST-5 and TEST-6
-    assert fake_jirate.issue('TEST-5') == {'key': 'TEST-5', 'raw': {'fields': {'issuetype': 'Task', 'project': {'key': 'TEST'}, 'summary': 'Multitype1'}}}
-    assert fake_jirate.issue('TEST-6') == {'key': 'TEST-6', 'raw': {'fields': {'issuetype': 'Bug', 'project': {'key': 'TEST'}, 'summary': 'Multitype2'}}}
-    assert fake_jirate.issue('TEST-7') == {'key': 'TEST-7', 'raw': {'fields': {'issuetype': 'Sub-task', 'project': {'key': 'TEST'}, 'parent': {'key': 'TEST-6'}, 'summary': 'Bug Subtask'}}}
+    assert fake_jirate.jira.created['TEST-5'] == {'key': 'TEST-5', 'raw': {'fields': {'issuetype': 'Task', 'project': {'key': 'TEST'}, 'summary': 'Multitype1'}}}
+    assert fake_jirate.jira.created['TEST-6'] == {'key': 'TEST-6', 'raw': {'fields': {'issuetype': 'Bug', 'project': {'key': 'TEST'}, 'summary': 'Multitype2'}}}
+    assert fake_jirate.jira.created['TEST-7'] == {'key': 'TEST-7', 'raw': {'fields': {'issuetype': 'Sub-task', 'project': {'key': 'TEST'}, 'parent': {'key': 'TEST-6'}, 'summary': 'Bug Subtask'}}}
+
+
+def test_reconcile_template(monkeypatch):
+    jira = fake_jirate.jira
+    jira._session.reset()
+    jira.created = {}
+    monkeypatch.setattr(jira._session, 'get', lambda url: {'fields': fake_metadata})
+    template = {'issues': [
+                {'key': 'TEST-1',
+                 'summary': 'Test 1',
+                 'issuetype': 'Bug',
+                 'description': 'Test Description 1'},
+                {'key': 'TEST-3',
+                 'summary': 'Test 3 (parent task)',
+                 'issuetype': 'Bug',
+                 'description': 'New description',
+                 'subtasks': [
+                     {'summary': 'Test 4 (subtask of Test 3)'},
+                     {'summary': 'Another subtask'}
+                 ]}]}
+    reconcile_args = GenericArgs()
+    reconcile_args.project = fake_jirate
+    reconcile_args.reconcile = True
+
+    filed = _create_from_template(reconcile_args, template)
+    assert filed[0] == {'parent': 'TEST-1', 'existing': True}
+    assert filed[1]['parent'] == 'TEST-3' and filed[1]['updated'] == ['description']
+    # Both found with one search; only what changed is sent
+    assert jira.searches[-1] == 'key in (TEST-1, TEST-3)'
+    assert jira._session.put_urls == {'https://domain.com/rest/api/2/issue/1000003': {'update': {'description': [{'set': 'New description'}]}}}
+    # The subtask which was already there is left alone
+    assert [issue.raw['fields']['summary'] for issue in jira.created.values()] == ['Another subtask']
+    assert filed[1]['subtasks'] == list(jira.created)
+
+
+class reconcile_searcher(object):
+    # Returns canned issues for each search, newest last
+    def __init__(self, results, moved=None):
+        self.results = results
+        self.moved = moved or {}
+        self.queries = []
+
+    def _issue_key(self, key):
+        return key.upper()
+
+    def search_issues(self, query, fields=None):
+        self.queries.append(query)
+        return self.results.pop(0) if self.results else []
+
+    def issue(self, key):
+        return self.moved.get(key)
+
+
+def _existing(key, summary, project='TEST', subtask=False):
+    return Namespace(key=key, raw={'fields': {'summary': summary, 'project': {'key': project}, 'issuetype': {'subtask': subtask}}})
+
+
+def test_reconcile_matches_moved_key():
+    moved = _existing('OTHER-9', 'Test 2', project='OTHER')
+    searcher = reconcile_searcher([[_existing('TEST-1', 'Test 1'), moved]], moved={'TEST-2': moved})
+    wanted = [({'key': 'test-1', 'summary': 'Test 1'}, 'TEST'),
+              ({'key': 'TEST-2', 'summary': 'Test 2'}, 'TEST'),
+              ({'key': 'TEST-3', 'summary': 'Gone'}, 'TEST')]
+    ret = _reconcile_matches(searcher, wanted)
+    assert searcher.queries == ['key in (TEST-1, TEST-2, TEST-3)']
+    assert {idx: issue.key for idx, issue in ret.items()} == {0: 'TEST-1', 1: 'OTHER-9'}
+
+
+def test_reconcile_matches_summary():
+    wanted = [({'summary': f'Issue {idx} '}, 'TEST') for idx in range(25)]
+    found = [_existing('TEST-1', 'Issue 0'),
+             # Only similar, not the same
+             _existing('TEST-2', 'Issue 1 again'),
+             # Subtasks are never top-level template issues
+             _existing('TEST-3', 'Issue 2', subtask=True),
+             # Oldest first: the first of two matches wins
+             _existing('TEST-4', 'Issue 3'),
+             _existing('TEST-5', 'Issue 3'),
+             # Same summary, other project
+             _existing('OTHER-1', 'Issue 4', project='OTHER')]
+    searcher = reconcile_searcher([found, [_existing('TEST-6', 'Issue 24')]])
+    ret = _reconcile_matches(searcher, wanted)
+
+    # 20 summaries per search
+    assert len(searcher.queries) == 2
+    assert searcher.queries[0].startswith('(project = "TEST" AND summary ~ "Issue 0") OR (project = "TEST" AND summary ~ "Issue 1") OR ')
+    assert searcher.queries[0].count('summary ~') == 20
+    assert searcher.queries[1].count('summary ~') == 5
+    assert searcher.queries[1].endswith(' ORDER BY created ASC')
+    assert {idx: issue.key for idx, issue in ret.items()} == {0: 'TEST-1', 3: 'TEST-4', 24: 'TEST-6'}
+
+
+def test_reconcile_matches_marker():
+    wanted = [({'summary': 'Say "hi"'}, 'TEST'), ({'summary': 'Other'}, 'TEST')]
+    searcher = reconcile_searcher([[_existing('TEST-7', 'Say "hi"'), _existing('TEST-8', 'Unrelated')]])
+    ret = _reconcile_matches(searcher, wanted, marker='from-template')
+    # One search for everything with the label, whatever the summaries
+    assert searcher.queries == ['labels = "from-template" ORDER BY created ASC']
+    assert {idx: issue.key for idx, issue in ret.items()} == {0: 'TEST-7'}
 
 
 def test_generate_template_simple():
@@ -256,6 +360,19 @@ def test_generate_template_subtasks():
     assert actual == generated
 
 
+def test_generate_templates_batched():
+    proj = JiraProject(fake_jira(), 'TEST', readonly=True)
+    generated = list(_generate_templates(proj, 'key in (TEST-1, TEST-3)'))
+    assert [key for key, _ in generated] == ['TEST-1', 'TEST-3']
+    assert generated[1][1]['sub_tasks'] == [{'summary': 'Test 4 (subtask of Test 3)', 'issue_type': 'Sub-task', 'priority': 'Normal'}]
+    # One search for the issues, one for all of their subtasks
+    assert proj.jira.searches == ['key in (TEST-1, TEST-3)', 'key in (TEST-4)']
+    assert proj.jira.fetched == ['TEST-1', 'TEST-3', 'TEST-4']
+
+    # Subtasks on their own are left out on request
+    assert [key for key, _ in _generate_templates(proj, 'key in (TEST-3, TEST-4)', subtasks=False)] == ['TEST-3']
+
+
 def test_sort_template_fields_parent():
     actual = {'issue_type': 'Bug',
               'summary': 'Test 4 (parent task)',
@@ -321,3 +438,179 @@ def test_parse_user_glyph_dc():
 def test_parse_user_glyph_cloud():
     assert parse_user_glyph('~accoundid:abcde:uuid') == 'abcde:uuid'
     assert parse_user_glyph('[~accountid:abcde:uuid]') == 'abcde:uuid'
+
+
+def test_project_query():
+    assert _project_query('TEST', 'assignee = bob') == 'project = TEST AND (assignee = bob)'
+    assert _project_query('TEST', 'labels = x order by rank') == 'project = TEST AND (labels = x) ORDER BY rank'
+    assert _project_query('TEST', 'ORDER BY created DESC') == 'project = TEST ORDER BY created DESC'
+
+
+def test_fan_out_projects():
+    proj = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    proj.project_keys = ['TEST', 'OTHER']
+    fan_args = GenericArgs()
+    fan_args.project = proj
+    fan_args.fields = 'summary:20'
+
+    def _search(project):
+        if project.project_name == 'TEST':
+            return [project.issue('TEST-1')]
+        # Siblings share the session, field maps and issue cache
+        assert project._field_to_id is proj._field_to_id
+        assert project._config['issue_map'] is proj._config['issue_map']
+        return [project.issue('TEST-2'), project.issue('TEST-3')]
+
+    ret = _fan_out(fan_args, _search, [('key', True)])
+    assert [issue.key for issue in ret] == ['TEST-3', 'TEST-2', 'TEST-1']
+    assert fan_args.fields == ['project', 'summary:20']
+
+    # One project: no merging or extra column
+    proj.project_keys = ['TEST']
+    fan_args.fields = None
+    assert [issue.key for issue in _fan_out(fan_args, _search)] == ['TEST-1']
+    assert fan_args.fields is None
+
+
+def test_fan_out_servers():
+    primary = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    other = JiraProject(fake_jira(), 'OTHER', closed_status='Done')
+    other.jira.searches = []
+    primary.servers = [other]
+    fan_args = GenericArgs()
+    fan_args.project = primary
+    fan_args.fields = None
+
+    # Each server runs the query as given: one round trip per server
+    ret = _search_projects(fan_args, 'key in (TEST-1, TEST-2)', None)
+    assert sorted([issue.key for issue in ret]) == ['TEST-1', 'TEST-1', 'TEST-2', 'TEST-2']
+    assert other.jira.searches == ['key in (TEST-1, TEST-2)']
+    assert fan_args.fields == ['project', 'status', 'summary']
+
+    # Several projects on one server are still restricted per project
+    other.jira.searches = []
+    other.project_keys = ['OTHER', 'THIRD']
+    _search_projects(fan_args, 'key in (TEST-1)', None)
+    assert sorted(other.jira.searches) == ['project = OTHER AND (key in (TEST-1))', 'project = THIRD AND (key in (TEST-1))']
+
+
+def test_graph_matrix():
+    graph = walk(JiraProject(fake_jira(), 'TEST', readonly=True), ['TEST-3', 'TEST-4'], follow=relation_kinds)
+    assert _graph_matrix(graph) == [['TEST-3', 'New', 'Test 3 (parent task)'],
+                                    ['  subtask TEST-4', 'New', 'Test 4 (subtask of Test 3)'],
+                                    ['    parent TEST-3', 'New', 'Test 3 (parent task) (cycle)'],
+                                    ['TEST-4', 'New', 'Test 4 (subtask of Test 3) (see above)']]
+
+
+def test_bulk_field_per_type(capsys):
+    jira = fake_jira()
+    jira.searches = []
+    proj = JiraProject(jira, 'TEST', closed_status='Done')
+    # Bugs may have the field set; subtasks may not
+    proj._edit_metadata[('TEST', '1')] = {'customfield_1234567': fake_metadata['customfield_1234567']}
+    proj._edit_metadata[('TEST', '5')] = {}
+    jira._session.reset()
+
+    # GenericArgs can't carry 'values'
+    field_args = Namespace(project=proj, issue='1,test-2,4', operation='set', name='fixed_in_build', values=['abc'], also=None)
+    assert issue_fields(field_args) == (1, False)
+    assert jira.searches[-1] == 'key in (TEST-1, TEST-2, TEST-4)'
+    assert list(jira._session.put_urls.values()) == [{'update': {'customfield_1234567': [{'set': 'abc'}]}}] * 2
+    out = capsys.readouterr().out
+    assert 'TEST-4: Update to fixed_in_build (customfield_1234567) is not allowed at this point' in out
+    assert 'Updated 2 issue(s)' in out
+
+    # Bad input is reported, not raised
+    field_args.operation = 'remove'
+    field_args.name = 'no_such_field'
+    assert issue_fields(field_args) == (1, False)
+    assert 'Could not resolve no_such_field' in capsys.readouterr().out
+
+
+def test_bulk_field_jql(capsys):
+    jira = fake_jira()
+    jira.searches = []
+    proj = JiraProject(jira, 'TEST', closed_status='Done')
+    proj._edit_metadata[('TEST', '1')] = {'customfield_1234567': fake_metadata['customfield_1234567']}
+    jira._session.reset()
+
+    # With --jql, the issue is left out: 'field --jql JQL set fixed_in_build abc'
+    field_args = create_parser().parse_args(args=['field', '--jql', 'key in (TEST-1, TEST-2)', 'set', 'fixed_in_build', 'abc'])
+    field_args.project = proj
+    assert issue_fields(field_args) == (0, False)
+    assert jira.searches[-1] == 'key in (TEST-1, TEST-2)'
+    assert list(jira._session.put_urls.values()) == [{'update': {'customfield_1234567': [{'set': 'abc'}]}}] * 2
+    assert 'Updated 2 issue(s)' in capsys.readouterr().out
+
+    field_args = create_parser().parse_args(args=['field', '-j', 'key in (TEST-1)', 'set'])
+    field_args.project = proj
+    assert issue_fields(field_args) == (1, False)
+    assert 'Field name required' in capsys.readouterr().out
+
+    field_args = create_parser().parse_args(args=['field', 'TEST-1'])
+    field_args.project = proj
+    assert issue_fields(field_args) == (1, False)
+    assert 'Operation required' in capsys.readouterr().out
+
+
+def test_search_keep(monkeypatch, tmp_path, capsys):
+    saved = tmp_path / 'last'
+    monkeypatch.setattr('jirate.jira_cli._last_search_file', str(saved))
+
+    search_args = GenericArgs()
+    search_args.project = fake_jirate
+    search_args.raw = True
+    search_args.text = ['key in (TEST-1, TEST-2)']
+    search_args.quiet = True
+    search_args.format = 'default'
+
+    # Nothing is written unless asked for
+    assert search_jira(search_args) == (0, False)
+    assert not saved.exists()
+    search_args.refine = 'key = TEST-2'
+    assert search_jira(search_args) == (1, False)
+
+    search_args.refine = None
+    search_args.keep = True
+    assert search_jira(search_args) == (0, False)
+    assert saved.exists()
+    capsys.readouterr()
+    search_args.refine = 'key = TEST-2'
+    search_args.keep = False
+    assert search_jira(search_args) == (0, False)
+    assert capsys.readouterr().out.split() == ['TEST-2']
+
+
+def test_server_projects_requested(monkeypatch):
+    connected = []
+
+    def _connect(name, primary):
+        connected.append(name)
+        return JiraProject(fake_jira(), primary.get_user_data('servers')[name]['default_project'], closed_status='Done')
+
+    monkeypatch.setattr('jirate.jira_cli._connect_server', _connect)
+    primary = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    primary.set_user_data('servers', {'one': {'default_project': 'OTHER'},
+                                      'two': {'default_project': 'X', 'default_projects': ['THIRD', 'FOURTH']}})
+    primary.project_keys = ['TEST', 'THIRD']
+    primary.requested_keys = ['TEST', 'THIRD']
+    fan_args = GenericArgs()
+    fan_args.project = primary
+
+    # Only the server with a project that was asked for, and only for it
+    servers = server_projects(fan_args)
+    assert connected == ['two']
+    assert servers[0].project_keys == ['THIRD']
+    # Rendered with its own field definitions
+    assert servers[0].output_fields['customfield_1234567']['name'] == 'Fixed in Build'
+    assert primary.output_fields is None
+    searched = []
+    _fan_out(fan_args, lambda project: searched.append(project.project_name) or [])
+    assert sorted(searched) == ['TEST', 'THIRD']
+
+    # Without -p, every server covers its own projects
+    primary.requested_keys = None
+    primary.servers = None
+    connected.clear()
+    server_projects(fan_args)
+    assert sorted(connected) == ['one', 'two']
@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 
-from jirate.jboard import Jirate
-from jirate.tests import fake_jira, fake_user, fake_transitions
+from jirate.jboard import Jirate, JiraProject
+from jirate.tests import fake_jira, fake_user, fake_transitions, fake_issues, fake_metadata, fake_project
+from jirate.jira_input import input_plan
+from jirate.userdir import UserDirectory
 
 import pytest  # NOQA
 import types
@@ -109,6 +111,215 @@ def test_transition_bad_field():
         assert fake_jirate.move('TEST-1', 'done', beastly_fido='odif_yltsaeb') == [issue]
 
 
+def test_transition_plan_cached():
+    jirate = Jirate(fake_jira())
+    looked_up = []
+
+    def _transitions(obj, issue):
+        looked_up.append(issue.key)
+        return fake_transitions['transitions']
+
+    jirate.transitions = types.MethodType(_transitions, jirate)
+    jirate.jira._session.reset()
+    # Bad fields are caught before anything is moved
+    with pytest.raises(ValueError):
+        jirate.transition_issues(['TEST-1', 'TEST-2', 'TEST-3'], 'done', beastly_fido='odif_yltsaeb')
+    assert jirate.jira._session.post_urls == {}
+
+    ret = jirate.transition_issues(['TEST-1', 'TEST-2', 'TEST-3'], 'done', resolution='duplicate')
+    assert [(issue.key, err) for issue, err in ret] == [('TEST-1', None), ('TEST-2', None), ('TEST-3', None)]
+    # Same project, type and status: one lookup, ever
+    assert looked_up == ['TEST-1']
+    assert len(jirate.jira._session.post_urls) == 3
+    assert jirate.jira._session.post_urls['https://domain.com/rest/api/2/issue/1000003/transitions'] == {'fields': {'resolution': {'name': 'Duplicate'}}, 'transition': {'id': '13'}}
+
+    ret = jirate.transition_issues(['TEST-1', 'TEST-2'], 'new')
+    assert [(issue.key, err) for issue, err in ret] == [('TEST-1', 'Already in New'), ('TEST-2', 'Already in New')]
+    ret = jirate.transition_issues(['TEST-1', 'TEST-2'], 'no such status')
+    assert [err for _, err in ret] == ['No transition to no such status'] * 2
+
+
+class fake_user_jira(fake_jira):
+    def search_users(self, username):
+        self.user_searches.append(username)
+        user = types.SimpleNamespace()
+        user.name = username.split('@')[0]
+        return [user]
+
+    def myself(self):
+        self.myselfs = self.myselfs + 1
+        return fake_user
+
+
+def test_assign_resolves_users_once():
+    jira = fake_user_jira()
+    jira.user_searches = []
+    jira.myselfs = 0
+    jirate = Jirate(jira)
+    jira._session.reset()
+
+    ret = jirate.assign(['TEST-1', 'TEST-2', 'TEST-3'], 'rory@pie.com')
+    assert [(issue.key, err) for issue, err in ret] == [('TEST-1', None), ('TEST-2', None), ('TEST-3', None)]
+    assert jira._session.put_urls == {f'https://domain.com/rest/api/2/issue/100000{idx}/assignee': {'name': 'rory'} for idx in (1, 2, 3)}
+    jirate.assign(['TEST-1', 'TEST-2'], 'rory@pie.com')
+    assert jira.user_searches == ['rory@pie.com']
+
+    jira._session.reset()
+    jirate.assign(['TEST-1', 'TEST-2'])
+    jirate.assign(['TEST-3'], 'me')
+    assert jira.myselfs == 1
+    assert list(jira._session.put_urls.values()) == [{'name': 'porkchop'}] * 3
+
+    jira._session.reset()
+    jirate.assign(['TEST-4'], 'none')
+    assert jira._session.put_urls == {'https://domain.com/rest/api/2/issue/1000004/assignee': {'name': None}}
+
+
+def test_get_user_directory():
+    jira = fake_user_jira()
+    jira.user_searches = []
+    jirate = Jirate(jira)
+    jirate.user_directory = UserDirectory('')
+    jirate.user_directory.add([{'name': 'amy', 'emailAddress': 'amy@pie.com', 'displayName': 'Amy Pond'}])
+
+    assert jirate.get_user('AMY@pie.com') == 'amy'
+    assert jirate.get_user('rory@pie.com') == 'rory'
+    assert jira.user_searches == ['rory@pie.com']
+
+    # A new command with the same directory remembers the answer
+    jirate = Jirate(jira)
+    jirate.user_directory = UserDirectory('')
+    jirate.user_directory.remember('rory@pie.com', 'rory')
+    jirate.user_directory.add([{'name': 'rory'}])
+    assert jirate.get_user('Rory@pie.com') == 'rory'
+    assert jira.user_searches == ['rory@pie.com']
+
+
+def test_comment_many():
+    jira = fake_jira()
+    jira.fetched = []
+    jira.searches = []
+    jirate = Jirate(jira)
+    jira._session.reset()
+
+    ret = jirate.comment('test-1,TEST-2 TEST-1 TEST-99', 'Released in 1.2', 'Employee')
+    assert ret == [('TEST-1', None), ('TEST-2', None), ('TEST-99', None)]
+    body = {'body': 'Released in 1.2', 'visibility': {'type': 'group', 'value': 'Employee'}}
+    assert jira._session.post_urls == {f'https://domain.com/rest/api/2/issue/{key}/comment': body for key in ('TEST-1', 'TEST-2', 'TEST-99')}
+    # The key is all we need
+    assert jira.fetched == [] and jira.searches == []
+
+
+def test_edit_field_many(monkeypatch):
+    jira = fake_jira()
+    jirate = Jirate(jira)
+    jira._session.reset()
+    editmeta = []
+
+    def _get(url):
+        editmeta.append(url)
+        return {'fields': fake_metadata}
+
+    monkeypatch.setattr(jira._session, 'get', _get)
+    issues = jirate.issues(['TEST-1', 'TEST-2', 'TEST-3'])
+    ret = jirate.edit_field(issues, 'array_of_options', ['one', 'three'], 'add')
+    assert [(issue.key, err) for issue, err in ret] == [('TEST-1', None), ('TEST-2', None), ('TEST-3', None)]
+    # Same project and type: one editmeta
+    assert editmeta == ['https://domain.com/rest/api/2/issue/1000001/editmeta']
+    update = {'update': {'customfield_1234569': [{'add': {'value': 'One'}}, {'add': {'value': 'Three'}}]}}
+    assert jira._session.put_urls == {f'https://domain.com/rest/api/2/issue/100000{idx}': update for idx in (1, 2, 3)}
+
+    # Errors are reported for each issue, and nothing is sent
+    jira._session.reset()
+    ret = jirate.edit_field(issues, 'score', '12', 'add')
+    assert [type(err) for _, err in ret] == [ValueError] * 3
+    ret = jirate.edit_field(issues[:1], 'no_such_field', '12')
+    assert isinstance(ret[0][1], AttributeError)
+    assert jira._session.put_urls == {}
+    assert len(editmeta) == 1
+
+
+def test_edit_fields_combined(monkeypatch):
+    jira = fake_jira()
+    jirate = Jirate(jira)
+    jira._session.reset()
+    monkeypatch.setattr(jira._session, 'get', lambda url: {'fields': fake_metadata})
+    issues = jirate.issues(['TEST-1', 'TEST-2'])
+    ret = jirate.edit_fields(issues, [('array_of_options', 'add', ['one']),
+                                      ('score', 'set', '12'),
+                                      ('array_of_options', 'remove', ['two'])])
+    assert [err for _, err in ret] == [None, None]
+    # One request per issue carrying every change
+    update = {'update': {'customfield_1234569': [{'add': {'value': 'One'}}, {'remove': {'value': 'Two'}}],
+                         'customfield_1234568': [{'set': 12.0}]}}
+    assert jira._session.put_urls == {f'https://domain.com/rest/api/2/issue/100000{idx}': update for idx in (1, 2)}
+
+    # One bad change means none of them are sent
+    jira._session.reset()
+    ret = jirate.edit_fields(issues, [('array_of_options', 'add', ['one']), ('score', 'add', '12')])
+    assert [type(err) for _, err in ret] == [ValueError] * 2
+    assert jira._session.put_urls == {}
+
+
+def test_create_with_cached_editmeta():
+    jira = fake_jira()
+    jirate = Jirate(jira)
+    jira._session.reset()
+    created = []
+
+    def _create_issue(prefetch=True, **args):
+        created.append((prefetch, args))
+        return types.SimpleNamespace(key='TEST-10', raw={'key': 'TEST-10', 'self': 'https://domain.com/rest/api/2/issue/1000010'})
+
+    jira.create_issue = _create_issue
+    jirate._edit_metadata[('TEST', '1')] = fake_metadata
+    # Fixed in Build can't be set at creation (not in the definitions);
+    # the edit metadata is known, so it's checked before creating
+    definitions = {'customfield_1234568': fake_metadata['customfield_1234568']}
+    with pytest.raises(ValueError):
+        jirate.create(definitions, project={'key': 'TEST'}, issuetype={'id': '1'}, summary='New', score='1', array_of_options='four')
+    assert created == []
+
+    issue = jirate.create(definitions, prefetch=False, project={'key': 'TEST'}, issuetype={'id': '1'}, summary='New', score='1', fixed_in_build='abc')
+    assert issue.key == 'TEST-10'
+    assert created == [(False, {'project': {'key': 'TEST'}, 'issuetype': {'id': '1'}, 'summary': 'New', 'customfield_1234568': 1.0})]
+    assert jira._session.put_urls == {'https://domain.com/rest/api/2/issue/1000010': {'fields': {'customfield_1234567': 'abc'}}}
+    assert jira.fetched == []
+
+
+def test_create_issues_bulk(monkeypatch):
+    jira = fake_jira()
+    jirate = Jirate(jira)
+    jira._session.reset()
+    posted = []
+
+    def _post(url, data=None):
+        posted.append((url, data))
+        return {'issues': [{'id': '1000011', 'key': 'TEST-11', 'self': 'https://domain.com/rest/api/2/issue/1000011'},
+                           {'id': '1000012', 'key': 'TEST-12', 'self': 'https://domain.com/rest/api/2/issue/1000012'}],
+                'errors': [{'failedElementNumber': 1, 'elementErrors': {'errors': {'summary': 'Summary is required'}}}]}
+
+    monkeypatch.setattr(jira._session, 'post', _post)
+    jirate._edit_metadata[('TEST', '1')] = fake_metadata
+    definitions = {'customfield_1234568': fake_metadata['customfield_1234568']}
+    fields = {'project': 'TEST', 'issuetype': {'id': '1'}}
+    ret = jirate.create_issues([(definitions, dict(fields, summary='One', score='1')),
+                                (definitions, dict(fields, summary='')),
+                                (definitions, dict(fields, summary='Three', fixed_in_build='abc')),
+                                (definitions, dict(fields, summary='Four', array_of_options='four'))])
+
+    # One request for everything which could be created
+    assert posted == [('https://domain.com/rest/api/2/issue/bulk', {'issueUpdates': [
+        {'fields': {'project': {'key': 'TEST'}, 'issuetype': {'id': '1'}, 'summary': 'One', 'customfield_1234568': 1.0}},
+        {'fields': {'project': {'key': 'TEST'}, 'issuetype': {'id': '1'}, 'summary': ''}},
+        {'fields': {'project': {'key': 'TEST'}, 'issuetype': {'id': '1'}, 'summary': 'Three'}}]})]
+    assert [(issue.key if issue else None, err.text if err else None) for issue, err in ret[:3]] == \
+        [('TEST-11', None), (None, 'summary: Summary is required'), ('TEST-12', None)]
+    assert ret[3][0] is None and isinstance(ret[3][1], ValueError)
+    # The rest of the third issue's fields
+    assert jira._session.put_urls == {'https://domain.com/rest/api/2/issue/1000012': {'fields': {'customfield_1234567': 'abc'}}}
+
+
 @pytest.mark.parametrize("param,expected", [
     ('Fixed in Build', 'customfield_1234567'),
     ('fixed_in_build', 'customfield_1234567'),
@@ -131,3 +342,164 @@ def test_field_to_alias(param, expected):
     ('customfield_1234567', 'Fixed in Build')])
 def test_field_to_human(param, expected):
     assert fake_jirate.field_to_human(param) == expected
+
+
+def test_prefetch_single_search():
+    project = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    ret = project.prefetch(['TEST-1', '2', 'TEST-3'])
+    assert sorted([issue.key for issue in ret]) == ['TEST-1', 'TEST-2', 'TEST-3']
+    assert project.jira.searches == ['key in (TEST-1, TEST-2, TEST-3)']
+
+    # Everything is indexed; no further fetches or searches
+    project.jira.fetched = []
+    assert project.issue('TEST-2').key == 'TEST-2'
+    assert project.issue('3').key == 'TEST-3'
+    assert project.jira.fetched == []
+    assert project.prefetch('TEST-1 TEST-2') == []
+    assert len(project.jira.searches) == 1
+
+
+def test_prefetch_no_cache():
+    jirate = Jirate(fake_jira())
+    # issue() would ask the server again anyway
+    assert jirate.prefetch(['TEST-1', 'TEST-2']) == []
+    assert jirate.jira.searches == []
+
+
+def test_prefetch_one_key():
+    project = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    # A single issue is left to issue()
+    assert project.prefetch(['TEST-1']) == []
+    assert project.jira.searches == []
+
+
+def test_sibling_registry():
+    project = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    other = project.sibling('OTHER')
+    # Set up once, whoever asks
+    assert project.sibling('OTHER') is other
+    assert other.sibling('OTHER') is other
+    assert other.sibling('TEST') is project
+    # Metadata caches are shared
+    project._edit_metadata[('OTHER', '1')] = fake_metadata
+    assert other._edit_metadata is project._edit_metadata
+    assert other._create_metadata is project._create_metadata
+
+    # Another project on the same connection finds the same siblings
+    again = JiraProject(project.jira, 'THIRD', closed_status='Done')
+    assert again.sibling('OTHER') is other
+    assert project.sibling('THIRD') is again
+    # ... but not one on another connection
+    assert JiraProject(fake_jira(), 'TEST').sibling('OTHER') is not other
+
+
+def test_issue_metadata_stable():
+    project = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    project._create_metadata[('TEST', '20')] = {'id': '20', 'fields': fake_metadata}
+    # Input plans are cached by identity of the definitions
+    assert project.issue_metadata('bug') is project.issue_metadata('20')
+    assert input_plan(project.issue_metadata('bug')['fields']) is input_plan(fake_metadata)
+
+
+class fake_counting_jira(fake_jira):
+    counts = {'status = 10000': 3, 'status = 10001': 1}
+
+    def _get_json(self, url_fragment, params=None, **args):
+        assert url_fragment == 'search' and params['maxResults'] == 0
+        self.searches.append(params['jql'])
+        for clause, count in self.counts.items():
+            if params['jql'].endswith(clause):
+                return {'total': count}
+        return {'total': 0 if 'status' in params['jql'] else 4}
+
+    def search_issues(self, search_query, startAt=None, maxResults=None, fields=None, **kwargs):
+        self.searches.append((search_query, fields))
+        return [self.issue(key) for key in fake_issues][startAt or 0:]
+
+    def project_versions(self, project_key):
+        return [types.SimpleNamespace(raw=version) for version in fake_project['versions']]
+
+
+def test_stats_server_counts():
+    project = JiraProject(fake_counting_jira(), 'TEST', closed_status='Done')
+    counts, total = project.stats(['status'], 'type = Bug')
+    assert counts == [(('New',), 3), (('In Progress',), 1)]
+    assert total == 4
+    # No issues retrieved; one count per status plus the total
+    assert sorted(project.jira.searches) == ['project = TEST AND (type = Bug)',
+                                             'project = TEST AND (type = Bug) AND status = 10000',
+                                             'project = TEST AND (type = Bug) AND status = 10001',
+                                             'project = TEST AND (type = Bug) AND status = 10002']
+    assert project.jira.fetched == []
+
+
+def test_stats_by_version():
+    jira = fake_counting_jira()
+    jira.counts = {'fixVersion = 12416509': 2, 'fixVersion = 12416345': 0, 'fixVersion is EMPTY': 1}
+    project = JiraProject(jira, 'TEST', closed_status='Done')
+    counts, total = project.stats(['fixVersion'])
+    assert counts == [(('version-1.0',), 2), (('(none)',), 1)]
+    assert total == 4
+    assert sorted(jira.searches) == ['project = TEST',
+                                     'project = TEST AND fixVersion = 12416345',
+                                     'project = TEST AND fixVersion = 12416509',
+                                     'project = TEST AND fixVersion is EMPTY']
+
+
+def test_stats_client_group_by():
+    project = JiraProject(fake_counting_jira(), 'TEST', closed_status='Done')
+    counts, total = project.stats(['Priority', 'score'])
+    assert total == 4
+    assert counts == [(('Normal', '(none)'), 3), (('Normal', '22'), 1)]
+    # Only the grouped fields are requested
+    assert project.jira.searches == [('project = TEST', ['priority', 'customfield_1234568'])]
+
+
+def test_sort_local_and_pushdown():
+    project = JiraProject(fake_counting_jira(), 'TEST', closed_status='Done')
+
+    # Priority is not navigable in the test data; sorted locally
+    order = project.sort_order('priority,key:desc')
+    assert order == [('priority', False), ('key', True)]
+    assert project.order_by(order) is None
+    ret = project.search_issues('project = TEST ORDER BY rank', order=order)
+    assert [issue.key for issue in ret] == ['TEST-4', 'TEST-3', 'TEST-2', 'TEST-1']
+    assert project.jira.searches[-1][0] == 'project = TEST ORDER BY rank'
+
+    # Server-sortable fields replace ORDER BY in the query
+    order = project.sort_order('score:desc,key')
+    assert order == [('customfield_1234568', True), ('key', False)]
+    assert project.order_by(order) == 'cf[1234568] DESC, key ASC'
+    project.search_issues('project = TEST order by rank', order=order)
+    assert project.jira.searches[-1][0] == 'project = TEST ORDER BY cf[1234568] DESC, key ASC'
+
+    # Navigable, but the server can't sort by it
+    assert project.order_by(project.sort_order('subtasks,key')) is None
+
+    with pytest.raises(ValueError):
+        project.sort_order('no_such_field')
+
+
+def test_sort_priority_order(monkeypatch):
+    monkeypatch.setitem(fake_issues['TEST-1']['fields'], 'priority', {'id': '105', 'name': 'Minor'})
+    monkeypatch.setitem(fake_issues['TEST-2']['fields'], 'priority', {'id': '101', 'name': 'Blocker'})
+    project = JiraProject(fake_jira(), 'TEST', closed_status='Done')
+    issues = [project.jira.issue(key) for key in ('TEST-1', 'TEST-2', 'TEST-3')]
+    # Highest first, as with ORDER BY priority DESC on the server
+    ret = project.sort_issues(issues, [('priority', True)])
+    assert [issue.key for issue in ret] == ['TEST-2', 'TEST-3', 'TEST-1']
+    ret = project.refine('ORDER BY priority ASC', issues)
+    assert [issue.key for issue in ret] == ['TEST-1', 'TEST-3', 'TEST-2']
+
+
+def test_child_issues_batched(monkeypatch):
+    monkeypatch.setitem(fake_issues['TEST-1']['fields'], 'customfield_283949317', 'EPIC-1')
+    monkeypatch.setitem(fake_issues['TEST-2']['fields'], 'customfield_283949317', 'EPIC-2')
+    project = JiraProject(fake_counting_jira(), 'TEST', readonly=True)
+    project.jira.searches = []
+    epics = [{'key': key, 'fields': {'issuetype': {'name': 'Epic'}}} for key in ('EPIC-1', 'EPIC-2')]
+    bug = {'key': 'BUG-1', 'fields': {'issuetype': {'name': 'Bug'}}}
+    ret = project.child_issues(epics + [bug], fields=['summary'])
+    assert {key: [issue.key for issue in issues] for key, issues in ret.items()} == {'EPIC-1': ['TEST-1'], 'EPIC-2': ['TEST-2']}
+    # One search for both epics, including the field needed to tell them apart
+    assert project.jira.searches == [('"Epic Link" in (EPIC-1, EPIC-2)', ['summary', 'customfield_283949317'])]
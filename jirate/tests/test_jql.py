@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+from jirate.jboard import JiraProject
+from jirate.jql import compile_jql, JQLError
+from jirate.tests import fake_jira, fake_issues
+
+import pytest  # NOQA
+
+
+issues = list(fake_issues.values())
+
+
+def _keys(query, **kwargs):
+    return [raw['key'] for raw in compile_jql(query, **kwargs).filter(issues)]
+
+
+def test_jql_equality():
+    assert _keys('assignee = rory') == ['TEST-1']
+    assert _keys('assignee = "Rory Obert"') == ['TEST-1']
+    assert _keys('assignee = ROBERT@PIE.COM') == ['TEST-1']
+    assert _keys('labels = label2') == ['TEST-1', 'TEST-2', 'TEST-3', 'TEST-4']
+    assert _keys('labels != label2') == []
+    assert _keys('key = test-3') == ['TEST-3']
+    assert _keys('statusCategory = "To Do" AND labels = label1') == ['TEST-1']
+
+
+def test_jql_in_and_empty():
+    assert _keys('key in (TEST-1, TEST-4, TEST-99)') == ['TEST-1', 'TEST-4']
+    assert _keys('key not in (TEST-1, TEST-4)') == ['TEST-2', 'TEST-3']
+    assert _keys('assignee is EMPTY') == ['TEST-2', 'TEST-3', 'TEST-4']
+    assert _keys('assignee is not null') == ['TEST-1']
+
+
+def test_jql_text():
+    assert _keys('summary ~ "subtask test"') == ['TEST-4']
+    assert _keys('summary !~ test') == []
+    assert _keys('text ~ "descr 3"') == ['TEST-3']
+    assert _keys('summary ~ est') == []
+
+
+def test_jql_boolean():
+    assert _keys('key = TEST-1 OR key = TEST-2 AND assignee is EMPTY') == ['TEST-1', 'TEST-2']
+    assert _keys('(key = TEST-1 OR key = TEST-2) AND assignee is EMPTY') == ['TEST-2']
+    assert _keys('NOT key = TEST-1 and not (key = TEST-2)') == ['TEST-3', 'TEST-4']
+
+
+def test_jql_order_by():
+    assert _keys('order by summary desc') == ['TEST-4', 'TEST-3', 'TEST-1', 'TEST-2']
+    assert _keys('ORDER BY summary, key DESC') == ['TEST-2', 'TEST-1', 'TEST-3', 'TEST-4']
+    # Empty values go last
+    assert _keys('order by assignee desc') == ['TEST-1', 'TEST-2', 'TEST-3', 'TEST-4']
+
+
+def test_jql_current_user():
+    assert _keys('assignee = currentUser()', current_user='rory') == ['TEST-1']
+    assert _keys('assignee in (currentUser(), nobody)', current_user=lambda: ['robert@pie.com']) == ['TEST-1']
+    with pytest.raises(JQLError):
+        _keys('assignee = currentUser()')
+
+
+def test_jql_errors():
+    for query in ('assignee =', 'assignee > 1', 'key in TEST-1', 'summary ~ foo)', 'assignee = membersOf(foo)', '"unclosed'):
+        with pytest.raises(JQLError):
+            compile_jql(query)
+
+
+def test_jql_field_names():
+    proj = JiraProject(fake_jira(), 'TEST', readonly=True)
+    ret = proj.refine('Score = 22 AND "Component/s" = "food, pork"', issues)
+    assert [issue.key for issue in ret] == ['TEST-1']
+    assert [issue.key for issue in proj.refine('score is empty', issues)] == ['TEST-2', 'TEST-3', 'TEST-4']
+    with pytest.raises(JQLError):
+        proj.refine('no_such_field = 1', issues)
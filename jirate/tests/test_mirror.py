@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+import copy
+import time
+
+from jirate.mirror import IssueMirror
+from jirate.tests import fake_issues
+
+import pytest  # NOQA
+
+
+class fake_searcher(object):
+    def __init__(self, issues, time_zone='UTC'):
+        self.issues = issues
+        self.queries = []
+        self.user = {'name': 'rory', 'timeZone': time_zone}
+
+    def iter_search(self, query):
+        self.queries.append(query)
+        yield [type('issue', (), {'raw': raw}) for raw in self.issues]
+
+
+def _raw_issues():
+    ret = copy.deepcopy(list(fake_issues.values()))
+    ret[1]['fields']['description'] = 'The kernel panics when loading pork module'
+    ret[2]['fields']['summary'] = 'kernel: oops in scheduler'
+    ret[3]['fields']['comment'] = {'comments': [{'body': 'seen with kernel 6.1 too'}]}
+    return ret
+
+
+def test_mirror_no_file(tmp_path):
+    mirror = IssueMirror(str(tmp_path / 'mirror'), max_age=60)
+    # Reading never creates the database
+    assert mirror.issue('TEST-1') is None
+    assert mirror.search('kernel') == []
+    assert not mirror.fresh('TEST')
+    assert not (tmp_path / 'mirror').exists()
+
+
+def test_mirror_sync_and_search(tmp_path):
+    mirror = IssueMirror(str(tmp_path / 'mirror'), max_age=60)
+    searcher = fake_searcher(_raw_issues())
+
+    assert mirror.sync(searcher, 'TEST') == 4
+    assert searcher.queries == ['project = TEST ORDER BY updated ASC']
+    assert mirror.fresh('TEST')
+    assert mirror.issue('TEST-2')['key'] == 'TEST-2'
+
+    # Summary matches outrank description matches, which outrank comments
+    assert [raw['key'] for raw in mirror.search('kernel')] == ['TEST-3', 'TEST-2', 'TEST-4']
+    assert mirror.search('kernel', projects=['OTHER']) == []
+
+    # Not valid FTS5 syntax; falls back to literal words
+    assert [raw['key'] for raw in mirror.search('pork-module')] == ['TEST-2']
+    assert [raw['key'] for raw in mirror.search('kernel 6.1')] == ['TEST-4']
+
+    # Second sync is incremental
+    mirror.sync(searcher, 'TEST')
+    assert searcher.queries[1] == 'project = TEST AND updated >= "2023/11/30 15:01" ORDER BY updated ASC'
+
+    # The bound follows the newest issue stored, not the local clock
+    newer = _raw_issues()[:1]
+    newer[0]['fields']['updated'] = '2024-02-01T09:30:00.000+0000'
+    mirror.store(newer)
+    mirror._db.execute('UPDATE projects SET last_sync = 0')
+    mirror.sync(searcher, 'TEST')
+    assert searcher.queries[2] == 'project = TEST AND updated >= "2024/02/01 09:25" ORDER BY updated ASC'
+
+
+def test_mirror_sync_time_zone(tmp_path):
+    mirror = IssueMirror(str(tmp_path / 'mirror'))
+    issues = _raw_issues()[:1]
+    # Rendered with an offset other than the user's time zone
+    issues[0]['fields']['updated'] = '2024-02-01T11:30:00.000+0200'
+    mirror.store(issues)
+
+    # 09:30 UTC is 04:30 in New York; JQL dates are read in the profile's zone
+    searcher = fake_searcher([], 'America/New_York')
+    mirror.sync(searcher, 'TEST')
+    assert searcher.queries == ['project = TEST AND updated >= "2024/02/01 04:25" ORDER BY updated ASC']
+
+    # Zone unknown: early enough whatever it is
+    searcher = fake_searcher([], None)
+    mirror.sync(searcher, 'TEST')
+    assert searcher.queries == ['project = TEST AND updated >= "2024/01/31 19:25" ORDER BY updated ASC']
+
+
+def test_mirror_list(tmp_path):
+    mirror = IssueMirror(str(tmp_path / 'mirror'))
+    mirror.store(_raw_issues())
+
+    assert [raw['key'] for raw in mirror.list('TEST', 'rory')] == ['TEST-1']
+    assert sorted([raw['key'] for raw in mirror.list('TEST', None)]) == ['TEST-2', 'TEST-3', 'TEST-4']
+    assert [raw['key'] for raw in mirror.list('TEST', 'rory', 'new')] == ['TEST-1']
+    assert mirror.list('TEST', 'rory', 'done') == []
+
+
+def test_mirror_freshness(tmp_path):
+    mirror = IssueMirror(str(tmp_path / 'mirror'))
+    mirror.sync(fake_searcher([]), 'TEST')
+    # No max age: never stands in for the server
+    assert not mirror.fresh('TEST')
+    mirror.max_age = 1
+    assert mirror.fresh('TEST')
+    mirror._db.execute('UPDATE projects SET last_sync = ?', (time.time() - 10,))
+    assert not mirror.fresh('TEST')
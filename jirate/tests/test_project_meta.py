@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+import time
+
+from jira import JIRAError
+
+from jirate.jboard import JiraProject
+from jirate.project_meta import ProjectMetadata
+from jirate.tests import fake_jira, fake_metadata
+
+import pytest  # NOQA
+
+
+class counting_jira(fake_jira):
+    def project(self, project_key):
+        self.projects.append(project_key)
+        return super().project(project_key)
+
+
+def test_project_meta_facets(tmp_path):
+    filename = str(tmp_path / 'projects')
+    meta = ProjectMetadata(filename, max_age={'sprints': 60})
+    fetched = []
+
+    def _fetch(value):
+        def _func():
+            fetched.append(value)
+            return value
+        return _func
+
+    assert meta.get('TEST', 'statuses', _fetch(['New'])) == ['New']
+    assert meta.get('TEST', 'statuses', _fetch(['Other'])) == ['New']
+    assert meta.get('TEST', ('createmeta', '1'), _fetch({'id': '1'})) == {'id': '1'}
+    assert meta.get('OTHER', 'statuses', _fetch(['Done'])) == ['Done']
+    assert fetched == [['New'], {'id': '1'}, ['Done']]
+
+    # Each facet ages on its own
+    meta.put('TEST', ('sprints', 'active'), {'boards': {}, 'sprints': {}})
+    meta._projects['TEST'][('sprints', 'active')] = (time.time() - 120, {})
+    assert not meta.fresh('TEST', ('sprints', 'active'))
+    assert meta.fresh('TEST', 'statuses')
+
+    meta.invalidate('TEST', 'statuses')
+    assert not meta.fresh('TEST', 'statuses')
+    meta.save()
+
+    meta = ProjectMetadata(filename)
+    assert meta.fresh('TEST', ('createmeta', '1'))
+    assert meta.get('OTHER', 'statuses', _fetch(['Wrong'])) == ['Done']
+    assert not meta.fresh('TEST', 'statuses')
+
+    # Data saved with another layout is ignored
+    meta.clear()
+    assert not meta.fresh('OTHER', 'statuses')
+    meta._version = 0
+    meta.save()
+    meta = ProjectMetadata(filename)
+    assert meta.get('OTHER', 'statuses', _fetch(['Again'])) == ['Again']
+
+
+def test_project_metadata_lazy():
+    jira = counting_jira()
+    jira.projects = []
+    jira._session.reset()
+    proj = JiraProject(jira, 'TEST')
+    # Nothing is retrieved until it's needed
+    assert jira.projects == []
+    assert jira._session.get_urls == []
+
+    assert proj.status_to_id('done') == '10002'
+    assert proj.closed_status == 'DONE'
+    assert jira._session.get_urls == ['https://domain.com/rest/api/2/project/TEST/statuses']
+    assert jira.projects == []
+
+    assert [itype.name for itype in proj.issue_types][:2] == ['Bug', 'Epic']
+    # Components and versions came with the project
+    assert [comp.name for comp in proj.components()][0] == 'aardvark'
+    assert proj.versions[0].name == 'version-1.0'
+    assert jira.projects == ['TEST']
+
+    # Another project on the server with the same bundle doesn't ask again
+    other = JiraProject(jira, 'TEST')
+    other.metadata = proj.metadata
+    other.states()
+    other.issue_types
+    assert jira.projects == ['TEST']
+    assert len(jira._session.get_urls) == 1
+
+
+def test_project_metadata_editmeta(tmp_path):
+    filename = str(tmp_path / 'projects')
+    jira = fake_jira()
+    jira._session.reset()
+    jira._session.get = lambda url: jira._session.get_urls.append(url) or {'fields': fake_metadata}
+    proj = JiraProject(jira, 'TEST')
+    proj.metadata = ProjectMetadata(filename)
+    # Not known yet; the new issue is needed to find out
+    assert proj._creation_update(('TEST', '1'), {'option_value': 'one'}) is None
+    assert proj._creation_update(('TEST', '1'), {'option_value': 'one'}, 'https://domain.com/rest/api/2/issue/1') == {'customfield_1234578': {'value': 'One'}}
+    assert len(jira._session.get_urls) == 1
+    proj.metadata.save()
+
+    # Next time, it's checked before the issue is created
+    proj = JiraProject(jira, 'TEST')
+    proj.metadata = ProjectMetadata(filename)
+    assert proj._creation_update(('TEST', '1'), {'option_value': 'one'}) == {'customfield_1234578': {'value': 'One'}}
+    assert len(jira._session.get_urls) == 1
+
+
+class missing_project_jira(fake_jira):
+    def project(self, project_key):
+        raise JIRAError('Project not found', status_code=404, url=f'https://domain.com/rest/api/2/project/{project_key}')
+
+
+def test_project_metadata_no_such_project():
+    proj = JiraProject(missing_project_jira(), 'TSET')
+    with pytest.raises(JIRAError) as err:
+        proj.issue_types
+    assert err.value.status_code == 404
+    assert err.value.text == 'No such project: TSET'
+
+
+class refusing_jira(fake_jira):
+    def create_issue(self, prefetch=True, **args):
+        self.attempts.append(args)
+        if 'customfield_1234568' not in args or not args['summary']:
+            raise JIRAError('Score is required', status_code=400)
+        return super().create_issue(prefetch, **args)
+
+
+def test_project_metadata_create_refused(monkeypatch):
+    jira = refusing_jira()
+    jira.attempts = []
+    proj = JiraProject(jira, 'TEST')
+    # Saved by an earlier run, when Score could only be set by an update
+    proj.metadata.put('TEST', ('createmeta', '20'), {'id': '20', 'name': 'Bug', 'fields': {}})
+    proj.metadata.put('TEST', ('editmeta', '20'), {'customfield_1234568': fake_metadata['customfield_1234568']})
+    proj._create_metadata[('TEST', '20')] = proj.metadata.peek('TEST', ('createmeta', '20'))
+    fetched = []
+
+    def _fetch(itype, project_key):
+        fetched.append((project_key, itype.id))
+        return {'id': '20', 'name': 'Bug', 'fields': {'customfield_1234568': fake_metadata['customfield_1234568']}}
+
+    monkeypatch.setattr(proj, '_fetch_issue_metadata', _fetch)
+
+    issue = proj.create(prefetch=False, project='TEST', issuetype='Bug', summary='New', score='1')
+    assert issue.raw['fields']['customfield_1234568'] == 1.0
+    assert len(jira.attempts) == 2
+    assert fetched == [('TEST', '20')]
+    assert proj.metadata.retrieved('TEST', ('createmeta', '20'))
+
+    # Current definitions are not asked for again
+    jira.attempts = []
+    with pytest.raises(JIRAError):
+        proj.create(prefetch=False, project='TEST', issuetype='Bug', summary='', score='1')
+    assert len(jira.attempts) == 1
+    assert fetched == [('TEST', '20')]
+
+
+def test_project_metadata_sprint_refresh(monkeypatch):
+    proj = JiraProject(fake_jira(), 'TEST')
+    fetched = []
+
+    def _sprint_info(self, project_key, states):
+        fetched.append(states)
+        return {'boards': {}, 'sprints': {}}
+
+    monkeypatch.setattr('jirate.jboard.Jirate.sprint_info', _sprint_info)
+    proj.sprint_info()
+    proj.sprint_info()
+    assert fetched == ['active,future']
+    proj.sprint_info(refresh=True)
+    assert fetched == ['active,future'] * 2
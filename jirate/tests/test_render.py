@@ -2,7 +2,7 @@
 
 from jirate.jboard import Jirate
 from jirate.tests import fake_jira
-from jirate.jira_fields import apply_field_renderers, render_field_data
+from jirate.jira_fields import apply_field_renderers, output_renderers, render_field_data
 
 import os
 import time
@@ -191,3 +191,17 @@ def test_user_defined_field():
     fields = issue.raw['fields']
 
     assert render_field_data('email', fields, False, True) == ('Assignee Email', 'robert@pie.com')
+
+
+def test_render_per_server():
+    primary = [{'id': 'customfield_1', 'name': 'Story Points', 'schema': {'type': 'number'}}]
+    other = [{'id': 'customfield_1', 'name': 'Team', 'schema': {'type': 'option', 'custom': 'com.atlassian.jira.plugin.system.customfieldtypes:select'}}]
+    fields = {'customfield_1': {'value': 'Kernel', 'id': '10'}}
+    apply_field_renderers(primary)
+    other_map = output_renderers(other)
+
+    # Same ID, different field: each server renders its own
+    assert render_field_data('customfield_1', {'customfield_1': 3.0}, False, False) == ('Story Points', '3')
+    assert render_field_data('customfield_1', fields, False, False, field_map=other_map) == ('Team', 'Kernel')
+    # The other server's fields don't leak into the default configuration
+    assert render_field_data('customfield_1', {'customfield_1': 5.0}, False, False) == ('Story Points', '5')
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+import jirate.rollup
+from jirate.jboard import JiraProject
+from jirate.rollup import rollup, ISSUES, TODO, DONE, POINTS, POINTS_DONE
+from jirate.tests import fake_jira, fake_issues
+
+import pytest  # NOQA
+
+
+class fake_stamp_jira(fake_jira):
+    latest = '2023-11-30T15:06:39.875+0000'
+
+    def _get_json(self, url_fragment, params=None, **args):
+        assert url_fragment == 'search' and params['maxResults'] == 1
+        self.stamps.append(params['jql'])
+        return {'issues': [{'fields': {'updated': self.latest}}], 'total': 2}
+
+
+def test_rollup_totals(monkeypatch):
+    monkeypatch.setitem(fake_issues['TEST-4']['fields'], 'customfield_1234568', 3.0)
+    proj = JiraProject(fake_jira(), 'TEST', readonly=True)
+    result = rollup(proj, ['test-3'], points_field='customfield_1234568')[0]
+    assert result.key == 'TEST-3'
+    assert result.members == ['TEST-3', 'TEST-4']
+    assert list(result.totals) == [1.0, 1.0, 0.0, 0.0, 3.0, 0.0]
+    assert result.totals[ISSUES] == result.totals[TODO]
+    assert result.status_totals() == [('New', 1)]
+    assert result.percent_done() == 0.0
+
+    # Nothing below TEST-4
+    result = rollup(proj, ['TEST-4'])[0]
+    assert list(result.totals) == [0.0] * 6
+    assert result.percent_points_done() == 0.0
+
+
+def test_rollup_done():
+    result = jirate.rollup.Rollup('A-1', 'points')
+    result.add({'status': {'name': 'Closed', 'statusCategory': {'key': 'done'}}, 'points': 5})
+    result.add({'status': {'name': 'New', 'statusCategory': {'key': 'new'}}, 'points': '3'})
+    result.add({'status': {'name': 'Closed', 'statusCategory': {'key': 'done'}}, 'points': None})
+    assert result.totals[DONE] == 2
+    assert result.totals[POINTS] == 8.0 and result.totals[POINTS_DONE] == 5.0
+    assert result.status_totals() == [('Closed', 2), ('New', 1)]
+    assert round(result.percent_done()) == 67
+    assert round(result.percent_points_done()) == 62
+
+
+def test_rollup_cache(monkeypatch):
+    jira = fake_stamp_jira()
+    jira.stamps = []
+    proj = JiraProject(jira, 'TEST', readonly=True)
+    cache = {}
+    first = rollup(proj, ['TEST-3'], cache=cache)[0]
+    assert cache == {'TEST-3': first}
+    assert jira.stamps == ['key in (TEST-3, TEST-4) OR parent in (TEST-3, TEST-4) ORDER BY updated DESC']
+
+    # Unchanged: answered from the cache without walking the hierarchy
+    def _no_walk(*args, **kwargs):
+        raise AssertionError('hierarchy fetched again')
+
+    monkeypatch.setattr(jirate.rollup, 'walk', _no_walk)
+    assert rollup(proj, ['TEST-3'], cache=cache)[0] is first
+
+    # Changed since: fetched again
+    monkeypatch.undo()
+    jira.latest = '2024-01-01T00:00:00.000+0000'
+    second = rollup(proj, ['TEST-3'], cache=cache)[0]
+    assert second is not first
+    # ... but not kept, since it changed after we fetched it
+    assert cache == {}
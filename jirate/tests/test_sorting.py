@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+
+from jirate.sorting import parse_sort, priority_order, sort_key, sort_issues
+
+import pytest  # NOQA
+
+
+def _issue(key, **fields):
+    return {'key': key, 'fields': fields}
+
+
+def test_parse_sort():
+    assert parse_sort('priority, updated:DESC,key:asc') == [('priority', False), ('updated', True), ('key', False)]
+    with pytest.raises(ValueError):
+        parse_sort('updated:sideways')
+
+
+def test_sort_key_types():
+    assert sort_key(None) is None
+    assert sort_key([]) is None
+    assert sort_key('9') < sort_key('10')
+    assert sort_key(9.5) < sort_key('10')
+    assert sort_key('2023-12-01') < sort_key('2023-12-01T00:00:01.000+0000')
+    assert sort_key('2023-12-01T05:00:00.000+0500') < sort_key('2023-12-01T01:00:00.000+0000')
+    assert sort_key('TEST-9') < sort_key('TEST-10')
+    assert sort_key({'name': 'zed', 'displayName': 'Aaron'}) < sort_key({'name': 'abe', 'displayName': 'Bob'})
+    # Priorities sort like the server's list of them, not by ID or name
+    priorities = priority_order([{'id': '10', 'name': 'Blocker'}, {'id': '2', 'name': 'Critical'}, {'id': '3', 'name': 'Aardvark'}])
+    assert sort_key({'id': '3', 'name': 'Aardvark'}, 'priority', priorities) < sort_key({'id': '2', 'name': 'Critical'}, 'priority', priorities)
+    assert sort_key({'id': '2', 'name': 'Critical'}, 'priority', priorities) < sort_key({'id': 10, 'name': 'Blocker'}, 'priority', priorities)
+    assert sort_key({'id': '10', 'name': 'Blocker'}, 'priority') < sort_key({'id': '2', 'name': 'Critical'}, 'priority')
+    # Mixed types never raise
+    assert sorted([sort_key('abc'), sort_key('3'), sort_key('2023-01-01')])
+
+
+def test_sort_issues():
+    issues = [_issue('TEST-10', score=2.0, updated='2023-01-02T00:00:00.000+0000'),
+              _issue('TEST-9', score=None, updated='2023-01-03T00:00:00.000+0000'),
+              _issue('TEST-2', score=2.0, updated='2023-01-04T00:00:00.000+0000'),
+              _issue('TEST-1', score=10.0, updated='2023-01-01T00:00:00.000+0000')]
+
+    def _keys(order):
+        return [issue['key'] for issue in sort_issues(issues, order)]
+
+    assert _keys([('key', False)]) == ['TEST-1', 'TEST-2', 'TEST-9', 'TEST-10']
+    # Empty values last in either direction; ties keep the secondary order
+    assert _keys([('score', False), ('updated', True)]) == ['TEST-2', 'TEST-10', 'TEST-1', 'TEST-9']
+    assert _keys([('score', True), ('key', False)]) == ['TEST-1', 'TEST-2', 'TEST-10', 'TEST-9']
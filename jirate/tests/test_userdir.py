@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+import time
+
+from jirate.userdir import UserDirectory
+
+import pytest  # NOQA
+
+
+_users = [{'name': 'rory', 'key': 'JIRAUSER1', 'emailAddress': 'rory@pie.com', 'displayName': 'Rory Pond', 'self': 'https://domain.com/user/1'},
+          {'name': 'amy', 'key': 'JIRAUSER2', 'emailAddress': 'amy@pie.com', 'displayName': 'Amy Pond'},
+          {'name': 'clara', 'key': 'JIRAUSER3', 'emailAddress': 'clara@tardis.org', 'displayName': 'Clara Oswald'},
+          {'name': 'pond2', 'key': 'JIRAUSER4', 'emailAddress': 'other@pie.com', 'displayName': 'Amy Pond'}]
+
+
+class fake_user_server(object):
+    def __init__(self, users):
+        self.users = users
+        self._is_cloud = False
+        self.requests = []
+
+    def _get_json(self, path, params=None):
+        self.requests.append((path, params))
+        return self.users[params['startAt']:params['startAt'] + params['maxResults']]
+
+
+def test_userdir_matches():
+    users = UserDirectory('')
+    users.add(_users)
+    assert users.users['rory'] == {'name': 'rory', 'key': 'JIRAUSER1', 'emailAddress': 'rory@pie.com', 'displayName': 'Rory Pond'}
+    # exact, then prefix, then substring
+    assert users.matches('amy') == ['amy', 'pond2']
+    assert users.matches('pond') == ['amy', 'pond2', 'rory']
+    assert users.matches('pond', substrings=False) == ['amy', 'pond2', 'rory']
+    assert users.matches('tardis', substrings=False) == []
+    assert users.matches('tardis') == ['clara']
+    assert users.matches('JIRAUSER') == ['rory', 'amy', 'clara', 'pond2']
+    assert users.matches('nobody') == []
+
+    # Changed users are re-indexed
+    users.add([{'name': 'clara', 'emailAddress': 'clara@pie.com', 'displayName': 'Clara Oswald'}])
+    assert users.matches('tardis') == []
+    assert users.matches('pie.com') == ['amy', 'clara', 'pond2', 'rory']
+
+
+def test_userdir_resolve():
+    users = UserDirectory('')
+    users.add(_users)
+    # Unique identifiers are the same answer the server would give
+    assert users.resolve('Rory@Pie.com') == 'rory'
+    assert users.resolve('JIRAUSER3') == 'clara'
+    # ... but someone we haven't seen could share a display name,
+    # or match a partial name
+    assert users.resolve('Clara Oswald') is None
+    assert users.resolve('clar') is None
+    assert users.search('clar') is None
+    users.remember('Clara Oswald', 'clara')
+    assert users.resolve('clara oswald') == 'clara'
+
+    users.synced = time.time()
+    assert users.resolve('Rory Pond') == 'rory'
+    assert users.resolve('oswa') == 'clara'
+    assert users.resolve('Amy Pond') is None
+    assert users.resolve('pond') is None
+    assert [raw['name'] for raw in users.search('amy')] == ['amy', 'pond2']
+    # The server only matches the start of names and words
+    assert users.resolve('tardis') is None
+    assert users.resolve('swald') is None
+    assert [raw['name'] for raw in users.search('tardis')] == ['clara']
+
+    users.max_age = 60
+    users.synced = time.time() - 120
+    assert users.resolve('oswa') is None
+    # Answers from the server go stale too
+    assert users.resolve('clara oswald') == 'clara'
+    users.queries['clara oswald'] = ('clara', time.time() - 120)
+    assert users.resolve('clara oswald') is None
+
+
+def test_userdir_default_max_age():
+    users = UserDirectory('')
+    users.add(_users)
+    users.synced = time.time() - 2 * 86400
+    assert not users.complete()
+    users.max_age = 0
+    assert users.complete()
+
+
+def test_userdir_sync_and_save(tmp_path, monkeypatch):
+    monkeypatch.setattr('jirate.userdir._sync_page', 3)
+    server = fake_user_server(_users)
+    users = UserDirectory(str(tmp_path / 'users'))
+    users.add([{'name': 'gone', 'displayName': 'Deleted User'}])
+    users.remember('gone', 'gone')
+
+    assert users.sync(type('jirate', (), {'jira': server})) == 4
+    assert [params['startAt'] for _, params in server.requests] == [0, 3]
+    assert users.resolve('gone') is None
+    assert users.complete()
+    users.save()
+
+    users = UserDirectory(str(tmp_path / 'users'))
+    assert users.resolve('clara oswald') == 'clara'
+    assert sorted(users.users) == ['amy', 'clara', 'pond2', 'rory']
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+
+import threading
+
+from jirate.workers import parallel
+
+import pytest  # NOQA
+
+
+def test_parallel_order_and_errors():
+    def _invert(val):
+        return 1 / val
+
+    ret = parallel(_invert, [1, 2, 0, 4], max_workers=3)
+    assert [item for item, _, _ in ret] == [1, 2, 0, 4]
+    assert [result for _, result, _ in ret] == [1.0, 0.5, None, 0.25]
+    assert isinstance(ret[2][2], ZeroDivisionError)
+    assert [err for _, _, err in ret if err is None] == [None, None, None]
+
+
+def test_parallel_serial():
+    threads = set()
+
+    def _record(val):
+        threads.add(threading.get_ident())
+        return val
+
+    assert [result for _, result, _ in parallel(_record, range(5), max_workers=1)] == [0, 1, 2, 3, 4]
+    assert threads == set([threading.get_ident()])
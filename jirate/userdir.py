@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+#
+# Local user directory
+#
+# Every user lookup (assignment, user fields, search -u) is a round
+# trip to /user/search, and the request cache only helps when the exact
+# same string is asked for again.  The directory keeps every user the
+# server has told us about, indexed by the lower-cased user name,
+# account ID, key, email address and display name:
+#
+#   exact    term -> user IDs
+#   terms    sorted (term, user ID), including each word of display
+#            names, for prefix matches via bisect
+#   trigrams 3-character substring -> user IDs, for substring matches
+#
+# It is filled in from search results as we go, or all at once with
+# sync().  Only answers which the server would give are returned
+# locally: an exact match on a user name, key, account ID or email
+# address, or what the server said recently when asked the same thing.
+# Display names and partial matches are only trusted once the directory
+# holds every user (i.e. after a recent sync), and like the server, only
+# prefixes of names, addresses and display name words match; arbitrary
+# substrings are only used to list users (search -u).
+# Anything else - a miss or more than one match - goes to the server.
+#
+import bisect
+import time
+
+from jirate.localstate import PickledState
+
+default_users_file = '~/.jirate.users'
+
+# Seconds a sync, or an answer from the server, is trusted for
+default_max_age = 86400
+
+# Kept for each user; the rest of what the server sends is not used
+_user_keys = ('name', 'key', 'accountId', 'accountType', 'emailAddress', 'displayName', 'active')
+
+# Indexed for lookups
+_term_keys = ('name', 'key', 'accountId', 'emailAddress', 'displayName')
+
+# Unique to one user, so an exact match is the same answer the server gives
+_id_keys = ('name', 'key', 'accountId', 'emailAddress')
+
+# Users per request when syncing
+_sync_page = 1000
+
+
+def user_id(raw):
+    """Username (Data Center) or account ID (Cloud) of raw user data"""
+    if raw.get('name'):
+        return raw['name']
+    return raw.get('accountId')
+
+
+def _words(raw):
+    # Display name words, which the server matches prefixes of
+    return set(str(raw.get('displayName') or '').lower().split())
+
+
+def _trigrams(term):
+    return set([term[idx:idx + 3] for idx in range(len(term) - 2)])
+
+
+class UserDirectory(PickledState):
+    _version = 2
+
+    def __init__(self, filename=None, max_age=None):
+        """Locally indexed copy of users seen on one server
+
+        Parameters:
+          filename: Path to the saved directory (default: ~/.jirate.users)
+          max_age: Number of seconds after a sync during which partial
+                   matches are resolved locally, and for which answers
+                   from the server are reused (default: one day; 0:
+                   forever)
+        """
+        self.max_age = max_age if max_age is not None else default_max_age
+        super().__init__(filename, default_users_file)
+
+    def _reset(self):
+        self.users = {}
+        self.queries = {}
+        self.synced = None
+        self._exact = {}
+        self._terms = []
+        self._trigrams = {}
+
+    def _restore(self, data):
+        self.queries = data['queries']
+        self.synced = data['synced']
+        self._add(data['users'].values())
+
+    def _state(self):
+        return {'users': self.users, 'queries': self.queries, 'synced': self.synced}
+
+    def _recent(self, when):
+        return not self.max_age or when + self.max_age > time.time()
+
+    def complete(self):
+        """Whether the directory holds every user on the server"""
+        self._load()
+        if not self.synced:
+            return False
+        return self._recent(self.synced)
+
+    def _terms_of(self, raw, keys=_term_keys):
+        return set([str(raw[key]).lower() for key in keys if raw.get(key)])
+
+    def _remove(self, uid):
+        raw = self.users.pop(uid)
+        terms = self._terms_of(raw)
+        for term in terms:
+            self._exact[term].discard(uid)
+            for trigram in _trigrams(term):
+                self._trigrams[trigram].discard(uid)
+        for term in terms | _words(raw):
+            del self._terms[bisect.bisect_left(self._terms, (term, uid))]
+
+    def _add(self, users):
+        batch = {}
+        for raw in users:
+            uid = user_id(raw)
+            if uid:
+                batch[uid] = dict([(key, raw[key]) for key in _user_keys if key in raw])
+        terms = []
+        for uid, raw in batch.items():
+            if uid in self.users:
+                if self.users[uid] == raw:
+                    continue
+                self._remove(uid)
+            self.users[uid] = raw
+            for term in self._terms_of(raw):
+                self._exact.setdefault(term, set()).add(uid)
+                for trigram in _trigrams(term):
+                    self._trigrams.setdefault(trigram, set()).add(uid)
+            terms.extend([(term, uid) for term in self._terms_of(raw) | _words(raw)])
+        if terms:
+            # Much cheaper than inserting them one at a time
+            self._terms.extend(terms)
+            self._terms.sort()
+            self._dirty = True
+
+    def add(self, users):
+        """Record users from the server
+
+        Parameters:
+          users: list of raw user data
+        """
+        self._load()
+        self._add(users)
+
+    def remember(self, query, uid):
+        """Record which user the server resolved a query to"""
+        self._load()
+        self.queries[query.lower()] = (uid, time.time())
+        self._dirty = True
+
+    def matches(self, query, substrings=True):
+        """Users whose name, key, account ID, email address or display
+        name contains query (case-insensitive)
+
+        Parameters:
+          query: Text to look for
+          substrings: Include matches anywhere in a term, rather than
+                      only at the start of a term or display name word
+                      (which is all the server matches)
+
+        Returns:
+          list of user IDs; exact matches first, then prefix matches,
+          then any other substring matches
+        """
+        self._load()
+        term = query.lower()
+        ret = sorted(self._exact.get(term, []))
+        seen = set(ret)
+
+        idx = bisect.bisect_left(self._terms, (term,))
+        while idx < len(self._terms) and self._terms[idx][0].startswith(term):
+            uid = self._terms[idx][1]
+            if uid not in seen:
+                seen.add(uid)
+                ret.append(uid)
+            idx = idx + 1
+
+        if not substrings or len(term) < 3:
+            return ret
+        candidates = None
+        for trigram in _trigrams(term):
+            found = self._trigrams.get(trigram, set())
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return ret
+        for uid in sorted(candidates - seen):
+            if any(term in other for other in self._terms_of(self.users[uid])):
+                ret.append(uid)
+        return ret
+
+    def resolve(self, query):
+        """Resolve a user locally, the way the server would
+
+        Parameters:
+          query: email, display name, username or account ID
+
+        Returns:
+          user ID, or None if the server needs to be asked
+        """
+        self._load()
+        term = query.lower()
+        if term in self.queries:
+            uid, when = self.queries[term]
+            # Someone else may match by now
+            if uid in self.users and self._recent(when):
+                return uid
+        exact = self._exact.get(term, set())
+        complete = self.complete()
+        if len(exact) == 1:
+            uid = list(exact)[0]
+            # Someone we haven't seen may have the same display name
+            if complete or term in self._terms_of(self.users[uid], _id_keys):
+                return uid
+            return None
+        if exact or not complete:
+            return None
+        found = self.matches(query, substrings=False)
+        if len(found) == 1:
+            return found[0]
+        return None
+
+    def search(self, query):
+        """Search users locally; only possible when complete()
+
+        Returns:
+          list of raw user data, or None if the server needs to be asked
+        """
+        if not self.complete():
+            return None
+        return [self.users[uid] for uid in self.matches(query)]
+
+    def sync(self, jirate_obj):
+        """Replace the directory's contents with every user on the server
+
+        Returns:
+          Number of users
+        """
+        users = []
+        start = 0
+        while True:
+            if jirate_obj.jira._is_cloud:
+                page = jirate_obj.jira._get_json('users/search', params={'startAt': start, 'maxResults': _sync_page})
+            else:
+                page = jirate_obj.jira._get_json('user/search', params={'username': '.', 'startAt': start, 'maxResults': _sync_page})
+            if not page:
+                break
+            # Apps and customer accounts can't be assigned issues
+            users.extend([raw for raw in page if raw.get('accountType', 'atlassian') == 'atlassian'])
+            start = start + len(page)
+            if len(page) < _sync_page:
+                break
+        self.clear()
+        self._add(users)
+        self.synced = time.time()
+        return len(self.users)
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+#
+# Bounded concurrency for independent requests
+#
+# Most of the time Jirate is waiting on the server, not the CPU.  When
+# we have a number of independent requests to make (counts, updates to
+# several issues...), issuing them from a small thread pool over the
+# shared session cuts the wall-clock time to roughly that of the
+# slowest request.  python-jira's ResilientSession already backs off
+# and retries when the server answers 429 (rate limited), so we keep
+# the pool small rather than doing our own throttling.
+#
+from concurrent.futures import ThreadPoolExecutor
+
+default_max_workers = 8
+
+
+def parallel(func, items, max_workers=None):
+    """Call func(item) for each item using a bounded thread pool.
+
+    Exceptions are captured per item, so one failure does not abort or
+    hide the results of the others.
+
+    Parameters:
+      func: Function taking one argument
+      items: Iterable of arguments
+      max_workers: Maximum number of concurrent calls (default: 8); 1
+                   runs everything serially in the calling thread
+
+    Returns:
+      list of (item, result, exception) tuples in the same order as
+      items; exception is None on success and result is None on failure
+    """
+    items = list(items)
+    if not max_workers:
+        max_workers = default_max_workers
+
+    def _call(item):
+        try:
+            return (item, func(item), None)
+        except Exception as e:  # NOQA - reported to caller
+            return (item, None, e)
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [_call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(int(max_workers), len(items))) as pool:
+        return list(pool.map(_call, items))